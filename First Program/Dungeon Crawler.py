@@ -1,31 +1,44 @@
 from OpenGL.GL import *
 from OpenGL.GLUT import *
 from OpenGL.GLU import *
-import random
+import atexit
 import math
+import random
 import time
 
-# Game state variables
-game_active = False
-game_won = False
-game_over = False
-start_time = 0
-total_time_limit = 120  # 2 minutes time limit
-
-# Player variables
-player_pos = [0, 0, 0]  # x, y, z
-player_angle = 0
-player_speed = 10
-player_size = 30
-player_health = 100
-player_hidden = False  # Stealth mode
-collected_treasures = 0
-# Boost system
-boost_active = False
-boost_start_time = 0
-boost_duration = 3       # Boost lasts 3 seconds
-boost_cooldown = 9       # Time before you can boost again
-last_boost_time = -boost_cooldown  # Ensure it's available at start
+import numpy as np
+
+from frame_scheduler import FrameScheduler, DEFAULT_FPS
+from frustum import CullStats, Frustum
+from hud import HudRenderer, FONT_TITLE
+from lod import LodSelector, pixels_per_unit
+from meshes import EntityRenderer
+from minimap import Minimap, REFRESH_HZ
+from profiler import PhaseProfiler
+from scene_cache import StaticScene
+from simulation import Simulation, build_arg_parser, run_headless
+import replay
+import snapshot
+
+# Simulation core; the GLUT front-end only samples its latest state
+sim = Simulation()
+scheduler = None  # FrameScheduler, created in main()
+recorder = None  # replay.Recorder when --record is given
+profile_csv = None  # --profile-csv path; profiling then runs from the start
+static_scene = StaticScene()  # Floor, boundary and obstacles, baked per level
+minimap = Minimap(1000, 800)
+hud = HudRenderer()
+entities = EntityRenderer()  # Instanced monster, treasure and player models
+
+# Frame phase profiler: P toggles the overlay, F8 dumps the buffered frames to CSV
+PROFILE_PHASES = ("simulation", "camera", "scene", "entities", "hud", "minimap", "swap")
+(PHASE_SIMULATION, PHASE_CAMERA, PHASE_SCENE, PHASE_ENTITIES,
+ PHASE_HUD, PHASE_MINIMAP, PHASE_SWAP) = range(len(PROFILE_PHASES))
+PROFILE_CSV_PATH = "profile.csv"
+PROFILE_OVERLAY_FRAMES = 30  # Frames between overlay refreshes
+profiler = PhaseProfiler(PROFILE_PHASES)
+show_profile = False
+profile_overlay = []  # Cached overlay lines
 
 # Camera variables
 camera_pos = (0, -200, 150)  # Initial camera position
@@ -34,19 +47,25 @@ camera_height = 550
 camera_distance = 500
 third_person_view = True
 
+# Projection used by setupCamera(), also used to build the culling frustum
+CAMERA_FOVY = 45
+CAMERA_ASPECT = 1.25
+CAMERA_NEAR = 0.1
+CAMERA_FAR = 2000
+view_frustum = None  # Frustum of the current frame's camera, set in setupCamera()
+cull_stats = CullStats()  # Objects drawn vs. culled this frame
+lod = LodSelector(pixels_per_unit(CAMERA_FOVY, 800))  # Entity detail levels for the 800-pixel-high window
+
 # Map variables
 MAP_SIZE = 1000
-GRID_LENGTH = 600
-WALL_HEIGHT = 100
-obstacles = []  # List of obstacles [x, y, width, height]
-treasures = []  # List of treasures [x, y, collected]
-monsters = []   # List of monsters [x, y, direction, speed, patrol_points, current_target]
-
-# Gameplay configuration
-NUM_TREASURES = 5
-NUM_MONSTERS = 3
-NUM_OBSTACLES = 15
-TOTAL_TREASURES_NEEDED = 5
+
+# freeglut reports the Shift keys to the special-key callbacks with these codes
+GLUT_KEY_SHIFT_L = 112
+GLUT_KEY_SHIFT_R = 113
+
+# Snapshot files: F5 quicksaves, F9 quickloads; a crash writes its state for --restore
+QUICKSAVE_PATH = "quicksave.snapshot"
+CRASH_SNAPSHOT_PATH = "crash.snapshot"
 
 # Lighting
 light_enabled = True
@@ -55,544 +74,163 @@ diffuse_light = [1.0, 1.0, 1.0, 1.0]
 light_position = [0, 0, 300, 1.0]
 
 
-def init_game():
-    """Initialize the game state with obstacles, treasures, and monsters."""
-    global obstacles, treasures, monsters, player_pos, start_time
-    global game_active, game_won, game_over, collected_treasures, player_health
-    global boost_active, boost_start_time, last_boost_time,player_hidden
-
-    # Reset game state
-    obstacles = []
-    treasures = []
-    monsters = []
-    player_pos = [0, 0, 20]
-    player_health = 100
-    collected_treasures = 0
-    game_active = True
-    game_won = False
-    game_over = False
-    if player_hidden:
-        player_hidden=False
-    start_time = time.time()
-    # --- reset boost system ---
-    boost_active = False
-    boost_start_time = 0
-    last_boost_time = start_time - boost_cooldown
-    # Generate obstacles (walls)
-    for _ in range(NUM_OBSTACLES):
-        width = random.randint(50, 200)
-        height = random.randint(50, 200)
-        x = random.randint(-GRID_LENGTH + width//2, GRID_LENGTH - width//2)
-        y = random.randint(-GRID_LENGTH + height//2, GRID_LENGTH - height//2)
-        
-        # Ensure no obstacle is too close to player start position
-        if abs(x) < 100 and abs(y) < 100:
-            continue
-            
-        obstacles.append([x, y, width, height])
-    
-    # Generate treasures
-    for _ in range(NUM_TREASURES):
-        while True:
-            x = random.randint(-GRID_LENGTH + 50, GRID_LENGTH - 50)
-            y = random.randint(-GRID_LENGTH + 50, GRID_LENGTH - 50)
-            
-            # Check if treasure is not inside any obstacle and not too close to player
-            valid_position = True
-            if abs(x) < 100 and abs(y) < 100:
-                valid_position = False
-                
-            for ox, oy, width, height in obstacles:
-                if (ox - width/2 <= x <= ox + width/2) and (oy - height/2 <= y <= oy + height/2):
-                    valid_position = False
-                    break
-            
-            if valid_position:
-                treasures.append([x, y, False])  # x, y, collected status
-                break
-    
-    # Generate monsters and their patrol routes
-    for _ in range(NUM_MONSTERS):
-        # Create patrol points
-        patrol_points = []
-        for _ in range(random.randint(3, 6)):
-            px = random.randint(-GRID_LENGTH + 50, GRID_LENGTH - 50)
-            py = random.randint(-GRID_LENGTH + 50, GRID_LENGTH - 50)
-            patrol_points.append([px, py])
-        
-        # Initial position is first patrol point
-        x, y = patrol_points[0]
-        speed = random.uniform(0.3, 1.0)
-        
-        monsters.append([x, y, 0, speed, patrol_points, 0])  # x, y, direction, speed, patrol points, current target
-
-
-def draw_text(x, y, text, font=GLUT_BITMAP_HELVETICA_18): # type: ignore # type: ignore
-    """Draw text at screen position (x, y)."""
-    glColor3f(1, 1, 1)
-    glMatrixMode(GL_PROJECTION)
-    glPushMatrix()
-    glLoadIdentity()
-    
-    # Set up an orthographic projection for screen coordinates
-    gluOrtho2D(0, 1000, 0, 800)  # left, right, bottom, top
-    
-    glMatrixMode(GL_MODELVIEW)
-    glPushMatrix()
-    glLoadIdentity()
-    
-    # Draw text
-    glRasterPos2f(x, y)
-    for ch in text:
-        glutBitmapCharacter(font, ord(ch))
-    
-    # Restore matrices
-    glPopMatrix()
-    glMatrixMode(GL_PROJECTION)
-    glPopMatrix()
-    glMatrixMode(GL_MODELVIEW)
-
-
-def draw_player():
-    """Draw the player character."""
-    glPushMatrix()
-    
-    # Position the player
-    glTranslatef(player_pos[0], player_pos[1], player_pos[2] + player_size/2)
-    glRotatef(player_angle, 0, 0, 1)
-    
-    # Draw player body
-    if player_hidden:
-        # Translucent when in stealth mode
-        glColor4f(0.3, 0.5, 0.8, 0.5)
+def visible_mask(name, poses, category=None):
+    """Mask of the rows of poses whose model `name` is at least partly inside the view frustum."""
+    if view_frustum is None:
+        return np.ones(len(poses), dtype=bool)
+    visible = view_frustum.spheres_visible(poses[:, 0:3], entities.library.bounding_radius(name))
+    if category is not None:
+        cull_stats.add(category, visible)
+    return visible
+
+
+def visible_poses(name, poses, category=None):
+    """Rows of poses whose model `name` is at least partly inside the view frustum."""
+    return poses[visible_mask(name, poses, category)]
+
+
+def draw_lod(name, poses, category=None, tint=(1, 1, 1, 1)):
+    """Draw the visible rows of poses, each at the detail level its distance from the camera allows."""
+    poses = np.asarray(poses, dtype=np.float32).reshape(-1, 4)
+    # Levels are chosen before culling so every entity keeps its hysteresis history
+    levels = lod.select(name, entities.library.lod_errors(name), poses[:, 0:3], camera_pos)
+    visible = visible_mask(name, poses, category)
+    entities.draw_levels(name, poses[visible], levels[visible], tint)
+
+
+def draw_entities():
+    """Draw treasures, monsters and the player, one instanced call per model."""
+    # Treasures: closed and open chests, plus the blinking shine on closed ones
+    chests = np.asarray(sim.treasures, dtype=np.float32).reshape(-1, 3)
+    collected = chests[:, 2] != 0
+    poses = np.zeros((len(chests), 4), dtype=np.float32)
+    poses[:, 0:2] = chests[:, 0:2]
+    poses[:, 2] = 15
+    entities.draw('chest_closed', visible_poses('chest_closed', poses[~collected], 'treasures'))
+    entities.draw('chest_open', visible_poses('chest_open', poses[collected], 'treasures'))
+    if int(sim.time * 2) % 2 == 0:
+        draw_lod('chest_shine', poses[~collected])
+
+    # Monsters
+    monsters = sim.monsters
+    poses = np.column_stack((monsters.x, monsters.y, np.full(len(monsters), 30.0), monsters.direction))
+    draw_lod('monster', poses, 'monsters')
+
+    # Player, translucent when in stealth mode
+    px, py, pz = sim.player_pos
+    pose = (px, py, pz + sim.player_size/2, sim.player_angle)
+    if sim.player_hidden:
+        draw_lod('player_hidden', pose, tint=(1, 1, 1, 0.5))
     else:
-        glColor3f(0.2, 0.4, 0.8)
-    
-    glutSolidSphere(player_size/2, 12, 12)
-    
-    # Draw player direction indicator (nose)
-    glColor3f(1, 0, 0)
-    glPushMatrix()
-    glTranslatef(player_size/2, 0, 0)
-    glutSolidSphere(player_size/5, 8, 8)
-    glPopMatrix()
-    
-    glPopMatrix()
-
-
-def draw_treasure_chest(x, y, collected):
-    """Draw a treasure chest at position (x, y)."""
-    glPushMatrix()
-    glTranslatef(x, y, 15)
-    
-    if collected:
-        # Draw open chest (collected)
-        glColor3f(0.3, 0.2, 0.1)  # Dark brown base
-    else:
-        # Draw closed chest (not collected)
-        glColor3f(0.8, 0.6, 0.2)  # Gold color
-        
-        # Draw shining effect
-        if int(time.time() * 2) % 2 == 0:
-            glPushMatrix()
-            glTranslatef(0, 0, 30)
-            glColor3f(1.0, 1.0, 0.6)
-            glutSolidSphere(8, 8, 8)
-            glPopMatrix()
-    
-    # Chest base
-    glPushMatrix()
-    glScalef(20, 15, 10)
-    glutSolidCube(1)
-    glPopMatrix()
-    
-    # Chest lid
-    glPushMatrix()
-    if collected:
-        glTranslatef(-5, 0, 10)
-        glRotatef(120, 0, 1, 0)
-    else:
-        glTranslatef(0, 0, 10)
-    
-    glColor3f(0.7, 0.5, 0.2)
-    glScalef(20, 15, 5)
-    glutSolidCube(1)
-    glPopMatrix()
-    
-    glPopMatrix()
-
-
-def draw_monster(x, y, direction):
-    """Draw a monster at position (x, y)."""
-    glPushMatrix()
-    glTranslatef(x, y, 30)
-    glRotatef(direction, 0, 0, 1)
-    
-    # Monster body
-    glColor3f(0.7, 0.0, 0.0)  # Red
-    glutSolidSphere(25, 10, 10)
-    
-    # Monster eyes
-    glColor3f(1.0, 1.0, 0.0)  # Yellow
-    
-    glPushMatrix()
-    glTranslatef(15, 10, 10)
-    glutSolidSphere(5, 8, 8)
-    glPopMatrix()
-    
-    glPushMatrix()
-    glTranslatef(15, -10, 10)
-    glutSolidSphere(5, 8, 8)
-    glPopMatrix()
-    
-    # Monster teeth
-    glColor3f(1.0, 1.0, 1.0)  # White
-    glPushMatrix()
-    glTranslatef(22, 0, -5)
-    glRotatef(90, 0, 1, 0)
-    glutSolidCone(10, 10, 4, 1)
-    glPopMatrix()
-    
-    glPopMatrix()
-
-
-def draw_obstacle(x, y, width, height):
-    """Draw an obstacle (wall) at position (x, y)."""
-    glPushMatrix()
-    glTranslatef(x, y, WALL_HEIGHT/2)
-    
-    # Set wall color
-    glColor3f(0.5, 0.5, 0.6)  # Stone gray
-    
-    # Draw the wall
-    glPushMatrix()
-    glScalef(width, height, WALL_HEIGHT)
-    glutSolidCube(1)
-    glPopMatrix()
-    
-    # Add some stone texture detail
-    glColor3f(0.4, 0.4, 0.5)  # Darker gray for details
-    for _ in range(5):
-        dx = random.uniform(-width/2.2, width/2.2)
-        dy = random.uniform(-height/2.2, height/2.2)
-        dz = random.uniform(-WALL_HEIGHT/2.2, WALL_HEIGHT/2.2)
-        dsize = random.uniform(5, 15)
-        
-        glPushMatrix()
-        glTranslatef(dx, dy, dz)
-        glutSolidCube(dsize)
-        glPopMatrix()
-    
-    glPopMatrix()
-
-
-def draw_floor():
-    """Draw the dungeon floor with a grid pattern."""
-    cell_size = 50
-    
-    glBegin(GL_QUADS)
-    
-    for x in range(-GRID_LENGTH, GRID_LENGTH + 1, cell_size):
-        for y in range(-GRID_LENGTH, GRID_LENGTH + 1, cell_size):
-            # Alternate colors for grid cells
-            if (x//cell_size + y//cell_size) % 2 == 0:
-                glColor3f(0.3, 0.3, 0.35)  # Dark gray
-            else:
-                glColor3f(0.35, 0.35, 0.4)  # Slightly lighter gray
-            
-            glVertex3f(x, y, 0)
-            glVertex3f(x + cell_size, y, 0)
-            glVertex3f(x + cell_size, y + cell_size, 0)
-            glVertex3f(x, y + cell_size, 0)
-    
-    glEnd()
-
-
-def draw_dungeon_boundary():
-    """Draw the outer walls of the dungeon."""
-    # Draw outer walls
-    wall_thickness = 20
-    
-    # North wall
-    glPushMatrix()
-    glTranslatef(0, GRID_LENGTH + wall_thickness/2, WALL_HEIGHT/2)
-    glColor3f(0.4, 0.4, 0.45)
-    glScalef(2*GRID_LENGTH + 2*wall_thickness, wall_thickness, WALL_HEIGHT)
-    glutSolidCube(1)
-    glPopMatrix()
-    
-    # South wall
-    glPushMatrix()
-    glTranslatef(0, -GRID_LENGTH - wall_thickness/2, WALL_HEIGHT/2)
-    glColor3f(0.4, 0.4, 0.45)
-    glScalef(2*GRID_LENGTH + 2*wall_thickness, wall_thickness, WALL_HEIGHT)
-    glutSolidCube(1)
-    glPopMatrix()
-    
-    # East wall
-    glPushMatrix()
-    glTranslatef(GRID_LENGTH + wall_thickness/2, 0, WALL_HEIGHT/2)
-    glColor3f(0.4, 0.4, 0.45)
-    glScalef(wall_thickness, 2*GRID_LENGTH, WALL_HEIGHT)
-    glutSolidCube(1)
-    glPopMatrix()
-    
-    # West wall
-    glPushMatrix()
-    glTranslatef(-GRID_LENGTH - wall_thickness/2, 0, WALL_HEIGHT/2)
-    glColor3f(0.4, 0.4, 0.45)
-    glScalef(wall_thickness, 2*GRID_LENGTH, WALL_HEIGHT)
-    glutSolidCube(1)
-    glPopMatrix()
+        draw_lod('player', pose)
 
 
 def draw_status_bar():
-    """Draw a 3D HUD status bar in the world."""
-    # Draw status bar showing health and treasures
-    x = player_pos[0] - 40
-    y = player_pos[1] - 60
-    z = player_pos[2] + 80
+    """Queue the health bar and treasure indicators on the HUD."""
+    x, y = 10, 610
+    player_health = sim.player_health
     
     # Health bar background
-    glPushMatrix()
-    glTranslatef(x, y, z)
-    glColor3f(0.2, 0.2, 0.2)
-    glScalef(82, 12, 1)
-    glutSolidCube(1)
-    glPopMatrix()
-    
-    # Health bar fill
-    health_width = 80 * (player_health / 100)
-    glPushMatrix()
-    glTranslatef(x - (80 - health_width)/2, y, z + 1)
-    
-    # Color changes based on health level
+    hud.rect(x, y, 82, 12, (0.2, 0.2, 0.2, 1))
+    
+    # Health bar fill, color changes based on health level
+    health_width = 80 * (max(0, player_health) / 100)
     if player_health > 60:
-        glColor3f(0.0, 0.8, 0.0)  # Green
+        health_color = (0.0, 0.8, 0.0, 1)  # Green
     elif player_health > 30:
-        glColor3f(0.8, 0.8, 0.0)  # Yellow
+        health_color = (0.8, 0.8, 0.0, 1)  # Yellow
     else:
-        glColor3f(0.8, 0.0, 0.0)  # Red
-        
-    glScalef(health_width, 10, 1)
-    glutSolidCube(1)
-    glPopMatrix()
+        health_color = (0.8, 0.0, 0.0, 1)  # Red
+    hud.rect(x + 1, y + 1, health_width, 10, health_color)
     
     # Treasure indicators
-    for i in range(TOTAL_TREASURES_NEEDED):
-        glPushMatrix()
-        glTranslatef(x + i*15 - 30, y - 15, z)
-        
-        if i < collected_treasures:
-            glColor3f(0.8, 0.8, 0.0)  # Gold for collected
+    for i in range(sim.treasures_needed):
+        if i < sim.collected_treasures:
+            color = (0.8, 0.8, 0.0, 1)  # Gold for collected
         else:
-            glColor3f(0.4, 0.4, 0.4)  # Gray for not collected
-            
-        glutSolidCube(10)
-        glPopMatrix()
+            color = (0.4, 0.4, 0.4, 1)  # Gray for not collected
+        hud.rect(x + i*15, y - 17, 10, 10, color)
 
 
 def draw_game_ui():
-    """Draw 2D UI elements that stay fixed on screen."""
+    """Draw 2D UI elements that stay fixed on screen, in one batched HUD pass."""
     # Draw time remaining
-    time_elapsed = int(time.time() - start_time)
-    time_remaining = max(0, total_time_limit - time_elapsed)
+    time_remaining = sim.time_remaining()
     minutes = time_remaining // 60
     seconds = time_remaining % 60
     
     # Status messages
-    if game_active:
-        draw_text(10, 770, f"Time Remaining: {minutes:02d}:{seconds:02d}")
-        draw_text(10, 740, f"Health: {player_health}%")
-        draw_text(10, 710, f"Treasures: {collected_treasures}/{TOTAL_TREASURES_NEEDED}")
+    if sim.game_active:
+        hud.text(10, 770, f"Time Remaining: {minutes:02d}:{seconds:02d}")
+        hud.text(10, 740, f"Health: {sim.player_health}%")
+        hud.text(10, 710, f"Treasures: {sim.collected_treasures}/{sim.treasures_needed}")
         
-        if player_hidden:
-            draw_text(10, 680, "STEALTH MODE ACTIVE")
+        if sim.player_hidden:
+            hud.text(10, 680, "STEALTH MODE ACTIVE")
+        
+        # Health and treasure bars
+        draw_status_bar()
     
     # Game over or win messages
-    if game_over:
-        draw_text(400, 400, "GAME OVER", GLUT_BITMAP_TIMES_ROMAN_24) # type: ignore
-        draw_text(350, 350, "Press R to restart")
+    if sim.game_over:
+        hud.text(400, 400, "GAME OVER", FONT_TITLE)
+        hud.text(350, 350, "Press R to restart")
     
-    if game_won:
-        draw_text(400, 400, "YOU WIN!", GLUT_BITMAP_TIMES_ROMAN_24) # type: ignore
-        draw_text(330, 350, "All treasures collected!")
-        draw_text(350, 320, "Press R to restart")
+    if sim.game_won:
+        hud.text(400, 400, "YOU WIN!", FONT_TITLE)
+        hud.text(330, 350, "All treasures collected!")
+        hud.text(350, 320, "Press R to restart")
     
-    if not game_active and not game_over and not game_won:
+    if not sim.game_active and not sim.game_over and not sim.game_won:
         # Start screen
-        draw_text(380, 450, "DUNGEON CRAWLER", GLUT_BITMAP_TIMES_ROMAN_24) # type: ignore
-        draw_text(250, 400, "Find all treasures before time runs out!")
-        draw_text(280, 370, "Press SPACE to start the game")
-        draw_text(200, 340, "Use W,A,S,D to move, C for stealth mode, shift for speed boost")
-        draw_text(220, 310, "Avoid monsters and collect treasures!")
-    if boost_active:
-        draw_text(10, 650, "Speed Boost: ACTIVE")
-    elif time.time() - last_boost_time < boost_cooldown:
-        cd = int(boost_cooldown - (time.time() - last_boost_time))
-        draw_text(10, 650, f"Speed Boost: Cooldown ({cd}s)")
-    elif game_active:
-        draw_text(10, 650, "Speed Boost: Ready")
-
-# size of minimap in pixels
-MINIMAP_W, MINIMAP_H = 200, 200
-
-def draw_topdown_minimap():
-    # 1. Set viewport to the lower‐right corner
-    glViewport(1000 - MINIMAP_W, 0, MINIMAP_W, MINIMAP_H)
-    glEnable(GL_SCISSOR_TEST)
-    glScissor(1000 - MINIMAP_W, 0, MINIMAP_W, MINIMAP_H)
-    # clear only depth so the map draws cleanly
-    glClear(GL_DEPTH_BUFFER_BIT)
-    
-    # 2. Switch to a projection for a top‐down camera
-    glMatrixMode(GL_PROJECTION)
-    glPushMatrix()
-    glLoadIdentity()
-    # Could be orthographic or perspective; here we use a wide FOV:
-    gluPerspective(90, MINIMAP_W / MINIMAP_H, 0.1, 2000)
-    
-    # 3. Position camera straight above the player
-    glMatrixMode(GL_MODELVIEW)
-    glPushMatrix()
-    glLoadIdentity()
-    px, py, pz = player_pos
-    # eye at (px, py, HIGH), look at (px,py,0), up=(0,1,0)
-    gluLookAt(px, py, 800,
-              px, py,   0,
-              1,   0,   0)
-    
-    # 4. Draw the exact same 3D scene (floor, walls, treasures, monsters, player)
-    #    You can call your existing draw_* routines (minus the 2D UI).
-    draw_floor()
-    draw_dungeon_boundary()
-    for ox, oy, w, h in obstacles:    draw_obstacle(ox, oy, w, h)
-    for tx, ty, col in treasures:     draw_treasure_chest(tx, ty, col)
-    for mx_, my_, dir_, *_ in monsters: draw_monster(mx_, my_, dir_)
-    draw_player()
-    
-    # 5. Restore matrices & state
-    glPopMatrix()
-    glMatrixMode(GL_PROJECTION)
-    glPopMatrix()
-    glMatrixMode(GL_MODELVIEW)
-    glDisable(GL_SCISSOR_TEST)
-    # finally reset viewport back to full window
-    glViewport(0, 0, 1000, 800)
+        hud.text(380, 450, "DUNGEON CRAWLER", FONT_TITLE)
+        hud.text(250, 400, "Find all treasures before time runs out!")
+        hud.text(280, 370, "Press SPACE to start the game")
+        hud.text(200, 340, "Use W,A,S,D to move, C for stealth mode, shift for speed boost")
+        hud.text(220, 310, "Avoid monsters and collect treasures!")
+    if sim.boost_active:
+        hud.text(10, 650, "Speed Boost: ACTIVE")
+    elif sim.boost_cooldown_remaining() > 0:
+        cd = int(sim.boost_cooldown_remaining())
+        hud.text(10, 650, f"Speed Boost: Cooldown ({cd}s)")
+    elif sim.game_active:
+        hud.text(10, 650, "Speed Boost: Ready")
+    
+    if show_profile:
+        draw_profile_overlay()
+    
+    hud.draw()
+
+
+def draw_profile_overlay():
+    """Queue rolling p50/p99 frame phase times in the top-right corner."""
+    global profile_overlay
+    if not profile_overlay or profiler.frames % PROFILE_OVERLAY_FRAMES == 0:
+        stats = profiler.percentiles((50, 99))
+        profile_overlay = [f"{'phase':<10} {'p50':>6} {'p99':>6} ms"]
+        profile_overlay += [f"{name:<10} {p50:6.2f} {p99:6.2f}" for name, (p50, p99) in stats.items()]
+        profile_overlay.append(f"{'objects':<10} {'drawn':>6} {'culled':>6}")
+        counts = dict(cull_stats.counts)
+        counts['minimap'] = (minimap.cull_stats.drawn, minimap.cull_stats.culled)
+        profile_overlay += [f"{name:<10} {drawn:6d} {culled:6d}" for name, (drawn, culled) in counts.items()]
+        profile_overlay.append(f"{'triangles':<10} {'lod':>6} {'full':>6}")
+        profile_overlay.append(f"{'entities':<10} {entities.triangles:6d} {entities.full_detail_triangles:6d}")
+    for i, line in enumerate(profile_overlay):
+        hud.text(760, 770 - 22*i, line, color=(0.6, 1.0, 0.6, 1))
 
 
-def check_collision(x, y, radius=player_size/2):
-    """Check if a position (x, y) with given radius collides with any obstacle."""
-    # Check boundary collisions
-    if x - radius < -GRID_LENGTH or x + radius > GRID_LENGTH or y - radius < -GRID_LENGTH or y + radius > GRID_LENGTH:
-        return True
-    
-    # Check obstacle collisions
-    for ox, oy, width, height in obstacles:
-        # Simple collision detection with rectangular obstacles
-        if (x + radius > ox - width/2 and x - radius < ox + width/2 and
-            y + radius > oy - height/2 and y - radius < oy + height/2):
-            return True
-    
-    return False
-
-
-def update_player():
-    """Update player position and state."""
-    global player_pos, collected_treasures, player_health, game_over, game_won
-    
-    if not game_active or game_over or game_won:
-        return
-    
-    # Check for treasure collection
-    for i, (tx, ty, collected) in enumerate(treasures):
-        if not collected:
-            # Distance check for treasure collection
-            dx = player_pos[0] - tx
-            dy = player_pos[1] - ty
-            distance = math.sqrt(dx*dx + dy*dy)
-            
-            if distance < player_size + 20:  # Player is close enough to treasure
-                treasures[i][2] = True  # Mark as collected
-                collected_treasures += 1
-                
-                # Check if all treasures are collected
-                if collected_treasures >= TOTAL_TREASURES_NEEDED:
-                    game_won = True
-    
-    # Check for monster collisions
-    if not player_hidden:  # Only check when not in stealth mode
-        for mx, my, _, _, _, _ in monsters:
-            dx = player_pos[0] - mx
-            dy = player_pos[1] - my
-            distance = math.sqrt(dx*dx + dy*dy)
-            
-            if distance < player_size + 25:  # Player is close to monster
-                player_health -= 1  # Damage player
-                
-                # Game over if health depleted
-                if player_health <= 0:
-                    game_over = True
-    
-    # Time limit check
-    if time.time() - start_time > total_time_limit:
-        game_over = True
-
-
-def update_monsters():
-    """Update monster positions and patrol routes."""
-    global monsters
-    
-    if not game_active or game_over or game_won:
-        return
-    
-    for i, (mx, my, direction, speed, patrol_points, target_idx) in enumerate(monsters):
-        # Get current target point
-        tx, ty = patrol_points[target_idx]
-        
-        # Calculate direction to target
-        dx = tx - mx
-        dy = ty - my
-        distance = math.sqrt(dx*dx + dy*dy)
-        
-        # Update direction (angle) - convert to degrees
-        if distance > 0:
-            direction = math.degrees(math.atan2(dy, dx))
-        
-        # Check if monster is close to target
-        if distance < 10:
-            # Move to next patrol point
-            target_idx = (target_idx + 1) % len(patrol_points)
-        else:
-            # Move towards the target
-            mx += (dx / distance) * speed
-            my += (dy / distance) * speed
-        
-        # Detect and avoid player if player isn't hidden
-        if not player_hidden:
-            pdx = player_pos[0] - mx
-            pdy = player_pos[1] - my
-            player_distance = math.sqrt(pdx*pdx + pdy*pdy)
-            
-            if player_distance < 200:
-                # Monster detected player and chases
-                chase_direction = math.degrees(math.atan2(pdy, pdx))
-                direction = chase_direction
-                
-                # Move toward player faster
-                mx += (pdx / player_distance) * speed * 1.5
-                my += (pdy / player_distance) * speed * 1.5
-                
-                # Don't update target index - will resume patrol after losing player
-        
-        # Update monster position
-        monsters[i] = [mx, my, direction, speed, patrol_points, target_idx]
+def draw_topdown_minimap():
+    """Draw the top-down minimap in the lower-right corner."""
+    minimap.sync(sim, static_scene)
+    minimap.draw()
 
 
 def update_camera():
     """Update camera position based on player position and view mode."""
     global camera_pos
     
+    player_pos = sim.player_pos
+    player_angle = sim.player_angle
     if third_person_view:
         # Third-person view - camera follows player
         camera_x = player_pos[0] - camera_distance * math.cos(math.radians(player_angle))
@@ -619,6 +257,8 @@ def setup_lighting():
         glLightfv(GL_LIGHT0, GL_DIFFUSE, diffuse_light)
         
         # Position light near player to simulate torch
+        player_pos = sim.player_pos
+        player_angle = sim.player_angle
         torch_x = player_pos[0] + 50 * math.cos(math.radians(player_angle))
         torch_y = player_pos[1] + 50 * math.sin(math.radians(player_angle))
         torch_z = player_pos[2] + 30
@@ -628,108 +268,60 @@ def setup_lighting():
         glDisable(GL_LIGHTING)
 
 
+def camera_look():
+    """(eye, center, up) for gluLookAt in the current view mode."""
+    player_pos = sim.player_pos
+    
+    if third_person_view:
+        # Third-person view - look at player
+        return camera_pos, tuple(player_pos), (0, 0, 1)
+    else:
+        # Top-down view - look at center of map
+        return camera_pos, (0, 0, 0), (0, 1, 0)
+
+
 def setupCamera():
-    """Configure the camera's projection and view settings."""
+    """Configure the camera's projection and view settings, and the matching culling frustum."""
+    global view_frustum
     glMatrixMode(GL_PROJECTION)
     glLoadIdentity()
-    gluPerspective(45, 1.25, 0.1, 2000)
+    gluPerspective(CAMERA_FOVY, CAMERA_ASPECT, CAMERA_NEAR, CAMERA_FAR)
     
     glMatrixMode(GL_MODELVIEW)
     glLoadIdentity()
     
-    x, y, z = camera_pos
-    
-    if third_person_view:
-        # Third-person view - look at player
-        gluLookAt(x, y, z,
-                  player_pos[0], player_pos[1], player_pos[2],
-                  0, 0, 1)
-    else:
-        # Top-down view - look at center of map
-        gluLookAt(x, y, z,
-                  0, 0, 0,
-                  0, 1, 0)
+    eye, center, up = camera_look()
+    gluLookAt(*eye, *center, *up)
+    view_frustum = Frustum.perspective(CAMERA_FOVY, CAMERA_ASPECT, CAMERA_NEAR, CAMERA_FAR,
+                                       eye, center, up)
 
 
 def keyboardListener(key, x, y):
     """Handle keyboard inputs."""
-    global player_pos, player_angle, player_hidden, game_active, third_person_view
-    global game_over, game_won, light_enabled
-    global boost_active, boost_start_time, last_boost_time
-
+    global third_person_view, light_enabled, show_profile
     
     # Get current key pressed
     k = key.lower()
     
-    # Game restart
-    if k == b'r':
-        if game_over or game_won:
-            init_game()
-    
-    # Game start
-    if k == b' ' and not game_active and not game_over and not game_won:
-        init_game()
-    
-    # Only process movement if game is active
-    if not game_active or game_over or game_won:
-        return
+    # Toggle the frame profiler overlay (P key); timings are only taken while it is up
+    if k == b'p':
+        show_profile = not show_profile
+        profiler.enabled = show_profile or profile_csv is not None
     
-    # Calculate movement direction based on player angle
-    move_speed = player_speed
-    current_time = time.time()
-
-    # If stealth, reduce base speed
-    if player_hidden:
-        move_speed *= 0.5
-
     # Check if Shift is held
     modifiers = glutGetModifiers()
     shift_held = modifiers & GLUT_ACTIVE_SHIFT
-
-    # Trigger boost if Shift is held and cooldown is over
-    if shift_held and not boost_active and current_time - last_boost_time >= boost_cooldown:
-        boost_active = True
-        boost_start_time = current_time
-        last_boost_time = current_time
-
-    # If boost is active, apply it
-    if boost_active:
-        if current_time - boost_start_time <= boost_duration:
-            move_speed *= 2.0  # Boost multiplier
-        else:
-            boost_active = False  # End boost
-    
-    new_x, new_y = player_pos[0], player_pos[1]
     
-    # Move forward (W key)
-    if k == b'w':
-        new_x += move_speed * math.cos(math.radians(player_angle))
-        new_y += move_speed * math.sin(math.radians(player_angle))
-        
-    # Move backward (S key)
-    if k == b's':
-        new_x -= move_speed * math.cos(math.radians(player_angle))
-        new_y -= move_speed * math.sin(math.radians(player_angle))
+    # Movement, stealth and start/restart are gameplay; the simulation owns them.
+    # Movement keys are only marked as held here and integrated once per tick.
+    if recorder is not None:
+        recorder.record(replay.KEY_DOWN, k[0], shift_held)
+    sim.key_down(k, shift_held)
+    on_input()
     
-    # Strafe left (A key)
-    if k == b'a':
-        new_x -= move_speed * math.sin(math.radians(player_angle))
-        new_y += move_speed * math.cos(math.radians(player_angle))
-
-# Strafe right (D key)
-    if k == b'd':
-        new_x += move_speed * math.sin(math.radians(player_angle))
-        new_y -= move_speed * math.cos(math.radians(player_angle))
-
-    
-    # Check for collisions before updating position
-    if not check_collision(new_x, new_y):
-        player_pos[0] = new_x
-        player_pos[1] = new_y
-    
-    # Toggle stealth mode (C key)
-    if k == b'c':
-        player_hidden = not player_hidden
+    # Only process view toggles if game is active
+    if not sim.running:
+        return
     
     # Toggle camera view (V key)
     if k == b'v':
@@ -740,10 +332,55 @@ def keyboardListener(key, x, y):
         light_enabled = not light_enabled
 
 
+def on_input():
+    """Every key press or click may change what's on screen."""
+    if scheduler is not None:
+        scheduler.request_redraw()
+
+
+def release_held_keys():
+    """Drop every held key: the window will not see key-ups that happen while it is away.
+
+    The releases are recorded as key-up events, so a replay drops them too.
+    """
+    if recorder is not None:
+        for key in sorted(sim.input.held):
+            recorder.record(replay.KEY_UP, key[0], False)
+        recorder.record(replay.SPECIAL_UP, GLUT_KEY_SHIFT_L)
+    sim.input.clear()
+
+
+def entryListener(state):
+    """Handle the pointer leaving or entering the window."""
+    if state == GLUT_LEFT:
+        release_held_keys()
+
+
+def visibilityListener(state):
+    """Handle the window being hidden or shown."""
+    if state == GLUT_NOT_VISIBLE:
+        release_held_keys()
+
+
+def keyboardUpListener(key, x, y):
+    """Handle keyboard key releases."""
+    shift_held = glutGetModifiers() & GLUT_ACTIVE_SHIFT
+    if recorder is not None:
+        recorder.record(replay.KEY_UP, key.lower()[0], shift_held)
+    sim.key_up(key.lower(), shift_held)
+
+
 def specialKeyListener(key, x, y):
     """Handle special key inputs (arrow keys)."""
     global camera_height, camera_distance
     
+    if recorder is not None:
+        recorder.record(replay.SPECIAL_DOWN, key)
+    
+    # Shift pressed on its own (freeglut reports it as a special key)
+    if key in (GLUT_KEY_SHIFT_L, GLUT_KEY_SHIFT_R):
+        sim.set_shift(True)
+    
     # Adjust camera height (UP/DOWN arrow keys)
     if key == GLUT_KEY_UP:
         camera_height += 10
@@ -757,33 +394,90 @@ def specialKeyListener(key, x, y):
     
     if key == GLUT_KEY_RIGHT:
         camera_distance += 10
+    
+    # Frame profile export
+    if key == GLUT_KEY_F8:
+        count = profiler.dump_csv(profile_csv or PROFILE_CSV_PATH)
+        print(f"Wrote {count} profiled frames to {profile_csv or PROFILE_CSV_PATH}")
+    
+    # Checkpoints
+    if key == GLUT_KEY_F5:
+        try:
+            snapshot.save(sim, QUICKSAVE_PATH)
+        except (OSError, ValueError) as error:
+            print(f"Could not save {QUICKSAVE_PATH}: {error}")
+    
+    if key == GLUT_KEY_F9:
+        try:
+            snapshot.load(QUICKSAVE_PATH, sim)
+        except (OSError, ValueError) as error:
+            print(f"Could not load {QUICKSAVE_PATH}: {error}")
+        else:
+            # The loaded state did not come from recorded input; the log starts over from it
+            if recorder is not None:
+                recorder.restart(sim)
+    
+    on_input()
+
+
+def specialKeyUpListener(key, x, y):
+    """Handle special key releases."""
+    if recorder is not None:
+        recorder.record(replay.SPECIAL_UP, key)
+    if key in (GLUT_KEY_SHIFT_L, GLUT_KEY_SHIFT_R):
+        sim.set_shift(False)
 
 
 def mouseListener(button, state, x, y):
     """Handle mouse inputs."""
     global third_person_view
     
+    if recorder is not None:
+        recorder.record(replay.MOUSE, button, state)
+    
     # Right mouse button toggles camera view
     if button == GLUT_RIGHT_BUTTON and state == GLUT_DOWN:
         third_person_view = not third_person_view
+        on_input()
+
+
+def update_frame():
+    """Frame timer callback: run due simulation ticks; True if the scene changed."""
+    # Run whatever fixed simulation ticks are due since the last call
+    t = profiler.start()
+    was_running = sim.running
+    try:
+        ticks = sim.advance()
+    except Exception:
+        # Keep the state that broke the simulation so it can be restored and debugged;
+        # a failed save must not hide the original traceback
+        if sim.world is not None:
+            print("Simulation crashed; chunked worlds cannot be snapshotted")
+        else:
+            try:
+                snapshot.save(sim, CRASH_SNAPSHOT_PATH)
+            except (OSError, ValueError) as error:
+                print(f"Simulation crashed; could not save {CRASH_SNAPSHOT_PATH}: {error}")
+            else:
+                print(f"Simulation crashed; state saved to {CRASH_SNAPSHOT_PATH}")
+        raise
+    profiler.lap(PHASE_SIMULATION, t)
+    
+    # Ticks keep counting on the title and game-over screens, but nothing moves
+    # there; the tick that ends a game still draws its final state
+    return ticks > 0 and (was_running or sim.running)
 
 
-def idle():
-    """Idle function for continuous updates."""
-    # Update game logic
-    if game_active and not game_over and not game_won:
-        update_player()
-        update_monsters()
+def showScreen():
+    """Display function to render the game scene."""
+    frame_start = time.perf_counter()
+    t = profiler.start()
+    cull_stats.reset()
+    entities.reset_stats()
     
     # Update camera position
     update_camera()
     
-    # Request display update
-    glutPostRedisplay()
-
-
-def showScreen():
-    """Display function to render the game scene."""
     # Clear buffers
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
     glLoadIdentity()
@@ -797,42 +491,71 @@ def showScreen():
     # Enable blending for transparency
     glEnable(GL_BLEND)
     glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+    t = profiler.lap(PHASE_CAMERA, t)
     
-    # Draw floor
-    draw_floor()
-    
-    # Draw dungeon boundary walls
-    draw_dungeon_boundary()
+    # Draw the visible floor tiles, boundary walls and obstacles from the cached buffer
+    static_scene.sync(sim)
+    static_scene.draw_visible(view_frustum, cull_stats)
+    t = profiler.lap(PHASE_SCENE, t)
     
-    # Draw obstacles (walls)
-    for x, y, width, height in obstacles:
-        draw_obstacle(x, y, width, height)
-    
-    # Draw treasures
-    for x, y, collected in treasures:
-        draw_treasure_chest(x, y, collected)
-    
-    # Draw monsters
-    for x, y, direction, _, _, _ in monsters:
-        draw_monster(x, y, direction)
-    
-    # Draw player
-    draw_player()
-    
-    # Draw player status if game is active
-    if game_active:
-        draw_status_bar()
+    # Draw treasures, monsters and player from the shared mesh library
+    draw_entities()
+    t = profiler.lap(PHASE_ENTITIES, t)
     
     # Draw 2D UI elements (time, score, messages)
     draw_game_ui()
+    t = profiler.lap(PHASE_HUD, t)
     draw_topdown_minimap()
+    t = profiler.lap(PHASE_MINIMAP, t)
     
     # Swap buffers
     glutSwapBuffers()
+    profiler.lap(PHASE_SWAP, t)
+    profiler.end_frame()
+    
+    if scheduler is not None:
+        scheduler.frame_rendered(time.perf_counter() - frame_start)
 
 
 def main():
     """Main function to set up OpenGL window and game loop."""
+    global sim, scheduler, minimap, recorder, profile_csv
+    parser = build_arg_parser()
+    parser.add_argument("--fps", type=int, default=DEFAULT_FPS,
+                        help="target render frame rate")
+    parser.add_argument("--frame-stats", action="store_true",
+                        help="print frame pacing statistics every 5 seconds")
+    parser.add_argument("--minimap-hz", type=float, default=REFRESH_HZ,
+                        help="refresh rate of the minimap's player/monster/treasure markers")
+    parser.add_argument("--restore", metavar="PATH",
+                        help="start from a saved snapshot (quicksave or crash file)")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record the session's input to a replay log (see replay.py)")
+    parser.add_argument("--profile-csv", metavar="PATH",
+                        help="profile every frame and write the last frames' phase times to PATH on exit")
+    args = parser.parse_args()
+    if args.chunked and (args.restore or args.record):
+        parser.error("--restore and --record need snapshots, which chunked worlds do not support")
+    if args.headless:
+        run_headless(args.ticks, args.seed, args.chunked)
+        return
+    seed = args.seed
+    if seed is None and args.record:
+        # Give recorded sessions a concrete seed so the log can name it
+        seed = random.randrange(2**63)
+    sim = Simulation(seed=seed, chunked=args.chunked)
+    if args.restore:
+        snapshot.load(args.restore, sim)
+    if args.record:
+        recorder = replay.Recorder(sim)
+        # glutMainLoop never returns; freeglut leaves through exit() when the window closes
+        atexit.register(lambda: recorder.save(args.record))
+    if args.profile_csv:
+        profile_csv = args.profile_csv
+        profiler.enabled = True
+        atexit.register(lambda: profiler.dump_csv(profile_csv))
+    minimap = Minimap(1000, 800, refresh_hz=args.minimap_hz)
+    
     # Initialize GLUT
     glutInit()
     glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
@@ -843,9 +566,23 @@ def main():
     # Register callbacks
     glutDisplayFunc(showScreen)
     glutKeyboardFunc(keyboardListener)
+    glutKeyboardUpFunc(keyboardUpListener)
     glutSpecialFunc(specialKeyListener)
+    glutSpecialUpFunc(specialKeyUpListener)
     glutMouseFunc(mouseListener)
-    glutIdleFunc(idle)
+    # GLUT has no focus callback; leaving or hiding the window is the closest signal
+    glutEntryFunc(entryListener)
+    glutVisibilityFunc(visibilityListener)
+    
+    # Frames are paced by a timer instead of a busy idle loop
+    # Nothing moves on the title and game-over screens
+    scheduler = FrameScheduler(update_frame, target_fps=args.fps,
+                               report_interval=5 if args.frame_stats else None,
+                               animating=lambda: sim.running)
+    scheduler.start()
+    
+    # Held keys are tracked with key-up events, so OS auto-repeat is just noise
+    glutIgnoreKeyRepeat(1)
     
     # Enable depth testing for 3D
     glEnable(GL_DEPTH_TEST)
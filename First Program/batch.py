@@ -0,0 +1,294 @@
+"""Batch runner: many seeded headless games over a grid of level settings.
+
+Every combination of monster count, obstacle count, time limit and
+player policy (idle, or one of the bots in bots.py) is played once per
+seed in a seed range. Games are grouped into tasks of a
+few games each and fanned out over a ProcessPoolExecutor; workers share
+nothing and return one small row per game, so throughput grows with the
+number of cores. Rows are streamed to a columnar results file as tasks
+finish, so memory stays flat however many games are played:
+
+    python batch.py --monsters 3 6 12 --obstacles 15 30 --time-limits 60 120 \
+        --policies greedy avoid --seeds 0 1000 --output balance.results
+
+The file is a header naming each column and its dtype, followed by row
+groups of up to ROW_GROUP_SIZE rows, each stored column after column as a
+raw little-endian block. read_results() loads it back as {column: array};
+a file cut short mid-write still yields every complete row group.
+"""
+import argparse
+import itertools
+import os
+import struct
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from bots import POLICIES
+from simulation import NUM_MONSTERS, NUM_OBSTACLES, TOTAL_TIME_LIMIT, Simulation
+
+RESULTS_MAGIC = b'DCBR'
+RESULTS_VERSION = 1
+ROW_GROUP_SIZE = 1024       # Rows buffered before they are written out
+GAMES_PER_TASK = 8          # Games per pool task, to amortize inter-process overhead
+TASKS_PER_WORKER = 4        # Tasks kept in flight per worker
+
+# How a game ended
+WON = 1
+DIED = 2
+TIMED_OUT = 3
+OUTCOMES = {WON: 'won', DIED: 'died', TIMED_OUT: 'timed out'}
+
+# Who plays: nobody ('idle') or a bot policy; the policy column stores the index
+POLICY_NAMES = ('idle',) + tuple(sorted(POLICIES))
+
+# One row per game
+COLUMNS = (
+    ('seed', '<i8'),
+    ('num_monsters', '<i4'),
+    ('num_obstacles', '<i4'),
+    ('total_time_limit', '<i4'),
+    ('policy', 'u1'),            # Index into POLICY_NAMES
+    ('outcome', 'u1'),
+    ('game_seconds', '<f8'),     # Game time from start to the end of the game
+    ('ticks', '<i8'),
+    ('treasures', '<i4'),        # Treasures collected
+    ('health', '<i4'),           # Player health at the end
+    ('wall_seconds', '<f8'),     # Time the worker spent playing the game
+)
+
+# magic, version, column count; then per column: name length, name, dtype length, dtype
+_HEADER = struct.Struct('<4sII')
+_ROW_GROUP = struct.Struct('<q')
+
+
+class ResultWriter:
+    """Streams rows to a columnar results file, one row group at a time."""
+
+    def __init__(self, path, columns=COLUMNS, row_group_size=ROW_GROUP_SIZE):
+        self.columns = tuple(columns)
+        self.row_group_size = row_group_size
+        self.rows = []
+        self.written = 0
+        self.file = open(path, 'wb')
+        header = [_HEADER.pack(RESULTS_MAGIC, RESULTS_VERSION, len(self.columns))]
+        for name, dtype in self.columns:
+            for text in (name.encode(), dtype.encode()):
+                header.append(struct.pack('<I', len(text)) + text)
+        self.file.write(b''.join(header))
+
+    def append(self, row):
+        """Buffer one row (a tuple in column order); full row groups are written out."""
+        self.rows.append(row)
+        if len(self.rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered rows as one row group."""
+        if not self.rows:
+            return
+        blocks = [_ROW_GROUP.pack(len(self.rows))]
+        for values, (_, dtype) in zip(zip(*self.rows), self.columns):
+            blocks.append(np.asarray(values, dtype=dtype).tobytes())
+        self.file.write(b''.join(blocks))
+        self.file.flush()
+        self.written += len(self.rows)
+        self.rows = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_results(path):
+    """Load a results file as {column: array}; raises ValueError on foreign or newer-version data."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        raise ValueError("results file is truncated")
+    magic, version, n_columns = _HEADER.unpack_from(data)
+    if magic != RESULTS_MAGIC:
+        raise ValueError("not a Dungeon Crawler batch results file")
+    if version != RESULTS_VERSION:
+        raise ValueError(f"results version {version} is not supported (expected {RESULTS_VERSION})")
+
+    offset = _HEADER.size
+    columns = []
+    for _ in range(n_columns):
+        texts = []
+        for _ in range(2):
+            (length,) = struct.unpack_from('<I', data, offset)
+            texts.append(data[offset + 4:offset + 4 + length].decode())
+            offset += 4 + length
+        columns.append((texts[0], np.dtype(texts[1])))
+
+    row_bytes = sum(dtype.itemsize for _, dtype in columns)
+    groups = {name: [] for name, _ in columns}
+    while offset + _ROW_GROUP.size <= len(data):
+        (count,) = _ROW_GROUP.unpack_from(data, offset)
+        if offset + _ROW_GROUP.size + count * row_bytes > len(data):
+            break  # A row group the writer never finished
+        offset += _ROW_GROUP.size
+        for name, dtype in columns:
+            groups[name].append(np.frombuffer(data, dtype=dtype, count=count, offset=offset))
+            offset += count * dtype.itemsize
+    return {name: np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+            for (name, dtype), parts in zip(columns, groups.values())}
+
+
+def play_game(seed, num_monsters, num_obstacles, total_time_limit, policy=0):
+    """Play one headless game to its end; returns its row (see COLUMNS).
+
+    policy indexes POLICY_NAMES; a bot plays with the game's seed.
+    """
+    wall_start = time.perf_counter()
+    sim = Simulation(seed=seed, num_monsters=num_monsters, num_obstacles=num_obstacles,
+                     total_time_limit=total_time_limit)
+    sim.init_game()
+    bot = POLICIES[POLICY_NAMES[policy]](seed) if policy else None
+    # The time limit ends every game; the cap only guards against a game that never stops
+    max_ticks = (total_time_limit + 1) * sim.tick_rate
+    while sim.running and sim.tick < max_ticks:
+        if bot is not None:
+            bot.act(sim)
+        sim.step(1)
+
+    if sim.game_won:
+        outcome = WON
+    elif sim.player_health <= 0:
+        outcome = DIED
+    else:
+        outcome = TIMED_OUT
+    return (seed, num_monsters, num_obstacles, total_time_limit, policy, outcome, sim.time - sim.start_time,
+            sim.tick, sim.collected_treasures, sim.player_health, time.perf_counter() - wall_start)
+
+
+def play_games(games):
+    """Pool task: play a list of (seed, num_monsters, num_obstacles, total_time_limit, policy) games."""
+    return [play_game(*game) for game in games]
+
+
+def game_grid(monsters, obstacles, time_limits, seeds, policies=('idle',)):
+    """Every (seed, num_monsters, num_obstacles, total_time_limit, policy) combination, seed varying fastest."""
+    policies = [POLICY_NAMES.index(name) for name in policies]
+    for combination in itertools.product(monsters, obstacles, time_limits, policies):
+        for seed in seeds:
+            yield (seed,) + combination
+
+
+def _tasks(games, games_per_task):
+    games = iter(games)
+    while True:
+        task = list(itertools.islice(games, games_per_task))
+        if not task:
+            return
+        yield task
+
+
+def run_batch(games, workers=None, on_row=None, games_per_task=GAMES_PER_TASK):
+    """Play games across a process pool, calling on_row(row) as results arrive; returns the count.
+
+    Only workers * TASKS_PER_WORKER tasks are submitted at a time, so a
+    very long game list is never materialized.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = _tasks(games, games_per_task)
+    played = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        while True:
+            for task in itertools.islice(tasks, workers * TASKS_PER_WORKER - len(pending)):
+                pending.add(executor.submit(play_games, task))
+            if not pending:
+                return played
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for row in future.result():
+                    played += 1
+                    if on_row is not None:
+                        on_row(row)
+
+
+class Summary:
+    """Running win rate and time-to-win per parameter combination."""
+
+    def __init__(self):
+        self.stats = {}  # (num_monsters, num_obstacles, time limit, policy) -> [games, wins, deaths, win seconds]
+
+    def add(self, row):
+        _, num_monsters, num_obstacles, time_limit, policy, outcome, game_seconds = row[:7]
+        stats = self.stats.setdefault((num_monsters, num_obstacles, time_limit, policy), [0, 0, 0, 0.0])
+        stats[0] += 1
+        if outcome == WON:
+            stats[1] += 1
+            stats[3] += game_seconds
+        elif outcome == DIED:
+            stats[2] += 1
+
+    def lines(self):
+        yield (f"{'monsters':>8} {'obstacles':>9} {'limit':>5} {'policy':>6} {'games':>6} "
+               f"{'win%':>6} {'died%':>6} {'win_s':>7}")
+        for key, (games, wins, deaths, win_seconds) in sorted(self.stats.items()):
+            num_monsters, num_obstacles, time_limit, policy = key
+            mean_win = f"{win_seconds / wins:7.1f}" if wins else f"{'-':>7}"
+            yield (f"{num_monsters:8d} {num_obstacles:9d} {time_limit:5d} {POLICY_NAMES[policy]:>6} {games:6d} "
+                   f"{100 * wins / games:6.1f} {100 * deaths / games:6.1f} {mean_win}")
+
+
+def build_arg_parser():
+    """Command-line options for a batch of seeded games."""
+    parser = argparse.ArgumentParser(description="Play seeded Dungeon Crawler games in parallel")
+    parser.add_argument("--monsters", type=int, nargs="+", default=[NUM_MONSTERS],
+                        help="monster counts to try (default: %(default)s)")
+    parser.add_argument("--obstacles", type=int, nargs="+", default=[NUM_OBSTACLES],
+                        help="obstacle counts to try (default: %(default)s)")
+    parser.add_argument("--time-limits", type=int, nargs="+", default=[TOTAL_TIME_LIMIT],
+                        help="time limits in seconds to try (default: %(default)s)")
+    parser.add_argument("--policies", nargs="+", choices=POLICY_NAMES, default=['idle'],
+                        help="who plays: nobody, or bot policies from bots.py (default: idle)")
+    parser.add_argument("--seeds", type=int, nargs=2, default=[0, 100], metavar=("START", "STOP"),
+                        help="seed range, STOP excluded (default: 0 100)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--games-per-task", type=int, default=GAMES_PER_TASK,
+                        help="games each pool task plays (default: %(default)s)")
+    parser.add_argument("--output", metavar="PATH",
+                        help="stream per-game rows to a columnar results file")
+    return parser
+
+
+def main(argv=None):
+    """Entry point for `python batch.py`."""
+    args = build_arg_parser().parse_args(argv)
+    games = game_grid(args.monsters, args.obstacles, args.time_limits, range(*args.seeds), args.policies)
+    summary = Summary()
+    writer = ResultWriter(args.output) if args.output else None
+
+    def on_row(row):
+        summary.add(row)
+        if writer is not None:
+            writer.append(row)
+
+    wall_start = time.perf_counter()
+    try:
+        played = run_batch(games, args.workers, on_row, args.games_per_task)
+    finally:
+        if writer is not None:
+            writer.close()
+    wall_time = time.perf_counter() - wall_start
+
+    for line in summary.lines():
+        print(line)
+    print(f"games={played} wall_seconds={wall_time:.1f} games_per_second={played / max(wall_time, 1e-9):.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
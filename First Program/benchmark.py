@@ -0,0 +1,278 @@
+"""Benchmarks for the game's hot paths at several world scales.
+
+Times Simulation.init_game, check_collision, update_player and
+update_monsters, plus one full showScreen() frame rendered offscreen through
+the bundled OpenGL.osmesa platform, at each configured scale of obstacles,
+monsters, treasures and map size. Results are written as JSON; given a
+stored baseline, the run fails when any best-of-rounds time per call got
+slower than the threshold allows (the minimum is the least noisy estimate).
+
+    python benchmark.py --output results.json
+    python benchmark.py --baseline results.json --threshold 0.25
+"""
+import os
+
+# The render benchmark draws without a window; this must be set before OpenGL is imported
+os.environ.setdefault('PYOPENGL_PLATFORM', 'osmesa')
+
+import argparse
+import importlib.util
+import json
+import platform
+import statistics
+import time
+
+import numpy as np
+
+from simulation import Simulation
+
+RESULTS_VERSION = 1
+DEFAULT_REPEAT = 5
+MIN_ROUND_TIME = 0.05        # Seconds each timed round should last, at least
+DEFAULT_THRESHOLD = 0.2      # Allowed slowdown of the best round before a benchmark counts as regressed
+COLLISION_QUERIES = 1000     # Points checked per check_collision round
+RENDER_SIZE = (1000, 800)    # Window size the front-end assumes
+
+# num_obstacles, num_monsters, num_treasures, grid_length
+SCALES = {
+    'default': (15, 3, 5, 600),
+    'medium': (150, 100, 50, 3000),
+    'large': (1500, 2000, 500, 12000),
+    'huge': (10000, 50000, 2000, 40000),
+}
+DEFAULT_SCALES = ('default', 'medium', 'large')
+BENCHMARKS = ('init_game', 'check_collision', 'update_player', 'update_monsters', 'render_frame')
+
+FRONT_END = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Dungeon Crawler.py")
+
+
+class BenchmarkSkipped(Exception):
+    """Raised when a benchmark cannot run in this environment (e.g. no OSMesa library)."""
+
+
+def make_simulation(scale, seed):
+    """A started game at the given scale, with the player made unkillable so it keeps running."""
+    num_obstacles, num_monsters, num_treasures, grid_length = SCALES[scale]
+    sim = Simulation(seed=seed, num_obstacles=num_obstacles, num_monsters=num_monsters,
+                     num_treasures=num_treasures, grid_length=grid_length,
+                     treasures_needed=num_treasures)
+    sim.init_game()
+    sim.game_active = True
+    return sim
+
+
+def _keep_running(sim):
+    """Undo whatever ended the game so per-tick updates keep doing real work."""
+    sim.player_health = 10**9
+    sim.game_over = sim.game_won = False
+    sim.start_time = sim.time
+
+
+def time_calls(func, repeat, setup=None, ops_per_call=1):
+    """Seconds per call of func() over `repeat` timed rounds.
+
+    The number of calls per round is calibrated so a round lasts at least
+    MIN_ROUND_TIME; setup() runs untimed before each round. Times are
+    divided by ops_per_call when one func() call performs several operations.
+    """
+    if setup:
+        setup()
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    number = max(1, int(MIN_ROUND_TIME / max(first, 1e-9)))
+
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / (number * ops_per_call))
+    return number, times
+
+
+def bench_init_game(scale, seed, repeat):
+    sim = make_simulation(scale, seed)
+    return time_calls(sim.init_game, repeat)
+
+
+def bench_check_collision(scale, seed, repeat):
+    sim = make_simulation(scale, seed)
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(-sim.grid_length, sim.grid_length, (COLLISION_QUERIES, 2)).tolist()
+    check = sim.check_collision
+
+    def run():
+        for x, y in points:
+            check(x, y)
+    return time_calls(run, repeat, ops_per_call=len(points))
+
+
+def bench_update_player(scale, seed, repeat):
+    sim = make_simulation(scale, seed)
+    return time_calls(sim.update_player, repeat, setup=lambda: _keep_running(sim))
+
+
+def bench_update_monsters(scale, seed, repeat):
+    sim = make_simulation(scale, seed)
+    return time_calls(sim.update_monsters, repeat, setup=lambda: _keep_running(sim))
+
+
+def _offscreen_front_end():
+    """Load the GLUT front-end as a module with an OSMesa context current."""
+    try:
+        from OpenGL import GL, osmesa
+        context = osmesa.OSMesaCreateContextExt(osmesa.OSMESA_RGBA, 24, 0, 0, None)
+    except Exception as error:  # Missing libOSMesa surfaces as several error types
+        raise BenchmarkSkipped(f"OSMesa is not available: {error}") from None
+    if not context:
+        raise BenchmarkSkipped("OSMesa could not create a context")
+    width, height = RENDER_SIZE
+    buffer = np.zeros((height, width, 4), dtype=np.uint8)
+    if not osmesa.OSMesaMakeCurrent(context, buffer, GL.GL_UNSIGNED_BYTE, width, height):
+        raise BenchmarkSkipped("OSMesa could not make its context current")
+
+    spec = importlib.util.spec_from_file_location("dungeon_crawler", FRONT_END)
+    front_end = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(front_end)
+
+    # There is no window to swap; finishing the frame keeps the GPU work inside the timing
+    front_end.glutSwapBuffers = GL.glFinish
+    if os.environ.get('DISPLAY'):
+        front_end.glutInit()  # Only needed for the HUD's bitmap fonts
+    else:
+        # GLUT cannot start without a display; rasterize blank HUD glyphs instead.
+        # The per-frame HUD work (cached quads, one draw call) is unchanged.
+        import hud
+        hud.glutBitmapCharacter = lambda font, code: None
+        hud.glutBitmapWidth = lambda font, code: 10
+    front_end.glEnable(GL.GL_DEPTH_TEST)
+    front_end.glClearColor(0.1, 0.1, 0.15, 1.0)
+    return front_end, (context, buffer)
+
+
+_front_end = None
+
+
+def bench_render_frame(scale, seed, repeat):
+    global _front_end
+    if _front_end is None:
+        _front_end = _offscreen_front_end()
+    front_end = _front_end[0]
+    front_end.sim = make_simulation(scale, seed)
+    front_end.showScreen()  # Builds the per-level caches outside the timing
+    return time_calls(front_end.showScreen, repeat)
+
+
+_BENCHMARK_FUNCTIONS = {
+    'init_game': bench_init_game,
+    'check_collision': bench_check_collision,
+    'update_player': bench_update_player,
+    'update_monsters': bench_update_monsters,
+    'render_frame': bench_render_frame,
+}
+
+
+def run_benchmarks(names, scales, seed, repeat, log=print):
+    """Run every benchmark in names at every scale; returns a list of result dicts."""
+    results = []
+    skipped = set()
+    for scale in scales:
+        num_obstacles, num_monsters, num_treasures, grid_length = SCALES[scale]
+        for name in names:
+            if name in skipped:
+                continue
+            try:
+                number, times = _BENCHMARK_FUNCTIONS[name](scale, seed, repeat)
+            except BenchmarkSkipped as reason:
+                log(f"{name}: skipped ({reason})")
+                skipped.add(name)
+                continue
+            result = {
+                'benchmark': name,
+                'scale': scale,
+                'params': {'num_obstacles': num_obstacles, 'num_monsters': num_monsters,
+                           'num_treasures': num_treasures, 'grid_length': grid_length},
+                'number': number,
+                'repeat': repeat,
+                'min': min(times),
+                'median': statistics.median(times),
+                'mean': statistics.fmean(times),
+                'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+            }
+            results.append(result)
+            log(f"{name:16} {scale:8} median={result['median'] * 1e6:12.2f} us  "
+                f"min={result['min'] * 1e6:12.2f} us  ({number} x {repeat})")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Regressions against a baseline: (benchmark, scale, baseline time, time) tuples.
+
+    A benchmark regresses when its best round ('min') is slower than the
+    baseline's by more than threshold (a fraction). Benchmarks missing
+    from either side are ignored.
+    """
+    stored = {(r['benchmark'], r['scale']): r['min'] for r in baseline['results']}
+    regressions = []
+    for r in results:
+        before = stored.get((r['benchmark'], r['scale']))
+        if before is not None and r['min'] > before * (1 + threshold):
+            regressions.append((r['benchmark'], r['scale'], before, r['min']))
+    return regressions
+
+
+def build_arg_parser():
+    """Command-line options for the benchmark suite."""
+    parser = argparse.ArgumentParser(description="Benchmark Dungeon Crawler's hot paths")
+    parser.add_argument("--benchmarks", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS),
+                        help="benchmarks to run (default: all)")
+    parser.add_argument("--scales", nargs="+", choices=sorted(SCALES), default=list(DEFAULT_SCALES),
+                        help="world scales to run at (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="timed rounds per benchmark")
+    parser.add_argument("--seed", type=int, default=1,
+                        help="random seed for level generation")
+    parser.add_argument("--output", metavar="PATH",
+                        help="write the results as JSON")
+    parser.add_argument("--baseline", metavar="PATH",
+                        help="compare against stored results and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction (default: %(default)s)")
+    return parser
+
+
+def main(argv=None):
+    """Entry point for `python benchmark.py`; exits with status 1 on regressions."""
+    args = build_arg_parser().parse_args(argv)
+    results = run_benchmarks(args.benchmarks, args.scales, args.seed, args.repeat)
+
+    if args.output:
+        report = {
+            'version': RESULTS_VERSION,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, scale, before, after in regressions:
+            print(f"REGRESSION {name} at {scale}: {before * 1e6:.2f} us -> {after * 1e6:.2f} us "
+                  f"(+{after / before - 1:.0%}, threshold {args.threshold:.0%})")
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
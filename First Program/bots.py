@@ -0,0 +1,271 @@
+"""Scripted bot players that drive the simulation through its keyboard input.
+
+Bots press and release keys exactly as the GLUT callbacks would: movement
+keys are held down, C toggles stealth, Shift triggers the boost, and R
+restarts a finished game. Every key goes through replay.apply_event(),
+the same path a recorded session is replayed through, so a bot session
+can be recorded and replayed like a human one. Bots only look at the game
+state and their own random.Random(seed), so a given seed always plays
+the same game.
+
+A bot decides every DECISION_TICKS ticks and holds its keys in between,
+like a player's reaction time. The policies are:
+
+    random  wander in one of eight directions, turning now and then
+    greedy  head for the nearest uncollected treasure
+    avoid   like greedy, but hide from monsters in chase range and run
+            from those that get close
+
+run_bots() steps many games side by side in one process at full tick
+speed, as a load generator for profiling:
+
+    python bots.py --policy avoid --games 64 --ticks 7200 --seed 1
+"""
+import argparse
+import math
+import random
+import time
+
+import numpy as np
+
+from monsters import CHASE_RADIUS
+from replay import KEY_DOWN, KEY_UP, SHIFT_KEYS, SPECIAL_DOWN, SPECIAL_UP, apply_event
+from simulation import Simulation
+
+DECISION_TICKS = 6          # Ticks between decisions (0.1 s at 60 Hz)
+TURN_CHANCE = 0.05          # Random walkers change direction this often per decision
+BOOST_CHANCE = 0.02         # ... and try to boost this often
+STUCK_DISTANCE = 1.0        # Moving less than this between decisions means a wall is in the way
+DETOUR_DECISIONS = 10       # Decisions spent walking sideways around a wall
+BOOST_DISTANCE = 400        # Greedy bots boost towards treasures farther than this
+FLEE_RADIUS = 100           # Avoiding bots run from monsters closer than this
+
+# Movement key chords by the direction they move in, relative to the
+# player's facing: 0, 45, ..., 315 degrees counter-clockwise
+CHORDS = (
+    frozenset((b'w',)), frozenset((b'w', b'a')), frozenset((b'a',)), frozenset((b's', b'a')),
+    frozenset((b's',)), frozenset((b's', b'd')), frozenset((b'd',)), frozenset((b'w', b'd')),
+)
+
+
+def chord_for(heading, facing=0):
+    """Movement keys that move closest to world heading (degrees) for a player facing `facing`."""
+    return CHORDS[round(((heading - facing) % 360) / 45) % 8]
+
+
+class Bot:
+    """Base class: turns a policy's decisions into key events. Subclasses implement decide()."""
+
+    name = None
+
+    def __init__(self, seed=None, decision_ticks=DECISION_TICKS, recorder=None):
+        self.rng = random.Random(seed)
+        self.decision_ticks = decision_ticks
+        self.recorder = recorder        # Optional replay.Recorder that logs the bot's keys
+        self.keys = frozenset()         # Movement keys currently held
+        self.shift = False
+        self.events = 0                 # Key events sent so far
+        self.stuck = False              # Held movement keys but barely moved since the last decision
+        self._next_decision = None
+        self._last_position = None
+
+    def send(self, sim, kind, code, flags=0):
+        """Deliver one key event the way the GLUT callbacks do."""
+        if self.recorder is not None:
+            self.recorder.record(kind, code, flags)
+        apply_event(sim, kind, code, flags)
+        self.events += 1
+
+    def tap(self, sim, key):
+        """Press and release a key."""
+        self.send(sim, KEY_DOWN, key[0], self.shift)
+        self.send(sim, KEY_UP, key[0], self.shift)
+
+    def act(self, sim):
+        """Send this tick's key events; call it before every sim.step(1)."""
+        if not sim.running:
+            if sim.game_over or sim.game_won:
+                self.tap(sim, b'r')
+                self._next_decision = None
+                # The restart released every key
+                self.keys = frozenset()
+                self.shift = False
+            return
+        if self._next_decision is not None and sim.tick < self._next_decision:
+            return
+        self._next_decision = sim.tick + self.decision_ticks
+
+        x, y = sim.player_pos[0], sim.player_pos[1]
+        if self._last_position is not None and self.keys:
+            moved = math.hypot(x - self._last_position[0], y - self._last_position[1])
+            self.stuck = moved < STUCK_DISTANCE
+        self._last_position = (x, y)
+
+        heading, hide, boost = self.decide(sim)
+        keys = frozenset() if heading is None else chord_for(heading, sim.player_angle)
+
+        # Shift first, so the movement key events below carry the new modifier state
+        if boost != self.shift:
+            self.shift = boost
+            self.send(sim, SPECIAL_DOWN if boost else SPECIAL_UP, SHIFT_KEYS[0])
+        for key in sorted(self.keys - keys):
+            self.send(sim, KEY_UP, key[0], self.shift)
+        for key in sorted(keys - self.keys):
+            self.send(sim, KEY_DOWN, key[0], self.shift)
+        self.keys = keys
+        if hide != sim.player_hidden:
+            self.tap(sim, b'c')
+
+    def decide(self, sim):
+        """(world heading in degrees or None to stand still, want stealth, want boost)."""
+        raise NotImplementedError
+
+
+class RandomWalkBot(Bot):
+    """Walks in one of eight directions, turning at random and whenever it runs into a wall."""
+
+    name = 'random'
+
+    def __init__(self, seed=None, **kwargs):
+        super().__init__(seed, **kwargs)
+        self.heading = None
+
+    def decide(self, sim):
+        rng = self.rng
+        if self.heading is None or self.stuck or rng.random() < TURN_CHANCE:
+            self.heading = rng.randrange(8) * 45
+        return self.heading, False, rng.random() < BOOST_CHANCE
+
+
+class GreedyTreasureBot(Bot):
+    """Walks straight for the nearest uncollected treasure, sidestepping walls it gets stuck on."""
+
+    name = 'greedy'
+
+    def __init__(self, seed=None, **kwargs):
+        super().__init__(seed, **kwargs)
+        self.detour = 0             # Decisions left on the current detour
+        self.detour_side = 90
+
+    def nearest_treasure(self, sim):
+        """(x, y, distance) of the nearest uncollected treasure, or None."""
+        px, py = sim.player_pos[0], sim.player_pos[1]
+        best = None
+        best_squared = math.inf
+        for tx, ty, collected in sim.treasures:
+            if not collected:
+                squared = (tx - px)**2 + (ty - py)**2
+                if squared < best_squared:
+                    best, best_squared = (tx, ty), squared
+        return None if best is None else (best[0], best[1], math.sqrt(best_squared))
+
+    def seek(self, sim):
+        """(heading, want boost) towards the nearest treasure, or (None, False) if none is left."""
+        target = self.nearest_treasure(sim)
+        if target is None:
+            return None, False
+        tx, ty, distance = target
+        heading = math.degrees(math.atan2(ty - sim.player_pos[1], tx - sim.player_pos[0]))
+        if self.stuck and not self.detour:
+            self.detour = DETOUR_DECISIONS
+            self.detour_side = self.rng.choice((90, -90))
+        if self.detour:
+            self.detour -= 1
+            heading += self.detour_side
+        return heading, distance > BOOST_DISTANCE and sim.boost_cooldown_remaining() == 0
+
+    def decide(self, sim):
+        heading, boost = self.seek(sim)
+        return heading, False, boost
+
+
+class MonsterAvoidingBot(GreedyTreasureBot):
+    """Greedy, but hides while a monster could chase it and runs from any that come close."""
+
+    name = 'avoid'
+
+    def decide(self, sim):
+        heading, boost = self.seek(sim)
+        px, py = sim.player_pos[0], sim.player_pos[1]
+        sim.index_entities()
+        monsters = sim.monsters
+        threats = sim.monster_grid.query(px, py, CHASE_RADIUS)
+        if not len(threats):
+            return heading, False, boost
+
+        # Run from the close ones, weighting nearer monsters more; otherwise keep going, hidden
+        dx = px - monsters.x[threats]
+        dy = py - monsters.y[threats]
+        squared = dx*dx + dy*dy
+        close = squared < FLEE_RADIUS * FLEE_RADIUS
+        if close.any():
+            weight = 1 / np.maximum(squared[close], 1.0)
+            heading = math.degrees(math.atan2(float((dy[close] * weight).sum()), float((dx[close] * weight).sum())))
+            if self.stuck:
+                heading += self.rng.choice((90, -90))
+        return heading, True, False
+
+
+POLICIES = {bot.name: bot for bot in (RandomWalkBot, GreedyTreasureBot, MonsterAvoidingBot)}
+
+
+def run_bots(policy, games, ticks, seed=0, **sim_kwargs):
+    """Step `games` bot-driven games side by side for `ticks` ticks each, restarting finished ones.
+
+    Game i uses seed + i for both its level and its bot. Returns
+    (simulations, bots, finished games, wins).
+    """
+    sims = [Simulation(seed=seed + i, **sim_kwargs) for i in range(games)]
+    bots = [POLICIES[policy](seed + i) for i in range(games)]
+    for sim in sims:
+        sim.init_game()
+    finished = wins = 0
+    pairs = list(zip(sims, bots))
+    for _ in range(ticks):
+        for sim, bot in pairs:
+            if not sim.running:
+                finished += 1
+                wins += sim.game_won
+            bot.act(sim)  # Presses R on finished games
+            sim.step(1)
+    return sims, bots, finished, wins
+
+
+def build_arg_parser():
+    """Command-line options for the bot load generator."""
+    parser = argparse.ArgumentParser(description="Run bot-driven Dungeon Crawler games headless")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default='greedy',
+                        help="bot policy (default: %(default)s)")
+    parser.add_argument("--games", type=int, default=16,
+                        help="games stepped side by side")
+    parser.add_argument("--ticks", type=int, default=7200,
+                        help="ticks to simulate per game")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first game; game i uses seed + i")
+    parser.add_argument("--monsters", type=int, default=None,
+                        help="monsters per level (default: the game's)")
+    parser.add_argument("--chunked", action="store_true",
+                        help="play streamed chunked worlds")
+    return parser
+
+
+def main(argv=None):
+    """Entry point for `python bots.py`."""
+    args = build_arg_parser().parse_args(argv)
+    kwargs = {'chunked': args.chunked}
+    if args.monsters is not None:
+        kwargs['num_monsters'] = args.monsters
+    wall_start = time.perf_counter()
+    sims, bots, finished, wins = run_bots(args.policy, args.games, args.ticks, args.seed, **kwargs)
+    wall_time = time.perf_counter() - wall_start
+
+    total_ticks = args.games * args.ticks
+    events = sum(bot.events for bot in bots)
+    print(f"policy={args.policy} games={args.games} ticks={total_ticks} wall_seconds={wall_time:.3f} "
+          f"ticks_per_second={total_ticks / max(wall_time, 1e-9):.0f} key_events={events} "
+          f"games_finished={finished} wins={wins}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,168 @@
+"""Chunked world streaming: lazily generated square chunks kept in an LRU cache.
+
+The world [-half_extent, half_extent]^2 is cut into square chunks. A chunk
+is generated the first time the player comes within the resident radius of
+it, from a NumPy generator seeded with (world seed, chunk column, chunk
+row), so its contents never depend on the order chunks are visited in.
+Chunks within the radius are resident and pinned. Chunks the player has
+left stay cached until the cache outgrows its memory budget, then the
+least recently used ones are evicted. An evicted chunk is rebuilt from its
+seed when needed again; only the treasures already collected in it are
+remembered.
+
+The simulation only ever sees the resident chunks, composed into ordinary
+obstacle, treasure and monster lists (see Simulation.stream()), so
+collision, monster updates and rendering never touch the rest of the world.
+"""
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+from monsters import MonsterStore
+
+CHUNK_SIZE = 1200                   # World units per chunk side (the classic level is one chunk)
+RESIDENT_RADIUS = 2                 # Chunks kept resident on each side of the player's chunk
+CHUNK_MEMORY_BUDGET = 8 * 2**20     # Bytes of cached chunks before the LRU ones are evicted
+CHUNK_MARGIN = 40                   # Obstacles keep this far from chunk edges, leaving walkable seams
+
+
+class Chunk:
+    """Generated contents of one chunk, as arrays in world coordinates."""
+
+    def __init__(self, key, obstacles, details, treasures, monsters):
+        self.key = key                  # (column, row)
+        self.obstacles = obstacles      # (n, 4) x, y, width, height
+        self.details = details          # (n, 4) x, y, z, size
+        self.treasures = treasures      # (n, 2) x, y
+        self.collected = np.zeros(len(treasures), dtype=bool)
+        self.monsters = monsters        # MonsterStore
+
+    @property
+    def nbytes(self):
+        """Bytes held by the chunk's arrays."""
+        return (self.obstacles.nbytes + self.details.nbytes + self.treasures.nbytes
+                + self.collected.nbytes + self.monsters.nbytes)
+
+
+class ChunkedWorld:
+    """Resident set and LRU cache of generated chunks around a moving focus point.
+
+    generate(rng, x0, y0, size) builds a Chunk's contents for the square
+    with lower-left corner (x0, y0) and returns (obstacles, details,
+    treasures, monsters).
+    """
+
+    def __init__(self, seed, half_extent, generate, chunk_size=CHUNK_SIZE,
+                 radius=RESIDENT_RADIUS, memory_budget=CHUNK_MEMORY_BUDGET):
+        if (2 * half_extent) % chunk_size:
+            raise ValueError(f"world size {2 * half_extent} is not a multiple of the chunk size {chunk_size}")
+        self.seed = seed
+        self.half_extent = half_extent
+        self.generate = generate
+        self.chunk_size = chunk_size
+        self.radius = radius
+        self.memory_budget = memory_budget
+        self.chunks_per_side = (2 * half_extent) // chunk_size
+
+        self.cache = OrderedDict()      # key -> Chunk, least recently used first
+        self.cache_bytes = 0
+        self.resident = []              # Keys of the pinned chunks, in composition order
+        self.focus_key = None           # Chunk the resident square is centred on
+        self._collected = {}            # key -> collected mask of evicted chunks
+        self._slices = []               # Per resident chunk: (treasure range, monster range)
+
+        # Statistics
+        self.generated = 0
+        self.evicted = 0
+
+    def key_of(self, x, y):
+        """(column, row) of the chunk containing world point (x, y), clipped to the world."""
+        last = self.chunks_per_side - 1
+        column = min(last, max(0, math.floor((x + self.half_extent) / self.chunk_size)))
+        row = min(last, max(0, math.floor((y + self.half_extent) / self.chunk_size)))
+        return column, row
+
+    def origin(self, key):
+        """World position of a chunk's lower-left corner."""
+        return (key[0] * self.chunk_size - self.half_extent, key[1] * self.chunk_size - self.half_extent)
+
+    def area(self):
+        """(centre x, centre y, half extent) of the resident square (it may reach past the world edge)."""
+        x0, y0 = self.origin(self.focus_key)
+        half = self.chunk_size / 2
+        return x0 + half, y0 + half, half + self.radius * self.chunk_size
+
+    def needs_focus(self, x, y):
+        """True if (x, y) lies in another chunk than the resident square is centred on."""
+        return self.key_of(x, y) != self.focus_key
+
+    def focus(self, x, y):
+        """Make the chunks within the radius of (x, y) resident, generating and evicting as needed."""
+        self.focus_key = column, row = self.key_of(x, y)
+        last = self.chunks_per_side - 1
+        self.resident = [(c, r)
+                         for c in range(max(0, column - self.radius), min(last, column + self.radius) + 1)
+                         for r in range(max(0, row - self.radius), min(last, row + self.radius) + 1)]
+        for key in self.resident:
+            self._chunk(key)
+        self._evict()
+
+    def _chunk(self, key):
+        """The chunk for key, generated if it is not cached; marks it most recently used."""
+        chunk = self.cache.get(key)
+        if chunk is not None:
+            self.cache.move_to_end(key)
+            return chunk
+        rng = np.random.default_rng([self.seed, key[0], key[1]])
+        chunk = Chunk(key, *self.generate(rng, *self.origin(key), self.chunk_size))
+        collected = self._collected.pop(key, None)
+        if collected is not None:
+            chunk.collected = collected
+        self.cache[key] = chunk
+        self.cache_bytes += chunk.nbytes
+        self.generated += 1
+        return chunk
+
+    def _evict(self):
+        """Drop least recently used, non-resident chunks until the cache fits the budget."""
+        pinned = set(self.resident)
+        for key in list(self.cache):
+            if self.cache_bytes <= self.memory_budget:
+                break
+            if key in pinned:
+                continue
+            chunk = self.cache.pop(key)
+            self.cache_bytes -= chunk.nbytes
+            if chunk.collected.any():
+                self._collected[key] = chunk.collected
+            self.evicted += 1
+
+    def compose(self):
+        """Resident contents as (obstacles, details, treasures, monsters) in the simulation's formats."""
+        chunks = [self.cache[key] for key in self.resident]
+        self._slices = []
+        treasure_start = monster_start = 0
+        for chunk in chunks:
+            treasure_end = treasure_start + len(chunk.treasures)
+            monster_end = monster_start + len(chunk.monsters)
+            self._slices.append(((treasure_start, treasure_end), (monster_start, monster_end)))
+            treasure_start, monster_start = treasure_end, monster_end
+
+        obstacles = np.concatenate([chunk.obstacles for chunk in chunks]).tolist()
+        details = np.concatenate([chunk.details for chunk in chunks]).tolist()
+        treasures = [[x, y, collected]
+                     for chunk in chunks
+                     for (x, y), collected in zip(chunk.treasures.tolist(), chunk.collected.tolist())]
+        monsters = MonsterStore.concatenate(chunk.monsters for chunk in chunks)
+        return obstacles, details, treasures, monsters
+
+    def store(self, treasures, monsters):
+        """Write the simulation's treasure flags and monster state back into the resident chunks."""
+        collected = np.array([c for _, _, c in treasures], dtype=bool)
+        for key, ((t0, t1), (m0, m1)) in zip(self.resident, self._slices):
+            chunk = self.cache[key]
+            self.cache_bytes -= chunk.nbytes
+            chunk.collected = collected[t0:t1]
+            chunk.monsters = monsters.slice(m0, m1)
+            self.cache_bytes += chunk.nbytes
@@ -0,0 +1,446 @@
+"""Contraction hierarchies for repeated shortest-path queries on road graphs.
+
+Preprocessing contracts nodes one at a time in order of importance (edge
+difference, updated lazily), adding a shortcut u -> x through node v only
+when a bounded witness search finds no path from u to x that avoids v and
+is at least as short. Every edge then points either up the hierarchy
+(stored with its lower endpoint in the forward graph) or down it (stored
+reversed with its lower endpoint in the backward graph), and a query is a
+bidirectional Dijkstra that only ever climbs and so settles a small
+fraction of the nodes plain Dijkstra would.
+
+The hierarchy is saved as a binary sidecar next to the text graph
+(Inputfile.txt -> Inputfile.txt.ch) and memory-mapped back in:
+
+    python contraction.py Inputfile.txt                  # build the sidecar
+    python contraction.py Inputfile.txt Arad Eforie      # query through it
+    python contraction.py --benchmark --sizes 10000 100000
+"""
+import argparse
+import heapq
+import math
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+from road_graph import load_graph, search
+
+SIDECAR_SUFFIX = '.ch'
+SIDECAR_MAGIC = b'RGCH'
+SIDECAR_VERSION = 1
+# magic, version, nodes, graph edges, up edges, down edges, source size, source mtime
+_HEADER = struct.Struct('<4sIqqqqqq')
+
+WITNESS_SETTLE_LIMIT = 60   # Nodes a witness search may settle before giving up
+ESTIMATE_SETTLE_LIMIT = 8   # Cheaper limit used only to rank nodes by importance
+
+BENCHMARK_SIZES = (10_000, 100_000)
+BENCHMARK_MAX_NODES = 100_000   # Builds take about 1.3 ms per node; larger sizes need --allow-large
+BENCHMARK_QUERIES = 20
+SYNTHETIC_SPACING = 100     # Lattice spacing of synthetic graphs, in cost units
+SYNTHETIC_DIAGONALS = 0.3   # Share of lattice cells that also get a diagonal road
+SYNTHETIC_HIGHWAY_EVERY = 10  # Every 10th lattice row and column is a highway
+SYNTHETIC_HIGHWAY_RATE = 0.4  # Highway cost per unit of length, relative to other roads
+
+
+def _witness_distances(out, source, excluded, targets, max_cost, settle_limit):
+    """Tentative distances from source that avoid `excluded`.
+
+    Stops once every node in targets is settled, the frontier passes
+    max_cost, or settle_limit nodes have been settled.
+    """
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    settled = 0
+    remaining = len(targets)
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > max_cost:
+            break
+        if d > dist[u]:
+            continue
+        if u in targets:
+            remaining -= 1
+            if not remaining:
+                break
+        settled += 1
+        if settled > settle_limit:
+            break
+        for x, w in out[u].items():
+            if x == excluded:
+                continue
+            nd = d + w
+            if nd < dist.get(x, math.inf):
+                dist[x] = nd
+                heapq.heappush(heap, (nd, x))
+    return dist
+
+
+def _shortcuts(out, inc, v, settle_limit):
+    """Shortcuts (u, x, cost) needed to contract v without changing any shortest distance."""
+    outgoing = out[v]
+    if not outgoing:
+        return []
+    shortcuts = []
+    longest = max(outgoing.values())
+    for u, w1 in inc[v].items():
+        dist = _witness_distances(out, u, v, outgoing, w1 + longest, settle_limit)
+        for x, w2 in outgoing.items():
+            if x != u and dist.get(x, math.inf) > w1 + w2:
+                shortcuts.append((u, x, w1 + w2))
+    return shortcuts
+
+
+def _csr(n, sources, targets, weights, middles):
+    """Edge lists grouped by source into indptr/indices/weights/middle arrays."""
+    sources = np.asarray(sources, dtype=np.int64)
+    order = np.argsort(sources, kind='stable')
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+    return (indptr,
+            np.asarray(targets, dtype=np.int64)[order],
+            np.asarray(weights, dtype=np.float64)[order],
+            np.asarray(middles, dtype=np.int64)[order])
+
+
+class ContractionHierarchy:
+    """Upward forward/backward CSR graphs plus node ranks for one RoadGraph."""
+
+    def __init__(self, graph, rank, up, down, source_stat=(0, 0)):
+        self.graph = graph
+        self.rank = rank
+        # Each is (indptr, indices, weights, middle); middle is -1 for original edges
+        self.up = up      # Edge v -> x with rank[x] > rank[v]
+        self.down = down  # Edge u -> v with rank[u] > rank[v], stored at v as v -> u
+        self.source_stat = source_stat
+        self._views = [tuple(memoryview(array) for array in part[:3]) for part in (up, down)]
+
+    @classmethod
+    def build(cls, graph, settle_limit=WITNESS_SETTLE_LIMIT, estimate_limit=ESTIMATE_SETTLE_LIMIT):
+        """Contract every node of graph; returns the finished hierarchy."""
+        n = graph.num_nodes
+        out = [{} for _ in range(n)]
+        inc = [{} for _ in range(n)]
+        middle = {}
+        sources = np.repeat(np.arange(n), np.diff(graph.indptr))
+        for u, v, w in zip(sources.tolist(), graph.indices.tolist(), graph.weights.tolist()):
+            if u != v and w < out[u].get(v, math.inf):
+                out[u][v] = w
+                inc[v][u] = w
+
+        # Edge difference, plus terms that spread contraction evenly over the graph
+        def priority(v, shortcuts):
+            return len(shortcuts) - len(out[v]) - len(inc[v]) + contracted_neighbours[v] + level[v]
+
+        contracted_neighbours = [0] * n
+        level = [0] * n  # Depth of the hierarchy below each node
+        heap = [(priority(v, _shortcuts(out, inc, v, estimate_limit)), v) for v in range(n)]
+        heapq.heapify(heap)
+
+        rank = np.zeros(n, dtype=np.int64)
+        up_edges = ([], [], [], [])
+        down_edges = ([], [], [], [])
+        next_rank = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            # Lazy update: re-evaluate and put back if v is no longer the least important
+            current = priority(v, _shortcuts(out, inc, v, estimate_limit))
+            if heap and current > heap[0][0]:
+                heapq.heappush(heap, (current, v))
+                continue
+            shortcuts = _shortcuts(out, inc, v, settle_limit)
+
+            rank[v] = next_rank
+            next_rank += 1
+
+            # Remaining edges of v lead to higher-ranked nodes
+            for x, w in out[v].items():
+                for column, value in zip(up_edges, (v, x, w, middle.get((v, x), -1))):
+                    column.append(value)
+                del inc[x][v]
+                contracted_neighbours[x] += 1
+                level[x] = max(level[x], level[v] + 1)
+            for u, w in inc[v].items():
+                for column, value in zip(down_edges, (v, u, w, middle.get((u, v), -1))):
+                    column.append(value)
+                del out[u][v]
+                contracted_neighbours[u] += 1
+                level[u] = max(level[u], level[v] + 1)
+            out[v] = inc[v] = None
+
+            for u, x, w in shortcuts:
+                if w < out[u].get(x, math.inf):
+                    out[u][x] = w
+                    inc[x][u] = w
+                    middle[(u, x)] = v
+
+        return cls(graph, rank, _csr(n, *up_edges), _csr(n, *down_edges))
+
+    def _middle(self, a, b):
+        """Contracted node the hierarchy edge a -> b bypasses, or -1 for an original edge."""
+        if self.rank[a] < self.rank[b]:
+            node, target, (indptr, indices, _, middle) = a, b, self.up
+        else:
+            node, target, (indptr, indices, _, middle) = b, a, self.down
+        for k in range(indptr[node], indptr[node + 1]):
+            if indices[k] == target:
+                return int(middle[k])
+        raise KeyError(f"no hierarchy edge {a} -> {b}")
+
+    def _unpack(self, path):
+        """Replace shortcuts in a hierarchy path with the original edges they stand for."""
+        result = [path[0]]
+        stack = [(a, b) for a, b in zip(path[-2::-1], path[:0:-1])]
+        while stack:
+            a, b = stack.pop()
+            via = self._middle(a, b)
+            if via < 0:
+                result.append(b)
+            else:
+                stack.append((via, b))
+                stack.append((a, via))
+        return result
+
+    def query(self, start, goal):
+        """Shortest path as (city names, cost, nodes settled); ([], inf, n) if unreachable."""
+        graph = self.graph
+        start = graph.node(start)
+        goal = graph.node(goal)
+        if start == goal:
+            return [graph.names[start]], 0.0, 0
+
+        dist = ({start: 0.0}, {goal: 0.0})
+        parent = ({start: -1}, {goal: -1})
+        heaps = ([(0.0, start)], [(0.0, goal)])
+        best = math.inf
+        meeting = -1
+        settled = 0
+        while True:
+            active = [side for side in (0, 1) if heaps[side] and heaps[side][0][0] < best]
+            if not active:
+                break
+            for side in active:
+                if not heaps[side] or heaps[side][0][0] >= best:
+                    continue
+                d, u = heapq.heappop(heaps[side])
+                mine, other = dist[side], dist[1 - side]
+                if d > mine[u]:
+                    continue
+                settled += 1
+                if u in other and d + other[u] < best:
+                    best = d + other[u]
+                    meeting = u
+                indptr, indices, weights = self._views[side]
+                for k in range(indptr[u], indptr[u + 1]):
+                    v = indices[k]
+                    nd = d + weights[k]
+                    if nd < mine.get(v, math.inf):
+                        mine[v] = nd
+                        parent[side][v] = u
+                        heapq.heappush(heaps[side], (nd, v))
+
+        if meeting < 0:
+            return [], math.inf, settled
+        path = [meeting]
+        while parent[0][path[-1]] >= 0:
+            path.append(parent[0][path[-1]])
+        path.reverse()
+        while parent[1][path[-1]] >= 0:
+            path.append(parent[1][path[-1]])
+        return [graph.names[node] for node in self._unpack(path)], best, settled
+
+    def save(self, path):
+        """Write the hierarchy as a binary sidecar file."""
+        n = self.graph.num_nodes
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(SIDECAR_MAGIC, SIDECAR_VERSION, n, self.graph.num_edges,
+                                 len(self.up[1]), len(self.down[1]), *self.source_stat))
+            for array in (self.rank, *self.up, *self.down):
+                f.write(np.ascontiguousarray(array).tobytes())
+
+    @classmethod
+    def load(cls, graph, path, source_stat=None):
+        """Map a sidecar written by save() back in; raises ValueError if it does not fit graph."""
+        data = np.memmap(path, dtype=np.uint8, mode='r')
+        magic, version, n, edges, n_up, n_down, size, mtime = _HEADER.unpack(bytes(data[:_HEADER.size]))
+        if magic != SIDECAR_MAGIC or version != SIDECAR_VERSION:
+            raise ValueError(f"{path} is not a version {SIDECAR_VERSION} hierarchy file")
+        if n != graph.num_nodes or edges != graph.num_edges:
+            raise ValueError(f"{path} was built for a different graph")
+        if source_stat is not None and (size, mtime) != tuple(source_stat):
+            raise ValueError(f"{path} is older than the graph it was built from")
+
+        offset = _HEADER.size
+
+        def take(count, dtype):
+            nonlocal offset
+            array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+            offset += array.nbytes
+            return array
+
+        rank = take(n, np.int64)
+        up = (take(n + 1, np.int64), take(n_up, np.int64), take(n_up, np.float64), take(n_up, np.int64))
+        down = (take(n + 1, np.int64), take(n_down, np.int64), take(n_down, np.float64), take(n_down, np.int64))
+        return cls(graph, rank, up, down, (size, mtime))
+
+
+def _source_stat(graph_path):
+    stat = os.stat(graph_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def load_or_build(graph_path, graph=None):
+    """Hierarchy for a graph file, from its sidecar if that is up to date, else built and saved."""
+    if graph is None:
+        graph = load_graph(graph_path)
+    sidecar = graph_path + SIDECAR_SUFFIX
+    source_stat = _source_stat(graph_path)
+    if os.path.exists(sidecar):
+        try:
+            return ContractionHierarchy.load(graph, sidecar, source_stat)
+        except ValueError:
+            pass  # Stale or foreign sidecar: rebuild it
+    hierarchy = ContractionHierarchy.build(graph)
+    hierarchy.source_stat = source_stat
+    hierarchy.save(sidecar)
+    return hierarchy
+
+
+def write_synthetic_graph(path, n, seed=0):
+    """Write an n-node road-like graph in the Inputfile.txt format.
+
+    Nodes sit on a jittered square lattice with roads to their lattice
+    neighbours and some diagonals. Every SYNTHETIC_HIGHWAY_EVERY-th row and
+    column is a highway, cheaper per unit of length, which gives the graph
+    the speed hierarchy real road maps have. Costs are rounded-up travel
+    costs and the heuristic column is the straight-line distance to N0 at
+    highway rates, so it never overestimates.
+    """
+    rng = np.random.default_rng(seed)
+    side = math.ceil(math.sqrt(n))
+    ids = np.arange(n)
+    row, col = np.divmod(ids, side)
+    xy = np.column_stack((col, row)) * SYNTHETIC_SPACING + rng.uniform(-30, 30, (n, 2))
+
+    right = ids[(col + 1 < side) & (ids + 1 < n)]
+    below = ids[ids + side < n]
+    diagonal = ids[(col + 1 < side) & (ids + side + 1 < n)]
+    diagonal = diagonal[rng.random(len(diagonal)) < SYNTHETIC_DIAGONALS]
+    a = np.concatenate((right, below, diagonal))
+    b = np.concatenate((right + 1, below + side, diagonal + side + 1))
+    highway = np.concatenate((row[right] % SYNTHETIC_HIGHWAY_EVERY == 0,
+                              col[below] % SYNTHETIC_HIGHWAY_EVERY == 0,
+                              np.zeros(len(diagonal), dtype=bool)))
+    rate = np.where(highway, SYNTHETIC_HIGHWAY_RATE, 1.0)
+    cost = np.ceil(np.linalg.norm(xy[a] - xy[b], axis=1) * rate).astype(np.int64)
+
+    # Both directions, grouped by source
+    src = np.concatenate((a, b))
+    dst = np.concatenate((b, a))
+    cost = np.concatenate((cost, cost))
+    order = np.argsort(src, kind='stable')
+    dst, cost = dst[order].tolist(), cost[order].tolist()
+    bounds = np.searchsorted(src[order], np.arange(n + 1)).tolist()
+    straight = np.linalg.norm(xy - xy[0], axis=1) * SYNTHETIC_HIGHWAY_RATE
+    heuristic = np.floor(straight).astype(np.int64).tolist()
+
+    with open(path, 'w') as f:
+        for node in range(n):
+            pairs = " ".join(f"N{dst[k]} {cost[k]}" for k in range(bounds[node], bounds[node + 1]))
+            f.write(f"N{node} {heuristic[node]} {pairs}\n")
+
+
+def run_benchmark(sizes=BENCHMARK_SIZES, queries=BENCHMARK_QUERIES, seed=0):
+    """Compare hierarchy queries with plain Dijkstra on synthetic graphs of each size."""
+    rng = np.random.default_rng(seed)
+    print(f"{'nodes':>9} {'edges':>9} {'load s':>7} {'build s':>8} {'sidecar s':>9} "
+          f"{'dijkstra ms':>11} {'ch ms':>7} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in sizes:
+            path = os.path.join(workdir, f"synthetic_{n}.txt")
+            write_synthetic_graph(path, n, seed)
+
+            started = time.perf_counter()
+            graph = load_graph(path)
+            load_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            hierarchy = ContractionHierarchy.build(graph)
+            hierarchy.source_stat = _source_stat(path)
+            build_seconds = time.perf_counter() - started
+            hierarchy.save(path + SIDECAR_SUFFIX)
+
+            started = time.perf_counter()
+            hierarchy = ContractionHierarchy.load(graph, path + SIDECAR_SUFFIX, _source_stat(path))
+            sidecar_seconds = time.perf_counter() - started
+
+            pairs = rng.integers(0, n, (queries, 2)).tolist()
+            dijkstra_seconds = ch_seconds = 0.0
+            for start, goal in pairs:
+                started = time.perf_counter()
+                expected = search(graph, start, goal, 'dijkstra').cost
+                dijkstra_seconds += time.perf_counter() - started
+
+                started = time.perf_counter()
+                _, cost, _ = hierarchy.query(start, goal)
+                ch_seconds += time.perf_counter() - started
+                if not math.isclose(cost, expected):
+                    raise AssertionError(f"N{start} -> N{goal}: hierarchy cost {cost}, Dijkstra {expected}")
+
+            dijkstra_ms = dijkstra_seconds / queries * 1000
+            ch_ms = ch_seconds / queries * 1000
+            print(f"{n:>9} {graph.num_edges:>9} {load_seconds:>7.2f} {build_seconds:>8.1f} "
+                  f"{sidecar_seconds:>9.4f} {dijkstra_ms:>11.2f} {ch_ms:>7.3f} "
+                  f"{dijkstra_ms / max(ch_ms, 1e-9):>7.0f}x")
+
+
+def build_arg_parser():
+    """Command-line options for building, querying and benchmarking hierarchies."""
+    parser = argparse.ArgumentParser(description="Contraction hierarchies for Inputfile.txt graphs")
+    parser.add_argument("graph", nargs='?', help="graph file; its sidecar is built if missing or stale")
+    parser.add_argument("start", nargs='?', help="start city for a query")
+    parser.add_argument("goal", nargs='?', help="goal city for a query")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="compare against Dijkstra on synthetic graphs")
+    parser.add_argument("--sizes", type=int, nargs='+', default=list(BENCHMARK_SIZES),
+                        help=f"synthetic graph sizes in nodes, at most {BENCHMARK_MAX_NODES} "
+                             f"(default: %(default)s)")
+    parser.add_argument("--allow-large", action="store_true",
+                        help=f"allow sizes above {BENCHMARK_MAX_NODES} nodes; a 1M-node build "
+                             f"takes over 20 minutes")
+    parser.add_argument("--queries", type=int, default=BENCHMARK_QUERIES,
+                        help="random queries per graph size")
+    return parser
+
+
+def main(argv=None):
+    """Entry point; see the module docstring for usage."""
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    if args.benchmark:
+        too_large = [n for n in args.sizes if n > BENCHMARK_MAX_NODES]
+        if too_large and not args.allow_large:
+            parser.error(f"--sizes {' '.join(map(str, too_large))}: hierarchies above {BENCHMARK_MAX_NODES} nodes "
+                         f"take tens of minutes to build; pass --allow-large to run them anyway")
+        run_benchmark(args.sizes, args.queries)
+        return
+    if args.graph is None:
+        parser.error("a graph file is required unless --benchmark is given")
+
+    started = time.perf_counter()
+    graph = load_graph(args.graph)
+    hierarchy = load_or_build(args.graph, graph)
+    print(f"{graph.num_nodes} nodes, {graph.num_edges} edges, "
+          f"{len(hierarchy.up[1]) + len(hierarchy.down[1])} hierarchy edges "
+          f"({time.perf_counter() - started:.2f} s)")
+    if args.start and args.goal:
+        path, cost, settled = hierarchy.query(args.start, args.goal)
+        route = " -> ".join(path) if path else "unreachable"
+        print(f"{route} cost={cost:g} settled={settled}")
+
+
+if __name__ == "__main__":
+    main()
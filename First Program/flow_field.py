@@ -0,0 +1,159 @@
+"""Shared flow field that steers chasing monsters around obstacles.
+
+The obstacles are rasterized once per level into a navigation grid. A
+breadth-first search from the player's cell gives every reachable cell its
+step distance to the player, and each cell stores a unit vector towards
+its lowest-distance neighbour. The field is only rebuilt when the player
+moves into another cell; monsters then read their heading with one array
+lookup each, so the cost does not depend on how many of them are chasing.
+
+The grid need not cover the whole map: streamed worlds build it over a
+window around the player (see Simulation.update_flow_window), and points
+outside the window are simply not covered.
+"""
+import math
+
+import numpy as np
+
+from placement import OccupancyGrid
+
+NAV_CELL_SIZE = 25    # World units per navigation cell
+NAV_CLEARANCE = 15    # Obstacles are grown by this much so paths keep off the walls
+
+# Neighbour offsets (dx, dy); the first four are the BFS moves, diagonals
+# are only taken for steering when both cells they cut past are open
+_ORTHOGONAL = ((1, 0), (-1, 0), (0, 1), (0, -1))
+_DIAGONAL = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+class FlowField:
+    """BFS distance and steering field towards a moving target on a static nav grid."""
+
+    def __init__(self, grid_length, obstacles, cell_size=NAV_CELL_SIZE, clearance=NAV_CLEARANCE,
+                 origin=(0, 0)):
+        # The grid covers grid_length either side of origin (the map centre, or a streamed area's)
+        ox, oy = origin
+        grid = OccupancyGrid(grid_length, cell_size)
+        grid.block_boxes([(x - ox, y - oy, width, height) for x, y, width, height in obstacles], clearance)
+        self.origin = (ox, oy)
+        self.half_extent = grid.half_extent
+        self.cell_size = grid.cell_size
+        self.cells = grid.cells
+
+        # Padded with a blocked border so neighbour offsets never leave the array
+        self.width = self.cells + 2
+        passable = np.zeros((self.width, self.width), dtype=bool)
+        passable[1:-1, 1:-1] = ~grid.blocked
+        self.passable = passable.ravel()
+
+        self.target_cell = None
+        self._dirty = False
+        self.distance = None  # Flat padded BFS distances, -1 where unreached
+        self.step_x = self.step_y = None
+        self.has_step = None
+        self.rebuilds = 0
+
+    def _flat_cells(self, x, y):
+        """Flat padded indices of the cells containing world points x, y (arrays or scalars)."""
+        last = self.cells - 1
+        ox, oy = self.origin
+        ix = np.clip(np.floor((np.asarray(x) - ox + self.half_extent) / self.cell_size), 0, last).astype(np.int64)
+        iy = np.clip(np.floor((np.asarray(y) - oy + self.half_extent) / self.cell_size), 0, last).astype(np.int64)
+        return (ix + 1) * self.width + (iy + 1)
+
+    def retarget(self, x, y):
+        """Point the field at (x, y); it is rebuilt lazily, and only if the cell changed."""
+        # Called every tick with one point; plain floats beat a NumPy round trip here
+        last = self.cells - 1
+        ox, oy = self.origin
+        ix = min(last, max(0, math.floor((x - ox + self.half_extent) / self.cell_size)))
+        iy = min(last, max(0, math.floor((y - oy + self.half_extent) / self.cell_size)))
+        cell = (ix + 1) * self.width + (iy + 1)
+        if cell != self.target_cell:
+            self.target_cell = cell
+            self._dirty = True
+
+    def _rebuild(self):
+        """Breadth-first distances from the target cell, then a steering vector per cell."""
+        width = self.width
+        passable = self.passable.copy()
+        passable[self.target_cell] = True  # The player may stand in a cell the grid calls blocked
+
+        distance = np.full(width * width, -1, dtype=np.int32)
+        distance[self.target_cell] = 0
+        offsets = np.array([dx * width + dy for dx, dy in _ORTHOGONAL], dtype=np.int64)
+        frontier = np.array([self.target_cell], dtype=np.int64)
+        step = 0
+        while len(frontier):
+            step += 1
+            neighbours = (frontier[:, None] + offsets[None, :]).ravel()
+            neighbours = np.unique(neighbours[passable[neighbours] & (distance[neighbours] < 0)])
+            distance[neighbours] = step
+            frontier = neighbours
+
+        # Steer towards the lowest-distance reachable neighbour
+        grid = distance.reshape(width, width)
+        reached = grid >= 0
+        unreached = np.iinfo(np.int32).max
+        inner = (slice(1, -1), slice(1, -1))
+
+        def shifted(array, dx, dy):
+            return array[1 + dx:width - 1 + dx, 1 + dy:width - 1 + dy]
+
+        moves = _ORTHOGONAL + _DIAGONAL
+        costs = []
+        for dx, dy in moves:
+            ok = shifted(reached, dx, dy)
+            if dx and dy:
+                ok = ok & shifted(reached, dx, 0) & shifted(reached, 0, dy)
+            costs.append(np.where(ok, shifted(grid, dx, dy), unreached))
+        costs = np.stack(costs)
+        best = np.argmin(costs, axis=0)
+        best_cost = np.take_along_axis(costs, best[None], axis=0)[0]
+
+        vectors = np.array(moves, dtype=np.float64)
+        vectors /= np.linalg.norm(vectors, axis=1)[:, None]
+        here = grid[inner]
+        self.has_step = np.zeros(width * width, dtype=bool)
+        self.has_step.reshape(width, width)[inner] = (here > 0) & (best_cost < here)
+        self.step_x = np.zeros(width * width)
+        self.step_y = np.zeros(width * width)
+        self.step_x.reshape(width, width)[inner] = vectors[best, 0]
+        self.step_y.reshape(width, width)[inner] = vectors[best, 1]
+
+        self.distance = distance
+        self._dirty = False
+        self.rebuilds += 1
+
+    def steer(self, x, y):
+        """Unit steering vectors for points x, y, plus a mask of points the field covers.
+
+        Points in the target cell, in cells the BFS never reached or
+        outside the grid get no vector; callers head straight for the
+        target there.
+        """
+        if self.target_cell is None:
+            zeros = np.zeros(np.shape(x))
+            return zeros, zeros, zeros.astype(bool)
+        if self._dirty:
+            self._rebuild()
+        cells = self._flat_cells(x, y)
+        ox, oy = self.origin
+        inside = (np.abs(np.asarray(x) - ox) < self.half_extent) & (np.abs(np.asarray(y) - oy) < self.half_extent)
+        return self.step_x[cells], self.step_y[cells], self.has_step[cells] & inside
+
+    def steer_point(self, x, y):
+        """steer() for a single point, as plain floats: (x, y, covered)."""
+        if self.target_cell is None:
+            return 0.0, 0.0, False
+        if self._dirty:
+            self._rebuild()
+        ox, oy = self.origin
+        half = self.half_extent
+        if not (abs(x - ox) < half and abs(y - oy) < half):
+            return 0.0, 0.0, False
+        last = self.cells - 1
+        ix = min(last, max(0, math.floor((x - ox + half) / self.cell_size)))
+        iy = min(last, max(0, math.floor((y - oy + half) / self.cell_size)))
+        cell = (ix + 1) * self.width + (iy + 1)
+        return float(self.step_x[cell]), float(self.step_y[cell]), bool(self.has_step[cell])
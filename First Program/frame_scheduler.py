@@ -0,0 +1,106 @@
+"""Timer-driven frame pacing for the GLUT front-end.
+
+Replaces a glutIdleFunc busy loop: the scheduler wakes up on glutTimerFunc at
+the target frame rate, lets the caller advance the simulation, and only posts
+a redisplay when something actually changed. While nothing is animating
+(title screen, game over) it drops to a slow idle wake-up rate. Whether the
+scene is animating is asked separately from whether a wake-up changed it:
+at high frame rates many wake-ups fall between two simulation ticks, and
+those must keep the frame rate rather than stall for a whole idle interval.
+"""
+import time
+
+from OpenGL.GLUT import glutPostRedisplay, glutTimerFunc
+
+DEFAULT_FPS = 60
+IDLE_FPS = 10  # Wake-up rate while the scene is static
+
+
+class FrameScheduler:
+    """Paces wake-ups and redraws, and keeps missed-deadline statistics."""
+
+    def __init__(self, update, target_fps=DEFAULT_FPS, idle_fps=IDLE_FPS,
+                 clock=time.perf_counter, report_interval=None, animating=None):
+        self.update = update  # Called on every wake-up; returns True if the scene changed
+        self.animating = animating  # Returns True while wake-ups should keep the frame rate
+        self.frame_interval = 1.0 / target_fps
+        self.idle_interval = 1.0 / idle_fps
+        self.clock = clock
+        self.report_interval = report_interval  # Seconds between printed summaries, or None
+
+        self.dirty = True
+        self._deadline = None
+        self._generation = 0  # Lets request_redraw() supersede a pending idle timer
+        self._last_report = clock()
+
+        # Statistics
+        self.wakeups = 0
+        self.frames = 0
+        self.late_wakeups = 0    # Timer fired more than a whole frame after its deadline
+        self.overruns = 0        # Rendering a frame took longer than the frame budget
+        self.skipped_frames = 0  # Deadlines dropped because we were too far behind
+        self.worst_late = 0.0
+        self.render_time = 0.0
+
+    def start(self):
+        """Schedule the first wake-up."""
+        self._schedule(0)
+
+    def request_redraw(self):
+        """Mark the scene dirty (e.g. after input) and wake up right away."""
+        self.dirty = True
+        glutPostRedisplay()
+        self._deadline = None
+        self._schedule(0)
+
+    def frame_rendered(self, render_seconds):
+        """Called by the display callback after drawing a frame."""
+        self.dirty = False
+        self.frames += 1
+        self.render_time += render_seconds
+        if render_seconds > self.frame_interval:
+            self.overruns += 1
+
+    def _schedule(self, delay):
+        self._generation += 1
+        glutTimerFunc(max(0, int(delay * 1000)), self._on_timer, self._generation)
+
+    def _on_timer(self, generation):
+        if generation != self._generation:
+            return  # Superseded by request_redraw()
+
+        now = self.clock()
+        self.wakeups += 1
+        if self._deadline is not None:
+            late = now - self._deadline
+            self.worst_late = max(self.worst_late, late)
+            if late > self.frame_interval:
+                self.late_wakeups += 1
+
+        if self.update():
+            self.dirty = True
+        if self.dirty:
+            glutPostRedisplay()
+
+        # Animate at the target rate while anything moves, otherwise just poll slowly
+        active = self.dirty or (self.animating is not None and self.animating())
+        interval = self.frame_interval if active else self.idle_interval
+        deadline = (self._deadline if self._deadline is not None else now) + interval
+        if deadline <= now:
+            # Too far behind: drop the missed frames instead of bursting to catch up
+            self.skipped_frames += int((now - deadline) / interval) + 1
+            deadline = now + interval
+        self._deadline = deadline
+
+        if self.report_interval and now - self._last_report >= self.report_interval:
+            self._last_report = now
+            print(self.summary())
+
+        self._schedule(deadline - self.clock())
+
+    def summary(self):
+        """One-line statistics report."""
+        avg_render = self.render_time / self.frames * 1000 if self.frames else 0.0
+        return (f"frames={self.frames} wakeups={self.wakeups} late={self.late_wakeups} "
+                f"overruns={self.overruns} skipped={self.skipped_frames} "
+                f"worst_late_ms={self.worst_late * 1000:.1f} avg_render_ms={avg_render:.2f}")
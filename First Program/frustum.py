@@ -0,0 +1,116 @@
+"""View-frustum culling for batches of bounding boxes and spheres.
+
+The six clipping planes are extracted from projection x view (the
+Gribb-Hartmann method) built the same way gluPerspective/glOrtho and
+gluLookAt build theirs, so what is culled matches what OpenGL would clip.
+Tests are batched: each plane's signed distance to every object comes from
+one matrix product, and an object is culled when it lies entirely behind
+any plane. Objects straddling a plane are kept, so culling is conservative.
+"""
+import math
+
+import numpy as np
+
+
+def look_at(eye, center, up):
+    """4x4 view matrix equal to gluLookAt(*eye, *center, *up)."""
+    eye = np.asarray(eye, dtype=np.float64)
+    forward = np.asarray(center, dtype=np.float64) - eye
+    forward /= np.linalg.norm(forward)
+    side = np.cross(forward, up)
+    side /= np.linalg.norm(side)
+    true_up = np.cross(side, forward)
+
+    view = np.identity(4)
+    view[0, :3] = side
+    view[1, :3] = true_up
+    view[2, :3] = -forward
+    view[:3, 3] = -view[:3, :3] @ eye
+    return view
+
+
+def perspective(fovy, aspect, near, far):
+    """4x4 projection matrix equal to gluPerspective(fovy, aspect, near, far)."""
+    f = 1.0 / math.tan(math.radians(fovy) / 2)
+    projection = np.zeros((4, 4))
+    projection[0, 0] = f / aspect
+    projection[1, 1] = f
+    projection[2, 2] = (far + near) / (near - far)
+    projection[2, 3] = 2 * far * near / (near - far)
+    projection[3, 2] = -1
+    return projection
+
+
+def ortho(left, right, bottom, top, near, far):
+    """4x4 projection matrix equal to glOrtho(left, right, bottom, top, near, far)."""
+    projection = np.identity(4)
+    projection[0, 0] = 2 / (right - left)
+    projection[1, 1] = 2 / (top - bottom)
+    projection[2, 2] = -2 / (far - near)
+    projection[:3, 3] = (-(right + left) / (right - left), -(top + bottom) / (top - bottom),
+                         -(far + near) / (far - near))
+    return projection
+
+
+class Frustum:
+    """Six world-space planes (a, b, c, d) with unit normals pointing inwards."""
+
+    def __init__(self, matrix):
+        # Left, right, bottom, top, near, far: row 3 plus or minus rows 0, 1, 2
+        rows = np.asarray(matrix, dtype=np.float64)
+        planes = np.array([rows[3] + rows[0], rows[3] - rows[0],
+                           rows[3] + rows[1], rows[3] - rows[1],
+                           rows[3] + rows[2], rows[3] - rows[2]])
+        planes /= np.linalg.norm(planes[:, :3], axis=1)[:, None]
+        self.normals = planes[:, :3]
+        self.offsets = planes[:, 3]
+        self.abs_normals = np.abs(self.normals)
+
+    @classmethod
+    def perspective(cls, fovy, aspect, near, far, eye, center, up):
+        """Frustum of a gluPerspective projection looking from eye at center."""
+        return cls(perspective(fovy, aspect, near, far) @ look_at(eye, center, up))
+
+    @classmethod
+    def ortho(cls, left, right, bottom, top, near, far, eye, center, up):
+        """Frustum (a box) of a glOrtho projection looking from eye at center."""
+        return cls(ortho(left, right, bottom, top, near, far) @ look_at(eye, center, up))
+
+    def boxes_visible(self, centers, half_extents):
+        """Mask of axis-aligned boxes (n, 3 centres and half extents) at least partly inside."""
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+        half_extents = np.asarray(half_extents, dtype=np.float64).reshape(-1, 3)
+        # Distance of each centre to each plane, against the box's projected radius
+        distance = centers @ self.normals.T + self.offsets
+        radius = half_extents @ self.abs_normals.T
+        return (distance >= -radius).all(axis=1)
+
+    def spheres_visible(self, centers, radii):
+        """Mask of spheres (n, 3 centres; scalar or n radii) at least partly inside."""
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+        distance = centers @ self.normals.T + self.offsets
+        return (distance >= -np.reshape(radii, (-1, 1))).all(axis=1)
+
+
+class CullStats:
+    """Drawn and culled object counts per category, reset every frame."""
+
+    def __init__(self):
+        self.counts = {}
+
+    def reset(self):
+        self.counts = {}
+
+    def add(self, category, visible):
+        """Count a visibility mask under category."""
+        drawn = int(np.count_nonzero(visible))
+        before = self.counts.get(category, (0, 0))
+        self.counts[category] = (before[0] + drawn, before[1] + len(visible) - drawn)
+
+    @property
+    def drawn(self):
+        return sum(drawn for drawn, _ in self.counts.values())
+
+    @property
+    def culled(self):
+        return sum(culled for _, culled in self.counts.values())
@@ -0,0 +1,167 @@
+"""Pure NumPy mesh builders producing interleaved vertex data.
+
+Every vertex is VERTEX_FLOATS float32 values: position (3), color (3) and
+normal (3), laid out for glVertexPointer/glColorPointer/glNormalPointer
+with a stride of VERTEX_STRIDE bytes. Meshes are GL_TRIANGLES lists.
+"""
+import numpy as np
+
+VERTEX_FLOATS = 9
+VERTEX_STRIDE = VERTEX_FLOATS * 4
+COLOR_OFFSET = 3 * 4
+NORMAL_OFFSET = 6 * 4
+
+# Unit cube centred on the origin: per face, its normal and four CCW corners
+_CUBE_FACES = (
+    ((1, 0, 0), ((0.5, -0.5, -0.5), (0.5, 0.5, -0.5), (0.5, 0.5, 0.5), (0.5, -0.5, 0.5))),
+    ((-1, 0, 0), ((-0.5, 0.5, -0.5), (-0.5, -0.5, -0.5), (-0.5, -0.5, 0.5), (-0.5, 0.5, 0.5))),
+    ((0, 1, 0), ((0.5, 0.5, -0.5), (-0.5, 0.5, -0.5), (-0.5, 0.5, 0.5), (0.5, 0.5, 0.5))),
+    ((0, -1, 0), ((-0.5, -0.5, -0.5), (0.5, -0.5, -0.5), (0.5, -0.5, 0.5), (-0.5, -0.5, 0.5))),
+    ((0, 0, 1), ((-0.5, -0.5, 0.5), (0.5, -0.5, 0.5), (0.5, 0.5, 0.5), (-0.5, 0.5, 0.5))),
+    ((0, 0, -1), ((-0.5, 0.5, -0.5), (0.5, 0.5, -0.5), (0.5, -0.5, -0.5), (-0.5, -0.5, -0.5))),
+)
+_QUAD_TRIANGLES = (0, 1, 2, 0, 2, 3)
+
+CUBE_POSITIONS = np.array([corners[i] for _, corners in _CUBE_FACES for i in _QUAD_TRIANGLES],
+                          dtype=np.float32)
+CUBE_NORMALS = np.array([normal for normal, _ in _CUBE_FACES for _ in _QUAD_TRIANGLES],
+                        dtype=np.float32)
+
+
+def interleave(positions, colors, normals):
+    """Pack (n, 3) position/color/normal arrays into one (n, VERTEX_FLOATS) float32 array."""
+    vertices = np.empty((len(positions), VERTEX_FLOATS), dtype=np.float32)
+    vertices[:, 0:3] = positions
+    vertices[:, 3:6] = colors
+    vertices[:, 6:9] = normals
+    return vertices
+
+
+def boxes_mesh(centers, sizes, colors):
+    """Triangles for many axis-aligned boxes at once (36 vertices per box)."""
+    centers = np.asarray(centers, dtype=np.float32).reshape(-1, 3)
+    sizes = np.asarray(sizes, dtype=np.float32).reshape(-1, 3)
+    colors = np.broadcast_to(np.asarray(colors, dtype=np.float32), centers.shape)
+
+    n = len(centers)
+    corners = len(CUBE_POSITIONS)
+    positions = CUBE_POSITIONS[None, :, :] * sizes[:, None, :] + centers[:, None, :]
+    return interleave(positions.reshape(-1, 3),
+                      np.repeat(colors, corners, axis=0),
+                      np.tile(CUBE_NORMALS, (n, 1)))
+
+
+def checkerboard_mesh(start, stop, cell_size, color_even, color_odd, y_start=None, y_stop=None):
+    """Flat z=0 checkerboard of cell_size squares whose corners run from start to stop inclusive.
+
+    y_start and y_stop give the y range when it differs from the x range.
+    """
+    x_coords = np.arange(start, stop + 1, cell_size)
+    y_coords = x_coords if y_start is None else np.arange(y_start, y_stop + 1, cell_size)
+    x, y = np.meshgrid(x_coords, y_coords, indexing='ij')
+    x = x.ravel().astype(np.float32)
+    y = y.ravel().astype(np.float32)
+
+    # Alternate colors for grid cells
+    even = ((x // cell_size + y // cell_size) % 2 == 0)[:, None]
+    cell_colors = np.where(even, np.asarray(color_even, dtype=np.float32),
+                           np.asarray(color_odd, dtype=np.float32))
+
+    # Two triangles per cell, same corner order as the quad it replaces
+    quad = np.array([(0, 0), (1, 0), (1, 1), (0, 1)], dtype=np.float32)[list(_QUAD_TRIANGLES)]
+    positions = np.zeros((len(x), len(quad), 3), dtype=np.float32)
+    positions[:, :, 0] = x[:, None] + quad[:, 0] * cell_size
+    positions[:, :, 1] = y[:, None] + quad[:, 1] * cell_size
+    corners = len(quad)
+    normals = np.broadcast_to(np.array((0, 0, 1), dtype=np.float32), (len(x) * corners, 3))
+    return interleave(positions.reshape(-1, 3), np.repeat(cell_colors, corners, axis=0), normals)
+
+
+def _grid_triangles(rows, cols):
+    """Vertex indices of two triangles per cell of a (rows+1) x (cols+1) vertex grid."""
+    r, c = np.meshgrid(np.arange(rows), np.arange(cols), indexing='ij')
+    a = (r * (cols + 1) + c).ravel()
+    b = a + 1
+    d = a + cols + 1
+    e = d + 1
+    return np.column_stack((a, d, e, a, e, b)).ravel()
+
+
+def sphere_mesh(slices, stacks, color=(1, 1, 1)):
+    """Unit sphere tessellated like glutSolidSphere: slices around z, stacks along it."""
+    theta = np.linspace(0, np.pi, stacks + 1)[:, None]    # From +z down to -z
+    phi = np.linspace(0, 2 * np.pi, slices + 1)[None, :]
+    points = np.stack((np.sin(theta) * np.cos(phi),
+                       np.sin(theta) * np.sin(phi),
+                       np.cos(theta) * np.ones_like(phi)), axis=-1).reshape(-1, 3)
+    index = _grid_triangles(stacks, slices)
+    positions = points[index]
+    return interleave(positions, np.broadcast_to(np.asarray(color, dtype=np.float32), positions.shape),
+                      positions)
+
+
+def cone_mesh(slices, stacks, color=(1, 1, 1)):
+    """Unit cone like glutSolidCone: base radius 1 on z=0, apex at z=1, with a base disk."""
+    z = np.linspace(0, 1, stacks + 1)[:, None]
+    phi = np.linspace(0, 2 * np.pi, slices + 1)[None, :]
+    radius = 1 - z
+    points = np.stack((radius * np.cos(phi), radius * np.sin(phi), z * np.ones_like(phi)),
+                      axis=-1).reshape(-1, 3)
+    side_normals = np.stack((np.cos(phi), np.sin(phi), np.ones_like(phi)), axis=-1) / np.sqrt(2)
+    side_normals = np.broadcast_to(side_normals, (stacks + 1, slices + 1, 3)).reshape(-1, 3)
+    # Walk the side grid so triangles face outwards
+    index = _grid_triangles(stacks, slices).reshape(-1, 3)[:, ::-1].ravel()
+
+    # Base disk as a fan around the centre, facing -z
+    ring = np.stack((np.cos(phi[0]), np.sin(phi[0]), np.zeros(slices + 1)), axis=-1)
+    fan = np.empty((slices, 3, 3))
+    fan[:, 0] = 0
+    fan[:, 1] = ring[1:]
+    fan[:, 2] = ring[:-1]
+
+    positions = np.concatenate((points[index], fan.reshape(-1, 3)))
+    normals = np.concatenate((side_normals[index], np.tile((0, 0, -1), (slices * 3, 1))))
+    return interleave(positions, np.broadcast_to(np.asarray(color, dtype=np.float32), positions.shape),
+                      normals)
+
+
+def cube_mesh(color=(1, 1, 1)):
+    """Unit cube centred on the origin, like glutSolidCube(1)."""
+    return boxes_mesh([(0, 0, 0)], [(1, 1, 1)], color)
+
+
+def translate(x, y, z):
+    """4x4 translation matrix."""
+    matrix = np.eye(4)
+    matrix[:3, 3] = (x, y, z)
+    return matrix
+
+
+def scale(x, y, z):
+    """4x4 scale matrix."""
+    return np.diag((x, y, z, 1.0))
+
+
+def rotate(angle, x, y, z):
+    """4x4 rotation of angle degrees about an axis, like glRotatef."""
+    axis = np.asarray((x, y, z), dtype=np.float64)
+    axis /= np.linalg.norm(axis)
+    a = np.radians(angle)
+    c, s = np.cos(a), np.sin(a)
+    ux, uy, uz = axis
+    matrix = np.eye(4)
+    matrix[:3, :3] = (c * np.eye(3) + (1 - c) * np.outer(axis, axis)
+                      + s * np.array(((0, -uz, uy), (uz, 0, -ux), (-uy, ux, 0))))
+    return matrix
+
+
+def transform_mesh(vertices, matrix, color=None):
+    """Copy of a mesh with positions and normals transformed by a 4x4 matrix, optionally recoloured."""
+    out = vertices.copy()
+    out[:, 0:3] = vertices[:, 0:3] @ matrix[:3, :3].T + matrix[:3, 3]
+    normals = vertices[:, 6:9] @ np.linalg.inv(matrix[:3, :3])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    out[:, 6:9] = normals / np.where(lengths > 0, lengths, 1)
+    if color is not None:
+        out[:, 3:6] = color
+    return out
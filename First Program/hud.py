@@ -0,0 +1,241 @@
+"""Batched 2D HUD: cached glyph-atlas text and solid bars in one draw call.
+
+The GLUT bitmap fonts are rasterized once into a texture atlas (rendered
+with glutBitmapCharacter into a framebuffer object). Each HUD string or bar
+is turned into textured quads only when it changes; the whole HUD is then
+drawn in a single orthographic pass with one glDrawArrays call. Solid bars
+sample a white cell in the same atlas so they share that call.
+"""
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GLU import gluOrtho2D
+from OpenGL.GLUT import (GLUT_BITMAP_HELVETICA_18, GLUT_BITMAP_TIMES_ROMAN_24,
+                         glutBitmapCharacter, glutBitmapWidth)
+from OpenGL.GL.framebufferobjects import (
+    GL_COLOR_ATTACHMENT0, GL_FRAMEBUFFER, checkFramebufferStatus,
+    glBindFramebuffer, glDeleteFramebuffers, glFramebufferTexture2D,
+    glGenFramebuffers,
+)
+from OpenGL.arrays.vbo import VBO
+
+# HUD coordinate system (matches the old gluOrtho2D(0, 1000, 0, 800) text pass)
+HUD_W, HUD_H = 1000, 800
+
+# Fonts, by index into the atlas
+FONT_NORMAL = 0
+FONT_TITLE = 1
+FONTS = (GLUT_BITMAP_HELVETICA_18, GLUT_BITMAP_TIMES_ROMAN_24)
+
+# Atlas layout: 32x32 pixel cells, 16 per row, one band of rows per font
+ATLAS_SIZE = 512
+CELL = 32
+COLUMNS = ATLAS_SIZE // CELL
+FIRST_CHAR, LAST_CHAR = 32, 126
+ROWS_PER_FONT = -(-(LAST_CHAR - FIRST_CHAR + 1) // COLUMNS)
+GLYPH_ORIGIN = (2, 8)  # Pen position inside a cell: left margin, room for descenders
+WHITE_CELL = len(FONTS) * ROWS_PER_FONT * COLUMNS  # Solid cell used for bars
+
+# Each vertex: x, y, u, v, r, g, b, a
+HUD_VERTEX_FLOATS = 8
+HUD_VERTEX_STRIDE = HUD_VERTEX_FLOATS * 4
+
+
+def _cell_origin(index):
+    """Pixel position of an atlas cell's lower-left corner."""
+    return (index % COLUMNS) * CELL, (index // COLUMNS) * CELL
+
+
+def _cell_quads(cells, xs, ys, widths, heights, color):
+    """Textured quads (4 vertices each) drawing atlas cells at the given HUD rectangles."""
+    n = len(cells)
+    cells = np.asarray(cells)
+    u0 = (cells % COLUMNS) * CELL / ATLAS_SIZE
+    v0 = (cells // COLUMNS) * CELL / ATLAS_SIZE
+    du = dv = CELL / ATLAS_SIZE
+
+    vertices = np.empty((n, 4, HUD_VERTEX_FLOATS), dtype=np.float32)
+    corners = ((0, 0), (1, 0), (1, 1), (0, 1))
+    for k, (cx, cy) in enumerate(corners):
+        vertices[:, k, 0] = np.asarray(xs) + cx * np.asarray(widths)
+        vertices[:, k, 1] = np.asarray(ys) + cy * np.asarray(heights)
+        vertices[:, k, 2] = u0 + cx * du
+        vertices[:, k, 3] = v0 + cy * dv
+    vertices[:, :, 4:8] = color
+    return vertices.reshape(-1, HUD_VERTEX_FLOATS)
+
+
+class HudRenderer:
+    """Collects HUD text and bars each frame and draws them in one batch."""
+
+    def __init__(self):
+        self.texture = None
+        self.advances = None  # advances[font][code] = pen advance in pixels
+        self.vbo = None
+        self.vertex_count = 0
+
+        self._cache = {}      # element key -> vertices
+        self._frame = []      # element keys submitted this frame, in order
+        self._drawn = None    # element keys currently uploaded to the VBO
+
+    def _build_atlas(self):
+        """Rasterize every printable ASCII glyph of each font into the atlas texture."""
+        self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, ATLAS_SIZE, ATLAS_SIZE, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+        fbo = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, fbo)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, self.texture, 0)
+        checkFramebufferStatus()
+
+        glPushAttrib(GL_ENABLE_BIT | GL_VIEWPORT_BIT | GL_COLOR_BUFFER_BIT | GL_CURRENT_BIT)
+        glViewport(0, 0, ATLAS_SIZE, ATLAS_SIZE)
+        glDisable(GL_SCISSOR_TEST)
+        glDisable(GL_LIGHTING)
+        glDisable(GL_DEPTH_TEST)
+        glDisable(GL_BLEND)
+        glDisable(GL_TEXTURE_2D)
+        glClearColor(0, 0, 0, 0)
+        glClear(GL_COLOR_BUFFER_BIT)
+
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        gluOrtho2D(0, ATLAS_SIZE, 0, ATLAS_SIZE)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+
+        glColor4f(1, 1, 1, 1)
+        self.advances = []
+        for font_index, font in enumerate(FONTS):
+            advances = {}
+            for code in range(FIRST_CHAR, LAST_CHAR + 1):
+                x, y = _cell_origin(self._glyph_cell(font_index, code))
+                glRasterPos2i(x + GLYPH_ORIGIN[0], y + GLYPH_ORIGIN[1])
+                glutBitmapCharacter(font, code)
+                advances[code] = glutBitmapWidth(font, code)
+            self.advances.append(advances)
+
+        # Solid white cell for bars
+        x, y = _cell_origin(WHITE_CELL)
+        glRecti(x, y, x + CELL, y + CELL)
+
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glPopAttrib()
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glDeleteFramebuffers(1, [fbo])
+
+    @staticmethod
+    def _glyph_cell(font_index, code):
+        return font_index * ROWS_PER_FONT * COLUMNS + (code - FIRST_CHAR)
+
+    def text(self, x, y, text, font=FONT_NORMAL, color=(1, 1, 1, 1)):
+        """Queue a string with its baseline starting at HUD position (x, y)."""
+        self._frame.append(('text', x, y, text, font, tuple(color)))
+
+    def rect(self, x, y, width, height, color):
+        """Queue a solid rectangle with its lower-left corner at (x, y)."""
+        self._frame.append(('rect', x, y, width, height, tuple(color)))
+
+    def _vertices(self, key):
+        """Vertices for one element, built the first time it is seen."""
+        vertices = self._cache.get(key)
+        if vertices is not None:
+            return vertices
+
+        if key[0] == 'text':
+            _, x, y, text, font, color = key
+            advances = self.advances[font]
+            cells, xs = [], []
+            pen = x
+            for ch in text:
+                code = ord(ch)
+                if code not in advances:
+                    code = ord('?')
+                if ch != ' ':
+                    cells.append(self._glyph_cell(font, code))
+                    xs.append(pen - GLYPH_ORIGIN[0])
+                pen += advances[code]
+            vertices = _cell_quads(cells, xs, [y - GLYPH_ORIGIN[1]] * len(cells),
+                                   [CELL] * len(cells), [CELL] * len(cells), color)
+        else:
+            _, x, y, width, height, color = key
+            # Sample the middle of the white cell so edges never bleed
+            vertices = _cell_quads([WHITE_CELL], [x], [y], [width], [height], color)
+            vertices[:, 2:4] = (np.array(_cell_origin(WHITE_CELL), dtype=np.float32) + CELL / 2) / ATLAS_SIZE
+
+        self._cache[key] = vertices
+        return vertices
+
+    def draw(self):
+        """Draw everything queued this frame in one orthographic pass, then reset the queue."""
+        if self.texture is None:
+            self._build_atlas()
+
+        frame, self._frame = self._frame, []
+        if frame != self._drawn:
+            # Something changed: rebuild the batch from cached per-element vertices
+            parts = [self._vertices(key) for key in frame]
+            vertices = (np.concatenate(parts) if parts
+                        else np.zeros((0, HUD_VERTEX_FLOATS), dtype=np.float32))
+            if self.vbo is None:
+                self.vbo = VBO(vertices)
+            else:
+                self.vbo.set_array(vertices)
+            self.vertex_count = len(vertices)
+            self._drawn = frame
+
+            # Drop cached elements that are no longer on screen (old timer values etc.)
+            live = set(frame)
+            for key in [key for key in self._cache if key not in live]:
+                del self._cache[key]
+
+        if not self.vertex_count:
+            return
+
+        glPushAttrib(GL_ENABLE_BIT | GL_COLOR_BUFFER_BIT | GL_TEXTURE_BIT)
+        glDisable(GL_LIGHTING)
+        glDisable(GL_DEPTH_TEST)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glEnable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexEnvi(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_MODULATE)
+
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        gluOrtho2D(0, HUD_W, 0, HUD_H)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+
+        self.vbo.bind()
+        try:
+            glEnableClientState(GL_VERTEX_ARRAY)
+            glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+            glEnableClientState(GL_COLOR_ARRAY)
+            glVertexPointer(2, GL_FLOAT, HUD_VERTEX_STRIDE, self.vbo)
+            glTexCoordPointer(2, GL_FLOAT, HUD_VERTEX_STRIDE, self.vbo + 8)
+            glColorPointer(4, GL_FLOAT, HUD_VERTEX_STRIDE, self.vbo + 16)
+            glDrawArrays(GL_QUADS, 0, self.vertex_count)
+        finally:
+            glDisableClientState(GL_COLOR_ARRAY)
+            glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+            glDisableClientState(GL_VERTEX_ARRAY)
+            self.vbo.unbind()
+
+        # Restore matrices
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glPopAttrib()
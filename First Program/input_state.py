@@ -0,0 +1,46 @@
+"""Held-key input state, sampled once per simulation tick."""
+import math
+
+# Movement keys and the (forward, strafe-left) axis each one drives
+MOVEMENT_KEYS = {
+    b'w': (1, 0),
+    b's': (-1, 0),
+    b'a': (0, 1),
+    b'd': (0, -1),
+}
+
+
+class InputState:
+    """Which keys are currently down, as reported by key-down/key-up callbacks."""
+
+    def __init__(self):
+        self.held = set()
+        self.shift = False
+
+    def press(self, key):
+        """Record a key going down (keys are lower-cased bytes, as GLUT delivers them)."""
+        self.held.add(key)
+
+    def release(self, key):
+        """Record a key coming back up."""
+        self.held.discard(key)
+
+    def clear(self):
+        """Forget every held key, e.g. when the window is left or hidden, or a game starts."""
+        self.held.clear()
+        self.shift = False
+
+    def move_axes(self):
+        """Unit (forward, strafe-left) vector from the held movement keys, or (0, 0)."""
+        forward = strafe = 0
+        for key in self.held:
+            axis = MOVEMENT_KEYS.get(key)
+            if axis:
+                forward += axis[0]
+                strafe += axis[1]
+
+        # Diagonals are normalised so W+A isn't faster than W alone
+        length = math.hypot(forward, strafe)
+        if length == 0:
+            return 0.0, 0.0
+        return forward / length, strafe / length
@@ -0,0 +1,81 @@
+"""Distance-based level of detail for the tessellated entity models.
+
+Each curved primitive (sphere, cone) is pre-tessellated at LOD_LEVELS
+detail levels, halving its slices and stacks per level. A level's
+geometric error is the largest gap between the true surface and its
+triangles (the sagitta of one facet), in world units. Projected at
+distance d it covers error * pixels_per_unit / d pixels on screen; an
+entity is drawn with the coarsest level whose error stays under
+LOD_PIXEL_ERROR pixels.
+
+Hysteresis keeps entities near a threshold from flickering between
+levels: an entity only switches to a coarser level once that level's
+error is a LOD_HYSTERESIS fraction below the threshold, and only goes
+back to a finer one once its current error exceeds the threshold itself.
+"""
+import math
+
+import numpy as np
+
+LOD_LEVELS = 3           # Detail levels per model: full, half and quarter tessellation
+LOD_PIXEL_ERROR = 3.0    # Largest on-screen geometric error allowed, in pixels
+LOD_HYSTERESIS = 0.2     # Coarsening needs this much headroom below the error threshold
+MIN_SLICES = 4           # Coarsest tessellation around a sphere or cone
+MIN_STACKS = 2           # ... and along it
+
+
+def lod_tessellation(kind, slices, stacks, level):
+    """(slices, stacks) for a primitive at a detail level (cubes have only one)."""
+    if kind == 'cube' or level == 0:
+        return slices, stacks
+    return (max(min(slices, MIN_SLICES), slices >> level),
+            max(min(stacks, MIN_STACKS), stacks >> level))
+
+
+def tessellation_error(kind, slices, stacks):
+    """Largest distance between a unit primitive and its tessellated surface."""
+    if kind == 'cube':
+        return 0.0
+    around = 1 - math.cos(math.pi / slices)                 # Facet sagitta around the axis
+    if kind == 'sphere':
+        return max(around, 1 - math.cos(math.pi / (2 * stacks)))
+    return around                                           # Cone sides are straight lines
+
+
+def pixels_per_unit(fovy, viewport_height):
+    """On-screen pixels covered by one world unit at distance 1 under a perspective projection."""
+    return viewport_height / (2 * math.tan(math.radians(fovy) / 2))
+
+
+class LodSelector:
+    """Per-entity detail levels with hysteresis, kept separately for each category of entity."""
+
+    def __init__(self, pixels_per_unit, max_error=LOD_PIXEL_ERROR, hysteresis=LOD_HYSTERESIS):
+        self.pixels_per_unit = pixels_per_unit
+        self.max_error = max_error
+        self.hysteresis = hysteresis
+        self.levels = {}  # category -> level per entity from the previous frame
+
+    def select(self, category, errors, positions, eye):
+        """Detail level per entity for a model with per-level world errors `errors`.
+
+        positions is (n, 3); eye is the camera position. A category's
+        history is dropped when its entity count changes, since indices no
+        longer refer to the same entities.
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        distance = np.maximum(np.linalg.norm(positions - eye, axis=1), 1e-6)
+        pixels = np.asarray(errors, dtype=np.float64)[None, :] * (self.pixels_per_unit / distance)[:, None]
+
+        # Errors grow with the level, so the acceptable levels are a prefix
+        coarsest = np.maximum((pixels <= self.max_error).sum(axis=1) - 1, 0)
+        coarsest_with_margin = np.maximum((pixels <= self.max_error * (1 - self.hysteresis)).sum(axis=1) - 1, 0)
+
+        previous = self.levels.get(category)
+        if previous is None or len(previous) != len(positions):
+            levels = coarsest
+        else:
+            # Keep the last level while it lies between the two bounds
+            levels = np.clip(previous, coarsest_with_margin, coarsest)
+        self.levels[category] = levels
+        return levels
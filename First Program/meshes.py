@@ -0,0 +1,237 @@
+"""Shared mesh library and instanced drawing for dynamic entities.
+
+Primitive tessellations are generated once per (type, slices, stacks) and
+composed into entity models (monster, treasure chest, player) that each
+live in their own VBO. Per-entity position, heading and colour go into a
+per-instance attribute buffer, so every copy of a model is drawn with a
+single glDrawArraysInstanced call however many there are. Models are
+also baked at coarser detail levels (see lod.py) for distant instances.
+"""
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GL import shaders
+from OpenGL.arrays.vbo import VBO
+
+from geometry import (COLOR_OFFSET, NORMAL_OFFSET, VERTEX_STRIDE, cone_mesh,
+                      cube_mesh, rotate, scale, sphere_mesh, transform_mesh,
+                      translate)
+from lod import LOD_LEVELS, lod_tessellation, tessellation_error
+from simulation import PLAYER_SIZE
+
+# Per-instance attributes: x, y, z, heading (degrees), then an RGBA tint
+INSTANCE_FLOATS = 8
+INSTANCE_STRIDE = INSTANCE_FLOATS * 4
+
+# Entity models as (primitive, slices, stacks), local transform, colour parts,
+# mirroring the glutSolid* calls they replace
+MODELS = {
+    'monster': (
+        (('sphere', 10, 10), scale(25, 25, 25), (0.7, 0.0, 0.0)),                      # Body
+        (('sphere', 8, 8), translate(15, 10, 10) @ scale(5, 5, 5), (1.0, 1.0, 0.0)),   # Eyes
+        (('sphere', 8, 8), translate(15, -10, 10) @ scale(5, 5, 5), (1.0, 1.0, 0.0)),
+        (('cone', 4, 1), translate(22, 0, -5) @ rotate(90, 0, 1, 0) @ scale(10, 10, 10),
+         (1.0, 1.0, 1.0)),                                                              # Teeth
+    ),
+    'chest_closed': (
+        (('cube', 0, 0), scale(20, 15, 10), (0.8, 0.6, 0.2)),                          # Gold base
+        (('cube', 0, 0), translate(0, 0, 10) @ scale(20, 15, 5), (0.7, 0.5, 0.2)),     # Lid
+    ),
+    'chest_open': (
+        (('cube', 0, 0), scale(20, 15, 10), (0.3, 0.2, 0.1)),                          # Dark brown base
+        (('cube', 0, 0), translate(-5, 0, 10) @ rotate(120, 0, 1, 0) @ scale(20, 15, 5),
+         (0.7, 0.5, 0.2)),                                                              # Open lid
+    ),
+    'chest_shine': (
+        (('sphere', 8, 8), translate(0, 0, 30) @ scale(8, 8, 8), (1.0, 1.0, 0.6)),
+    ),
+    'player': (
+        (('sphere', 12, 12), scale(PLAYER_SIZE/2, PLAYER_SIZE/2, PLAYER_SIZE/2), (0.2, 0.4, 0.8)),
+        (('sphere', 8, 8), translate(PLAYER_SIZE/2, 0, 0) @ scale(PLAYER_SIZE/5, PLAYER_SIZE/5, PLAYER_SIZE/5),
+         (1.0, 0.0, 0.0)),                                                              # Nose
+    ),
+    'player_hidden': (
+        (('sphere', 12, 12), scale(PLAYER_SIZE/2, PLAYER_SIZE/2, PLAYER_SIZE/2), (0.3, 0.5, 0.8)),
+        (('sphere', 8, 8), translate(PLAYER_SIZE/2, 0, 0) @ scale(PLAYER_SIZE/5, PLAYER_SIZE/5, PLAYER_SIZE/5),
+         (1.0, 0.0, 0.0)),
+    ),
+}
+
+# Vertex shader: place each instance, then light it like the fixed-function
+# pipeline does with GL_COLOR_MATERIAL and LIGHT0
+VERTEX_SHADER = """
+#version 130
+in vec3 position;
+in vec3 color;
+in vec3 normal;
+in vec4 instance_pose;
+in vec4 instance_color;
+uniform bool lighting;
+out vec4 frag_color;
+
+void main() {
+    float a = radians(instance_pose.w);
+    mat2 rot = mat2(cos(a), sin(a), -sin(a), cos(a));
+    vec3 world = vec3(rot * position.xy, position.z) + instance_pose.xyz;
+    vec3 world_normal = vec3(rot * normal.xy, normal.z);
+
+    vec4 eye = gl_ModelViewMatrix * vec4(world, 1.0);
+    gl_Position = gl_ProjectionMatrix * eye;
+
+    vec4 base = vec4(color, 1.0) * instance_color;
+    if (lighting) {
+        vec3 n = normalize(gl_NormalMatrix * world_normal);
+        vec3 l = normalize(gl_LightSource[0].position.xyz - eye.xyz);
+        vec3 light = gl_LightModel.ambient.rgb + gl_LightSource[0].diffuse.rgb * max(dot(n, l), 0.0);
+        frag_color = vec4(min(base.rgb * light, vec3(1.0)), base.a);
+    } else {
+        frag_color = base;
+    }
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 130
+in vec4 frag_color;
+
+void main() {
+    gl_FragColor = frag_color;
+}
+"""
+
+ATTRIBUTES = ('position', 'color', 'normal', 'instance_pose', 'instance_color')
+
+
+class MeshLibrary:
+    """Tessellates each primitive once and bakes entity models into VBOs on first use."""
+
+    def __init__(self):
+        self._primitives = {}
+        self._models = {}
+        self._radii = {}
+        self._errors = {}
+
+    def primitive(self, kind, slices, stacks):
+        """Unit primitive vertices, cached per (type, slices, stacks)."""
+        key = (kind, slices, stacks)
+        mesh = self._primitives.get(key)
+        if mesh is None:
+            if kind == 'sphere':
+                mesh = sphere_mesh(slices, stacks)
+            elif kind == 'cone':
+                mesh = cone_mesh(slices, stacks)
+            else:
+                mesh = cube_mesh()
+            self._primitives[key] = mesh
+        return mesh
+
+    def model_vertices(self, name, level=0):
+        """All parts of an entity model at a detail level, transformed and coloured into one vertex array."""
+        return np.concatenate([transform_mesh(self.primitive(kind, *lod_tessellation(kind, slices, stacks, level)),
+                                              matrix, color)
+                               for (kind, slices, stacks), matrix, color in MODELS[name]])
+
+    def lod_errors(self, name):
+        """World-space geometric error of each detail level of a model (its parts' worst)."""
+        errors = self._errors.get(name)
+        if errors is None:
+            errors = np.zeros(LOD_LEVELS)
+            for (kind, slices, stacks), matrix, _ in MODELS[name]:
+                part_scale = np.linalg.norm(matrix[:3, :3], axis=0).max()
+                for level in range(LOD_LEVELS):
+                    error = tessellation_error(kind, *lod_tessellation(kind, slices, stacks, level))
+                    errors[level] = max(errors[level], error * part_scale)
+            self._errors[name] = errors
+        return errors
+
+    def bounding_radius(self, name):
+        """Radius around the model origin that encloses it at any heading (for culling)."""
+        radius = self._radii.get(name)
+        if radius is None:
+            radius = self._radii[name] = float(np.linalg.norm(self.model_vertices(name)[:, 0:3], axis=1).max())
+        return radius
+
+    def model(self, name, level=0):
+        """(VBO, vertex count) for an entity model at a detail level, built the first time it is asked for."""
+        entry = self._models.get((name, level))
+        if entry is None:
+            vertices = self.model_vertices(name, level)
+            entry = (VBO(vertices), len(vertices))
+            self._models[(name, level)] = entry
+        return entry
+
+
+class EntityRenderer:
+    """Draws every instance of a model with one instanced draw call."""
+
+    def __init__(self, library=None):
+        self.library = library or MeshLibrary()
+        self.program = None
+        self.locations = {}
+        self.instance_vbo = None
+        # Triangles submitted since reset_stats(), and what they would have been at full detail
+        self.triangles = 0
+        self.full_detail_triangles = 0
+
+    def reset_stats(self):
+        self.triangles = 0
+        self.full_detail_triangles = 0
+
+    def _build_program(self):
+        self.program = shaders.compileProgram(
+            shaders.compileShader(VERTEX_SHADER, GL_VERTEX_SHADER),
+            shaders.compileShader(FRAGMENT_SHADER, GL_FRAGMENT_SHADER),
+        )
+        self.locations = {name: glGetAttribLocation(self.program, name) for name in ATTRIBUTES}
+        self.lighting_location = glGetUniformLocation(self.program, 'lighting')
+        self.instance_vbo = VBO(np.zeros((1, INSTANCE_FLOATS), dtype=np.float32), usage=GL_STREAM_DRAW)
+
+    def draw_levels(self, name, poses, levels, tint=(1, 1, 1, 1)):
+        """Draw each row of poses at its own detail level, one instanced call per level used."""
+        poses = np.asarray(poses, dtype=np.float32).reshape(-1, 4)
+        for level in np.unique(levels).tolist():
+            self.draw(name, poses[levels == level], tint, level)
+
+    def draw(self, name, poses, tint=(1, 1, 1, 1), level=0):
+        """Draw model `name` once per row of poses (x, y, z, heading); tint is RGBA or one per row."""
+        poses = np.asarray(poses, dtype=np.float32).reshape(-1, 4)
+        if not len(poses):
+            return
+        if self.program is None:
+            self._build_program()
+
+        instances = np.empty((len(poses), INSTANCE_FLOATS), dtype=np.float32)
+        instances[:, 0:4] = poses
+        instances[:, 4:8] = tint
+        self.instance_vbo.set_array(instances)
+
+        model_vbo, vertex_count = self.library.model(name, level)
+        self.triangles += vertex_count // 3 * len(poses)
+        self.full_detail_triangles += self.library.model(name)[1] // 3 * len(poses)
+        loc = self.locations
+
+        glUseProgram(self.program)
+        glUniform1i(self.lighting_location, int(glIsEnabled(GL_LIGHTING)))
+        try:
+            # Per-vertex attributes from the model
+            model_vbo.bind()
+            for attribute, offset in (('position', 0), ('color', COLOR_OFFSET), ('normal', NORMAL_OFFSET)):
+                glEnableVertexAttribArray(loc[attribute])
+                glVertexAttribPointer(loc[attribute], 3, GL_FLOAT, GL_FALSE, VERTEX_STRIDE, model_vbo + offset)
+
+            # Per-instance attributes advance once per instance
+            self.instance_vbo.bind()
+            for attribute, offset in (('instance_pose', 0), ('instance_color', 16)):
+                glEnableVertexAttribArray(loc[attribute])
+                glVertexAttribPointer(loc[attribute], 4, GL_FLOAT, GL_FALSE, INSTANCE_STRIDE,
+                                      self.instance_vbo + offset)
+                glVertexAttribDivisor(loc[attribute], 1)
+
+            glDrawArraysInstanced(GL_TRIANGLES, 0, vertex_count, len(instances))
+        finally:
+            for attribute in ('instance_pose', 'instance_color'):
+                glVertexAttribDivisor(loc[attribute], 0)
+            for attribute in ATTRIBUTES:
+                glDisableVertexAttribArray(loc[attribute])
+            self.instance_vbo.unbind()
+            model_vbo.unbind()
+            glUseProgram(0)
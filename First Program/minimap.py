@@ -0,0 +1,222 @@
+"""Top-down minimap with the static level cached in an offscreen texture.
+
+The floor, boundary and obstacles are rendered once per level into a
+framebuffer-object texture covering the whole map. Each frame the minimap
+only draws that texture as one quad, then the player, monsters and
+treasures as point sprites. The marker positions are resampled at a
+configurable rate (10 Hz by default) rather than every frame.
+"""
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GLU import gluLookAt
+from OpenGL.GL.framebufferobjects import (
+    GL_COLOR_ATTACHMENT0, GL_DEPTH_ATTACHMENT, GL_FRAMEBUFFER, GL_RENDERBUFFER,
+    checkFramebufferStatus, glBindFramebuffer, glBindRenderbuffer,
+    glFramebufferRenderbuffer, glFramebufferTexture2D, glGenFramebuffers,
+    glGenRenderbuffers, glRenderbufferStorage,
+)
+
+from frustum import CullStats, Frustum
+from scene_cache import BOUNDARY_THICKNESS
+
+# Size of minimap in pixels
+MINIMAP_W, MINIMAP_H = 200, 200
+STATIC_TEXTURE_SIZE = 512
+VIEW_HALF_EXTENT = 800   # World units shown either side of the player (old 90° FOV from z=800)
+REFRESH_HZ = 10          # Marker refresh rate
+BACKGROUND_COLOR = (0.1, 0.1, 0.15, 1.0)
+
+PLAYER_COLOR = (0.2, 0.4, 0.8)
+MONSTER_COLOR = (0.7, 0.0, 0.0)
+TREASURE_COLOR = (0.8, 0.6, 0.2)   # Gold
+COLLECTED_COLOR = (0.3, 0.2, 0.1)  # Dark brown
+PLAYER_MARKER_SIZE = 8
+MONSTER_MARKER_SIZE = 7
+TREASURE_MARKER_SIZE = 6
+
+
+class Minimap:
+    """Minimap renderer for the lower-right corner of the window."""
+
+    def __init__(self, window_w, window_h, refresh_hz=REFRESH_HZ):
+        self.window_w = window_w
+        self.window_h = window_h
+        self.refresh_interval = 1.0 / refresh_hz
+
+        self.fbo = None
+        self.texture = None
+        self.depth_buffer = None
+        self.map_area = (0, 0, 0)  # Centre x, y and half extent the static texture covers
+        self.level_id = None
+
+        # Marker layers: name -> (positions, colors, point size)
+        self.markers = {}
+        self.center = (0.0, 0.0)
+        self._last_refresh = None
+        self.cull_stats = CullStats()  # Markers kept vs. culled at the last refresh
+
+    def _create_target(self):
+        """Allocate the offscreen colour texture and depth buffer."""
+        size = STATIC_TEXTURE_SIZE
+        self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, size, size, 0, GL_RGB, GL_UNSIGNED_BYTE, None)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+        self.depth_buffer = glGenRenderbuffers(1)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.depth_buffer)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, size, size)
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+
+        self.fbo = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, self.texture, 0)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, self.depth_buffer)
+        checkFramebufferStatus()
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+
+    def _render_static(self, sim, static_scene):
+        """Render the whole level top-down, unlit, into the texture."""
+        if self.fbo is None:
+            self._create_target()
+        cx, cy, half = sim.area
+        self.map_area = cx, cy, extent = cx, cy, half + BOUNDARY_THICKNESS
+
+        glPushAttrib(GL_ENABLE_BIT | GL_VIEWPORT_BIT | GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glViewport(0, 0, STATIC_TEXTURE_SIZE, STATIC_TEXTURE_SIZE)
+        glDisable(GL_SCISSOR_TEST)
+        glDisable(GL_LIGHTING)
+        glDisable(GL_BLEND)
+        glEnable(GL_DEPTH_TEST)
+        glClearColor(*BACKGROUND_COLOR)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        glOrtho(cx - extent, cx + extent, cy - extent, cy + extent, -1000, 1000)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+
+        static_scene.draw()
+
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glPopAttrib()
+
+    def sync(self, sim, static_scene):
+        """Re-render the static layer on a new level; resample markers when due."""
+        if self.level_id != sim.level_id:
+            self._render_static(sim, static_scene)
+            self.level_id = sim.level_id
+            self._last_refresh = None
+
+        if self._last_refresh is None or sim.time - self._last_refresh >= self.refresh_interval:
+            self._refresh_markers(sim)
+            self._last_refresh = sim.time
+
+    def _refresh_markers(self, sim):
+        """Snapshot player, monster and treasure positions into point arrays."""
+        px, py = sim.player_pos[0], sim.player_pos[1]
+        self.center = (px, py)
+
+        treasures = np.asarray([(x, y) for x, y, _ in sim.treasures], dtype=np.float32).reshape(-1, 2)
+        collected = np.asarray([c for _, _, c in sim.treasures], dtype=bool)[:, None]
+        treasure_colors = np.where(collected, np.array(COLLECTED_COLOR, dtype=np.float32),
+                                   np.array(TREASURE_COLOR, dtype=np.float32))
+
+        monsters = np.column_stack((sim.monsters.x, sim.monsters.y)).astype(np.float32)
+        monster_colors = np.broadcast_to(np.array(MONSTER_COLOR, dtype=np.float32), (len(monsters), 3))
+
+        markers = {
+            'treasures': (treasures, np.ascontiguousarray(treasure_colors, dtype=np.float32), TREASURE_MARKER_SIZE),
+            'monsters': (monsters, np.ascontiguousarray(monster_colors), MONSTER_MARKER_SIZE),
+            'player': (np.array([[px, py]], dtype=np.float32), np.array([PLAYER_COLOR], dtype=np.float32),
+                       PLAYER_MARKER_SIZE),
+        }
+
+        # Keep only markers inside the minimap's own (orthographic) view, grown by the sprite size
+        frustum = self.frustum()
+        self.cull_stats.reset()
+        self.markers = {}
+        for name, (positions, colors, size) in markers.items():
+            radius = size / 2 * (2 * VIEW_HALF_EXTENT / MINIMAP_W)
+            centers = np.column_stack((positions, np.zeros(len(positions))))
+            visible = frustum.spheres_visible(centers, radius)
+            self.cull_stats.add(name, visible)
+            self.markers[name] = (np.ascontiguousarray(positions[visible]),
+                                  np.ascontiguousarray(colors[visible]), size)
+
+    def frustum(self):
+        """Culling frustum of the camera draw() sets up."""
+        cx, cy = self.center
+        extent = VIEW_HALF_EXTENT
+        return Frustum.ortho(-extent, extent, -extent, extent, 0, 2, (cx, cy, 1), (cx, cy, 0), (1, 0, 0))
+
+    def draw(self):
+        """Composite the cached static texture and the marker sprites into the corner viewport."""
+        x0 = self.window_w - MINIMAP_W
+        glViewport(x0, 0, MINIMAP_W, MINIMAP_H)
+        glPushAttrib(GL_ENABLE_BIT | GL_POINT_BIT | GL_COLOR_BUFFER_BIT)
+        glEnable(GL_SCISSOR_TEST)
+        glScissor(x0, 0, MINIMAP_W, MINIMAP_H)
+        glClearColor(*BACKGROUND_COLOR)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glDisable(GL_LIGHTING)
+        glDisable(GL_DEPTH_TEST)
+
+        # Orthographic camera straight above the player, +x pointing up as before
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        glOrtho(-VIEW_HALF_EXTENT, VIEW_HALF_EXTENT, -VIEW_HALF_EXTENT, VIEW_HALF_EXTENT, 0, 2)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+        cx, cy = self.center
+        gluLookAt(cx, cy, 1, cx, cy, 0, 1, 0, 0)
+
+        # Static layer: one textured quad over the whole map (or the loaded chunks)
+        mx, my, extent = self.map_area
+        glEnable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glColor3f(1, 1, 1)
+        glBegin(GL_QUADS)
+        glTexCoord2f(0, 0); glVertex2f(mx - extent, my - extent)
+        glTexCoord2f(1, 0); glVertex2f(mx + extent, my - extent)
+        glTexCoord2f(1, 1); glVertex2f(mx + extent, my + extent)
+        glTexCoord2f(0, 1); glVertex2f(mx - extent, my + extent)
+        glEnd()
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glDisable(GL_TEXTURE_2D)
+
+        # Dynamic layer: one point-sprite batch per marker type
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        for positions, colors, size in self.markers.values():
+            if not len(positions):
+                continue
+            glPointSize(size)
+            glVertexPointer(2, GL_FLOAT, 0, positions)
+            glColorPointer(3, GL_FLOAT, 0, colors)
+            glDrawArrays(GL_POINTS, 0, len(positions))
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+        # Restore matrices & state
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glPopAttrib()
+        # Finally reset viewport back to full window
+        glViewport(0, 0, self.window_w, self.window_h)
@@ -0,0 +1,202 @@
+"""Struct-of-arrays monster store with batched NumPy kinematics."""
+import math
+
+import numpy as np
+
+ARRIVE_DISTANCE = 10    # Distance at which a patrol point counts as reached
+CHASE_RADIUS = 200      # Monsters chase a visible player inside this radius
+CHASE_MULTIPLIER = 1.5  # Chasing monsters move faster than patrolling ones
+SCALAR_MONSTERS = 32    # Stores up to this size update in plain Python; NumPy call overhead dominates below it
+
+
+class MonsterStore:
+    """All monsters as parallel arrays; patrol routes packed flat with offsets.
+
+    Monster i patrols points patrol_x/patrol_y[offsets[i]:offsets[i+1]] and
+    is currently heading for the target[i]-th of them.
+    """
+
+    def __init__(self, x, y, direction, speed, target, offsets, patrol_x, patrol_y):
+        self.x = x
+        self.y = y
+        self.direction = direction  # Heading in degrees
+        self.speed = speed
+        self.target = target
+        self.offsets = offsets
+        self.patrol_x = patrol_x
+        self.patrol_y = patrol_y
+        self.route_length = np.diff(offsets)
+        self.max_speed = float(speed.max()) if len(speed) else 0.0  # Farthest a patrol step can go
+        self._static_lists = None  # Routes and speeds as Python lists, for the scalar update
+
+    @classmethod
+    def from_routes(cls, routes, speeds):
+        """Build a store from per-monster patrol point lists; each starts on its first point."""
+        n = len(routes)
+        lengths = np.fromiter((len(route) for route in routes), dtype=np.int64, count=n)
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        points = np.array([p for route in routes for p in route], dtype=np.float64).reshape(-1, 2)
+        patrol_x = np.ascontiguousarray(points[:, 0])
+        patrol_y = np.ascontiguousarray(points[:, 1])
+
+        start = offsets[:-1]
+        return cls(
+            x=patrol_x[start],
+            y=patrol_y[start],
+            direction=np.zeros(n),
+            speed=np.asarray(speeds, dtype=np.float64),
+            target=np.zeros(n, dtype=np.int64),
+            offsets=offsets,
+            patrol_x=patrol_x,
+            patrol_y=patrol_y,
+        )
+
+    @classmethod
+    def concatenate(cls, stores):
+        """One store holding the monsters of several stores, in order."""
+        stores = list(stores)
+        if not stores:
+            return cls.from_routes([], [])
+        patrol_starts = np.cumsum([0] + [len(store.patrol_x) for store in stores[:-1]])
+        offsets = np.concatenate([store.offsets[:-1] + start for store, start in zip(stores, patrol_starts)]
+                                 + [[patrol_starts[-1] + len(stores[-1].patrol_x)]]).astype(np.int64)
+
+        def joined(name):
+            return np.concatenate([getattr(store, name) for store in stores])
+        return cls(joined('x'), joined('y'), joined('direction'), joined('speed'), joined('target'),
+                   offsets, joined('patrol_x'), joined('patrol_y'))
+
+    def slice(self, start, stop):
+        """A new store with monsters start..stop-1 and their patrol routes."""
+        a, b = self.offsets[start], self.offsets[stop]
+        return MonsterStore(self.x[start:stop].copy(), self.y[start:stop].copy(),
+                            self.direction[start:stop].copy(), self.speed[start:stop].copy(),
+                            self.target[start:stop].copy(), self.offsets[start:stop + 1] - a,
+                            self.patrol_x[a:b].copy(), self.patrol_y[a:b].copy())
+
+    @property
+    def nbytes(self):
+        """Bytes held by the store's arrays."""
+        return sum(array.nbytes for array in (self.x, self.y, self.direction, self.speed, self.target,
+                                              self.offsets, self.patrol_x, self.patrol_y))
+
+    def __len__(self):
+        return len(self.x)
+
+    def poses(self):
+        """Iterate (x, y, direction) tuples, for drawing."""
+        return zip(self.x.tolist(), self.y.tolist(), self.direction.tolist())
+
+    def routes(self):
+        """Patrol routes as a list of [[px, py], ...] lists."""
+        return [np.column_stack((self.patrol_x[a:b], self.patrol_y[a:b])).tolist()
+                for a, b in zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist())]
+
+    def update(self, player_x, player_y, player_hidden, flow_field=None, nearby=None):
+        """Advance every monster one tick: patrol, then chase a visible nearby player.
+
+        With a flow_field (see flow_field.py) chasers follow it around
+        obstacles; without one, or where it has no vector, they head straight
+        for the player. nearby optionally lists the only monsters that can
+        end their patrol step within CHASE_RADIUS of the player (e.g. from
+        a spatial.EntityGrid); the rest are not checked for chasing.
+        """
+        if not len(self):
+            return
+        if len(self) <= SCALAR_MONSTERS:
+            self._update_scalar(player_x, player_y, player_hidden, flow_field, nearby)
+            return
+        speed = self.speed
+
+        # Current patrol target of every monster
+        point = self.offsets[:-1] + self.target
+        dx = self.patrol_x[point] - self.x
+        dy = self.patrol_y[point] - self.y
+        distance = np.sqrt(dx*dx + dy*dy)
+        moving = distance >= ARRIVE_DISTANCE
+
+        # Face the target (keep the old heading when standing on it)
+        self.direction = np.where(distance > 0, np.degrees(np.arctan2(dy, dx)), self.direction)
+
+        # Reached monsters switch to the next point; the rest move towards it
+        self.target = np.where(moving, self.target, (self.target + 1) % self.route_length)
+        x = self.x + np.divide(dx, distance, out=np.zeros_like(dx), where=moving) * speed
+        y = self.y + np.divide(dy, distance, out=np.zeros_like(dy), where=moving) * speed
+
+        near = np.arange(len(self)) if nearby is None else nearby
+        if not player_hidden and len(near):
+            # Chase the player if detected; the patrol target is kept for later
+            pdx = player_x - x[near]
+            pdy = player_y - y[near]
+            squared = pdx*pdx + pdy*pdy
+            chasing = (squared < CHASE_RADIUS*CHASE_RADIUS) & (squared > 0)
+            if chasing.any():
+                near = near[chasing]
+                player_distance = np.sqrt(squared[chasing])
+                ux = pdx[chasing] / player_distance
+                uy = pdy[chasing] / player_distance
+                if flow_field is not None:
+                    # One shared field lookup per monster instead of a path search each
+                    fx, fy, covered = flow_field.steer(x[near], y[near])
+                    ux = np.where(covered, fx, ux)
+                    uy = np.where(covered, fy, uy)
+                self.direction[near] = np.degrees(np.arctan2(uy, ux))
+                x[near] += ux * speed[near] * CHASE_MULTIPLIER
+                y[near] += uy * speed[near] * CHASE_MULTIPLIER
+
+        self.x = x
+        self.y = y
+
+    def _update_scalar(self, player_x, player_y, player_hidden, flow_field, nearby):
+        """update() one monster at a time, for stores too small to amortize NumPy's per-call cost.
+
+        Same arithmetic in the same order as the batched path, so both give
+        the same positions and targets; headings can differ in the last bit,
+        since NumPy's arctan2 is not the C library's.
+        """
+        if self._static_lists is None:
+            self._static_lists = (self.patrol_x.tolist(), self.patrol_y.tolist(), self.offsets.tolist(),
+                                  self.route_length.tolist(), self.speed.tolist())
+        patrol_x, patrol_y, offsets, route_length, speed = self._static_lists
+        x = self.x.tolist()
+        y = self.y.tolist()
+        direction = self.direction.tolist()
+        target = self.target.tolist()
+
+        for i in range(len(x)):
+            point = offsets[i] + target[i]
+            dx = patrol_x[point] - x[i]
+            dy = patrol_y[point] - y[i]
+            distance = math.sqrt(dx*dx + dy*dy)
+            if distance > 0:
+                direction[i] = math.degrees(math.atan2(dy, dx))
+            if distance >= ARRIVE_DISTANCE:
+                x[i] += dx / distance * speed[i]
+                y[i] += dy / distance * speed[i]
+            else:
+                target[i] = (target[i] + 1) % route_length[i]
+
+        if not player_hidden:
+            near = range(len(x)) if nearby is None else np.asarray(nearby).tolist()
+            for i in near:
+                pdx = player_x - x[i]
+                pdy = player_y - y[i]
+                squared = pdx*pdx + pdy*pdy
+                if 0 < squared < CHASE_RADIUS*CHASE_RADIUS:
+                    player_distance = math.sqrt(squared)
+                    ux = pdx / player_distance
+                    uy = pdy / player_distance
+                    if flow_field is not None:
+                        fx, fy, covered = flow_field.steer_point(x[i], y[i])
+                        if covered:
+                            ux, uy = fx, fy
+                    direction[i] = math.degrees(math.atan2(uy, ux))
+                    x[i] += ux * speed[i] * CHASE_MULTIPLIER
+                    y[i] += uy * speed[i] * CHASE_MULTIPLIER
+
+        self.x = np.array(x)
+        self.y = np.array(y)
+        self.direction = np.array(direction)
+        self.target = np.array(target, dtype=np.int64)
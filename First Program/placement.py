@@ -0,0 +1,245 @@
+"""Procedural object placement over a rasterized occupancy grid.
+
+The level area is rasterized into a boolean grid where every cell touched
+by an obstacle (optionally inflated by a clearance), the spawn zone or the
+outer margin is blocked. Points are then drawn uniformly from the free cells
+and thinned to a minimum spacing with batched Poisson-disk dart throwing:
+accepted points live in a background grid of spacing/sqrt(2) cells (so each
+cell holds at most one point) and candidates are checked against the 21
+cells around them in one NumPy pass. A fixed budget of rounds means
+placement always terminates; if it runs out, PlacementError reports what
+could and could not be placed.
+
+The same raster doubles as a walkability map: flood_fill() marks every
+free cell connected to a start cell, so generation can keep objects out of
+pockets the player can never walk into.
+"""
+import math
+
+import numpy as np
+
+OCCUPANCY_CELL_SIZE = 10        # World units per occupancy cell
+MAX_OCCUPANCY_CELLS = 4096      # Cells per side; larger maps get coarser cells
+PLACEMENT_ROUNDS = 64           # Dart-throwing batches before giving up
+BATCH_OVERSAMPLING = 2          # Candidates drawn per point still missing
+
+# 3x3 phases of background cells: cells in one phase are at least 3 cells
+# apart, so candidates in the same phase can never conflict with each other
+_PHASES = [(px, py) for px in range(3) for py in range(3)]
+# Background cells that can hold a point closer than the spacing (the 5x5
+# block minus its corners, which are always at least one spacing away)
+_NEIGHBOURS = np.array([(dx, dy) for dx in range(-2, 3) for dy in range(-2, 3)
+                        if abs(dx) + abs(dy) < 4], dtype=np.int64)
+
+
+class PlacementError(RuntimeError):
+    """Raised when the requested objects cannot be placed under the given constraints."""
+
+    def __init__(self, kind, requested, placed, min_spacing, free_fraction):
+        self.kind = kind
+        self.requested = requested
+        self.placed = placed
+        self.min_spacing = min_spacing
+        self.free_fraction = free_fraction
+        super().__init__(
+            f"could only place {placed} of {requested} {kind} "
+            f"(min spacing {min_spacing}, {free_fraction:.1%} of the map free)")
+
+
+class OccupancyGrid:
+    """Boolean raster over the square [-half_extent, half_extent]^2; True means blocked."""
+
+    def __init__(self, half_extent, cell_size=OCCUPANCY_CELL_SIZE):
+        # Keep the raster bounded on very large maps by coarsening the cells
+        cell_size = max(cell_size, 2 * half_extent / MAX_OCCUPANCY_CELLS)
+        self.half_extent = half_extent
+        self.cell_size = cell_size
+        self.cells = max(1, math.ceil(2 * half_extent / cell_size))
+        self.blocked = np.zeros((self.cells, self.cells), dtype=bool)
+
+        # The last row/column may stick out past the map edge; never place there
+        self.block_outside(half_extent)
+
+    def _span(self, lo, hi):
+        """Index range of cells overlapping [lo, hi] on one axis, clipped to the grid."""
+        origin = -self.half_extent
+        i0 = max(0, math.floor((lo - origin) / self.cell_size))
+        i1 = min(self.cells, math.ceil((hi - origin) / self.cell_size))
+        return i0, max(i0, i1)
+
+    def block_rect(self, xmin, ymin, xmax, ymax):
+        """Block every cell the rectangle touches (conservative rasterization)."""
+        x0, x1 = self._span(xmin, xmax)
+        y0, y1 = self._span(ymin, ymax)
+        self.blocked[x0:x1, y0:y1] = True
+
+    def block_boxes(self, boxes, clearance=0):
+        """Block centre-size boxes [x, y, width, height], each grown by clearance on every side."""
+        for x, y, width, height in boxes:
+            self.block_rect(x - width/2 - clearance, y - height/2 - clearance,
+                            x + width/2 + clearance, y + height/2 + clearance)
+
+    def block_outside(self, limit):
+        """Block every cell not entirely inside [-limit, limit]^2."""
+        origin = -self.half_extent
+        size = self.cell_size
+        first = max(0, math.ceil((-limit - origin) / size))
+        last = min(self.cells, math.floor((limit - origin) / size))
+        inside = np.zeros(self.cells, dtype=bool)
+        inside[first:last] = True
+        self.blocked |= ~(inside[:, None] & inside[None, :])
+
+    def cell_of(self, x, y):
+        """(row, column) of the cell containing world point (x, y), clipped to the grid."""
+        last = self.cells - 1
+        ix = min(last, max(0, math.floor((x + self.half_extent) / self.cell_size)))
+        iy = min(last, max(0, math.floor((y + self.half_extent) / self.cell_size)))
+        return ix, iy
+
+    def reachable_from(self, x, y):
+        """Boolean mask of free cells 4-connected to the cell containing (x, y)."""
+        return flood_fill(self.blocked, self.cell_of(x, y))
+
+    def free_fraction(self):
+        """Share of cells that are still free."""
+        return 1.0 - self.blocked.mean()
+
+    def sample_free(self, count, rng):
+        """count points drawn uniformly over the free area, as an (n, 2) float array."""
+        blocked = self.blocked.ravel()
+        cells = np.zeros(0, dtype=np.int64)
+        # Rejection-sample whole cells while the map is mostly free; it avoids
+        # scanning the full raster. Fall back to listing free cells if it is not.
+        for _ in range(4):
+            draw = rng.integers(0, len(blocked), 2 * (count - len(cells)) + 16)
+            cells = np.concatenate((cells, draw[~blocked[draw]]))[:count]
+            if len(cells) == count:
+                break
+        else:
+            free = np.flatnonzero(~blocked)
+            if not len(free):
+                return np.zeros((0, 2))
+            cells = np.concatenate((cells, free[rng.integers(0, len(free), count - len(cells))]))
+        ix, iy = np.divmod(cells, self.cells)
+        # Free cells are entirely free, so any point inside them is valid
+        points = np.column_stack((ix, iy)) + rng.random((count, 2))
+        return points * self.cell_size - self.half_extent
+
+
+def _row_runs(free):
+    """Label each horizontal run of free cells 1..n (0 on blocked cells); returns (labels, n)."""
+    starts = free.copy()
+    starts[:, 1:] &= ~free[:, :-1]  # Free cell whose left neighbour is blocked or off the grid
+    labels = np.cumsum(starts.ravel()).reshape(free.shape)
+    labels *= free
+    return labels, int(labels.max()) if labels.size else 0
+
+
+def flood_fill(blocked, start):
+    """Mask of free cells 4-connected to start (a (row, column) pair).
+
+    Rather than growing cell by cell, the grid is collapsed into horizontal
+    runs of free cells; runs in neighbouring rows that share a column are
+    joined, and the run graph is merged by vectorized min-label hooking
+    with pointer jumping. Cost is a few passes over the grid plus work
+    proportional to the number of runs.
+    """
+    free = ~blocked
+    if not free[start]:
+        return np.zeros_like(free)
+    labels, n_runs = _row_runs(free)
+
+    # Edges between runs stacked on top of each other; one per overlapping
+    # stretch (where the vertical pair of free cells begins)
+    pair = free[:-1] & free[1:]
+    first = pair.copy()
+    first[:, 1:] &= ~pair[:, :-1]
+    a = labels[:-1][first]
+    b = labels[1:][first]
+
+    parent = np.arange(n_runs + 1)
+    while True:
+        pa, pb = parent[a], parent[b]
+        differ = pa != pb
+        if not differ.any():
+            break
+        # Hook the larger root onto the smaller, then flatten the trees
+        np.minimum.at(parent, np.maximum(pa[differ], pb[differ]), np.minimum(pa[differ], pb[differ]))
+        while True:
+            grand = parent[parent]
+            if (grand == parent).all():
+                break
+            parent = grand
+
+    component = parent[labels]
+    return free & (component == component[start])
+
+
+def place(occupancy, count, rng, min_spacing=0, kind="objects", rounds=PLACEMENT_ROUNDS):
+    """Place count points in the free area of occupancy, pairwise at least min_spacing apart.
+
+    rng is a numpy Generator. Returns an (count, 2) float array, or raises
+    PlacementError after `rounds` batches without reaching count.
+    """
+    if count <= 0:
+        return np.zeros((0, 2))
+    if min_spacing <= 0:
+        points = occupancy.sample_free(count, rng)
+        if len(points) < count:
+            raise PlacementError(kind, count, len(points), min_spacing, occupancy.free_fraction())
+        return points
+
+    # Background grid: spacing/sqrt(2) cells hold at most one accepted point.
+    # Cells are keyed by a flat int64 index (padded by 2 so neighbours never go negative)
+    # and kept sorted, so neighbour lookups are one searchsorted call.
+    cell = min_spacing / math.sqrt(2)
+    cols = math.ceil(2 * occupancy.half_extent / cell) + 4
+    spacing_sq = min_spacing * min_spacing
+    keys = np.zeros(0, dtype=np.int64)
+    points = np.zeros((0, 2))
+
+    for _ in range(rounds):
+        missing = count - len(points)
+        if missing <= 0:
+            break
+
+        candidates = occupancy.sample_free(missing * BATCH_OVERSAMPLING + 16, rng)
+        if not len(candidates):
+            break
+        grid = np.floor((candidates + occupancy.half_extent) / cell).astype(np.int64) + 2
+
+        # One candidate per background cell, in random order
+        _, first = np.unique(grid[:, 0] * cols + grid[:, 1], return_index=True)
+        first = first[rng.permutation(len(first))]
+        candidates, grid = candidates[first], grid[first]
+
+        for px, py in _PHASES:
+            in_phase = (grid[:, 0] % 3 == px) & (grid[:, 1] % 3 == py)
+            batch, batch_grid = candidates[in_phase], grid[in_phase]
+            if not len(batch):
+                continue
+
+            # Look up the accepted point (if any) in each neighbouring cell
+            if len(keys):
+                near = batch_grid[:, None, :] + _NEIGHBOURS[None, :, :]
+                near_keys = near[..., 0] * cols + near[..., 1]
+                slot = np.minimum(np.searchsorted(keys, near_keys), len(keys) - 1)
+                occupied = keys[slot] == near_keys
+                offset = points[slot] - batch[:, None, :]
+                keep = ~(occupied & ((offset ** 2).sum(axis=2) < spacing_sq)).any(axis=1)
+                batch, batch_grid = batch[keep], batch_grid[keep]
+
+            batch = batch[:count - len(points)]
+            batch_grid = batch_grid[:len(batch)]
+            if not len(batch):
+                continue
+            keys = np.concatenate((keys, batch_grid[:, 0] * cols + batch_grid[:, 1]))
+            points = np.concatenate((points, batch))
+            order = np.argsort(keys, kind='stable')
+            keys, points = keys[order], points[order]
+
+    if len(points) < count:
+        raise PlacementError(kind, count, len(points), min_spacing, occupancy.free_fraction())
+
+    # Storage order follows the background grid; hand points back in random order
+    return points[rng.permutation(len(points))]
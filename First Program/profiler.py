@@ -0,0 +1,85 @@
+"""Per-frame phase timings kept in a fixed-size ring buffer.
+
+Callers time consecutive phases with lap(), which reads perf_counter_ns
+and adds the elapsed time to the phase's slot for the frame in progress;
+end_frame() then copies that row into the ring buffer. While the profiler
+is disabled lap() and end_frame() return straight away, so the calls can
+stay in the frame loop permanently.
+
+    t = profiler.start()
+    draw_scene()
+    t = profiler.lap(SCENE, t)
+    ...
+    profiler.end_frame()
+"""
+import csv
+import time
+
+import numpy as np
+
+PROFILE_FRAMES = 600  # Frames kept in the ring buffer (10 seconds at 60 FPS)
+
+
+class PhaseProfiler:
+    """Nanosecond phase timings for the last `capacity` frames."""
+
+    def __init__(self, phases, capacity=PROFILE_FRAMES):
+        self.phases = tuple(phases)
+        self.enabled = False
+        self.samples = np.zeros((capacity, len(self.phases)), dtype=np.int64)
+        self.frame_numbers = np.zeros(capacity, dtype=np.int64)
+        self.frames = 0          # Frames recorded so far; the next one goes to frames % capacity
+        self._current = [0] * len(self.phases)
+
+    def start(self):
+        """Timestamp to pass to the first lap() of a sequence (0 while disabled)."""
+        if not self.enabled:
+            return 0
+        return time.perf_counter_ns()
+
+    def lap(self, phase, since):
+        """Charge the time since `since` to phase (an index into phases); returns now."""
+        if not self.enabled:
+            return 0
+        now = time.perf_counter_ns()
+        if since:
+            self._current[phase] += now - since
+        return now
+
+    def end_frame(self):
+        """Store the frame in progress in the ring buffer and start a new one."""
+        if not self.enabled:
+            return
+        slot = self.frames % len(self.samples)
+        self.samples[slot] = self._current
+        self.frame_numbers[slot] = self.frames
+        self.frames += 1
+        self._current = [0] * len(self.phases)
+
+    def recorded(self):
+        """(frame numbers, samples) of the buffered frames, oldest first."""
+        capacity = len(self.samples)
+        if self.frames <= capacity:
+            return self.frame_numbers[:self.frames], self.samples[:self.frames]
+        order = np.roll(np.arange(capacity), -(self.frames % capacity))
+        return self.frame_numbers[order], self.samples[order]
+
+    def percentiles(self, quantiles=(50, 99)):
+        """{phase: [milliseconds per quantile]} over the buffered frames, plus 'total'."""
+        _, samples = self.recorded()
+        if not len(samples):
+            return {}
+        columns = np.column_stack((samples, samples.sum(axis=1)))
+        values = np.percentile(columns, quantiles, axis=0) / 1e6
+        names = self.phases + ('total',)
+        return {name: values[:, i].tolist() for i, name in enumerate(names)}
+
+    def dump_csv(self, path):
+        """Write the buffered frames to a CSV file, one row per frame, times in nanoseconds."""
+        frame_numbers, samples = self.recorded()
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(('frame',) + tuple(f"{phase}_ns" for phase in self.phases))
+            for number, row in zip(frame_numbers.tolist(), samples.tolist()):
+                writer.writerow([number] + row)
+        return len(frame_numbers)
@@ -0,0 +1,235 @@
+"""Input recording and accelerated deterministic replay.
+
+Gameplay only depends on the simulation state and on the input events fed
+into it, since game time is derived from the tick counter. A recording
+therefore holds the starting state (a snapshot, which carries the RNG state
+the seed produced), every keyboard, special-key and mouse event tagged with
+the tick it arrived before, and a CRC32 of the state after every tick.
+
+Replaying restores the starting state, feeds the events back in at their
+ticks and steps the simulation headless as fast as it will go, comparing
+checksums along the way; the first tick whose state differs is reported.
+
+    python "Dungeon Crawler.py" --record session.replay
+    python replay.py session.replay
+"""
+import argparse
+import struct
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import snapshot
+
+REPLAY_MAGIC = b'DCRP'
+REPLAY_VERSION = 1
+
+# Event kinds, mirroring the GLUT callbacks they come from
+KEY_DOWN = 0        # code: key byte, flags: Shift held
+KEY_UP = 1          # code: key byte, flags: Shift held
+SPECIAL_DOWN = 2    # code: GLUT special key, flags unused
+SPECIAL_UP = 3      # code: GLUT special key, flags unused
+MOUSE = 4           # code: button, flags: button state
+
+# freeglut's codes for the Shift keys (see "Dungeon Crawler.py")
+SHIFT_KEYS = (112, 113)
+
+# magic, version, seed (-1 if unknown), has seed, start tick, events, checksums, snapshot bytes
+_HEADER = struct.Struct('<4sIq?qqqq')
+
+ReplayResult = namedtuple('ReplayResult', 'sim ticks seconds diverged_at')
+
+
+class Recording:
+    """A starting snapshot plus the timed input events and per-tick checksums that follow it."""
+
+    def __init__(self, initial, seed, start_tick, ticks, kinds, codes, flags, checksums):
+        self.initial = initial          # snapshot.dumps() bytes of the starting state
+        self.seed = seed                # Seed the session was created with, if known
+        self.start_tick = start_tick    # Simulation tick of the starting state
+        self.ticks = ticks              # Per event: tick it was delivered before (int64)
+        self.kinds = kinds              # Per event: KEY_DOWN ... MOUSE (uint8)
+        self.codes = codes              # Per event: key byte, special key or button (int32)
+        self.flags = flags              # Per event: Shift held or mouse state (uint8)
+        self.checksums = checksums      # snapshot.checksum() after each tick (uint32)
+
+    @property
+    def num_ticks(self):
+        return len(self.checksums)
+
+    def dumps(self):
+        """Serialize to the compact binary log format."""
+        header = _HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION,
+                              -1 if self.seed is None else self.seed, self.seed is not None,
+                              self.start_tick, len(self.ticks), len(self.checksums), len(self.initial))
+        blocks = ((self.ticks, '<i8'), (self.kinds, 'u1'), (self.codes, '<i4'),
+                  (self.flags, 'u1'), (self.checksums, '<u4'))
+        return b''.join([header, self.initial] +
+                        [np.ascontiguousarray(block, dtype=dtype).tobytes() for block, dtype in blocks])
+
+    @classmethod
+    def loads(cls, data):
+        """Parse dumps() output; raises ValueError on foreign or newer-version data."""
+        if len(data) < _HEADER.size:
+            raise ValueError("replay log is truncated")
+        magic, version, seed, has_seed, start_tick, n_events, n_checksums, n_initial = \
+            _HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC:
+            raise ValueError("not a Dungeon Crawler replay log")
+        if version != REPLAY_VERSION:
+            raise ValueError(f"replay version {version} is not supported (expected {REPLAY_VERSION})")
+
+        offset = _HEADER.size + n_initial
+        initial = bytes(data[_HEADER.size:offset])
+
+        def take(dtype, count):
+            nonlocal offset
+            array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+            offset += array.nbytes
+            return array
+
+        return cls(initial, seed if has_seed else None, start_tick,
+                   take('<i8', n_events), take('u1', n_events), take('<i4', n_events),
+                   take('u1', n_events), take('<u4', n_checksums))
+
+    def save(self, path):
+        """Write the log to a file."""
+        with open(path, 'wb') as f:
+            f.write(self.dumps())
+
+    @classmethod
+    def load(cls, path):
+        """Read a log written by save()."""
+        with open(path, 'rb') as f:
+            return cls.loads(f.read())
+
+
+class Recorder:
+    """Collects input events and per-tick checksums from a live Simulation."""
+
+    def __init__(self, sim):
+        self.restart(sim)
+
+    def restart(self, sim):
+        """Start a fresh log from sim's current state and hook into its ticks.
+
+        Call this again whenever the state is replaced from outside the
+        recorded inputs, e.g. after loading a quicksave.
+        """
+        self.sim = sim
+        self.initial = snapshot.dumps(sim)
+        self.seed = sim.seed
+        self.start_tick = sim.tick
+        self.events = []
+        self.checksums = []
+        sim.on_tick = self._on_tick
+
+    def _on_tick(self, sim):
+        self.checksums.append(snapshot.checksum(sim))
+
+    def record(self, kind, code, flags=0):
+        """Log one event at the current tick; call it before handing the event to the simulation."""
+        self.events.append((self.sim.tick, kind, code, int(bool(flags)) if kind != MOUSE else flags))
+
+    def recording(self):
+        """Everything recorded so far as a Recording."""
+        events = np.array(self.events, dtype=np.int64).reshape(-1, 4)
+        return Recording(self.initial, self.seed, self.start_tick,
+                         events[:, 0].copy(), events[:, 1].astype(np.uint8),
+                         events[:, 2].astype(np.int32), events[:, 3].astype(np.uint8),
+                         np.array(self.checksums, dtype=np.uint32))
+
+    def save(self, path):
+        """Write everything recorded so far to a file."""
+        self.recording().save(path)
+
+
+def apply_event(sim, kind, code, flags):
+    """Feed one recorded event to the simulation the way the GLUT callbacks do.
+
+    Camera and view controls (arrows, V, L, mouse) never touch the
+    simulation, so they are kept in the log but have no effect here.
+    """
+    if kind == KEY_DOWN:
+        sim.key_down(bytes((code,)), flags)
+    elif kind == KEY_UP:
+        sim.key_up(bytes((code,)), flags)
+    elif kind in (SPECIAL_DOWN, SPECIAL_UP) and code in SHIFT_KEYS:
+        sim.set_shift(kind == SPECIAL_DOWN)
+
+
+def replay(recording, verify=True, stop_on_divergence=True):
+    """Re-run a recording headless as fast as possible.
+
+    Returns a ReplayResult with the final Simulation, the number of ticks
+    run, the wall-clock seconds taken and the first tick whose checksum
+    differed from the recording (None if every tick matched or verify is
+    off).
+    """
+    wall_start = time.perf_counter()
+    sim = snapshot.loads(recording.initial, seed=recording.seed)
+
+    # Events are grouped by tick: those in [bounds[i], bounds[i+1]) precede tick start + i
+    start = recording.start_tick
+    n_ticks = recording.num_ticks
+    bounds = np.searchsorted(recording.ticks, np.arange(start, start + n_ticks + 2)).tolist()
+    kinds = recording.kinds.tolist()
+    codes = recording.codes.tolist()
+    flags = recording.flags.tolist()
+    expected = recording.checksums.tolist()
+    checksum = snapshot.checksum
+
+    # Events recorded before the starting tick (none, normally) are applied up front
+    for e in range(bounds[0]):
+        apply_event(sim, kinds[e], codes[e], flags[e])
+
+    diverged_at = None
+    for i in range(n_ticks):
+        for e in range(bounds[i], bounds[i + 1]):
+            apply_event(sim, kinds[e], codes[e], flags[e])
+        sim.step(1)
+        if verify and diverged_at is None and checksum(sim) != expected[i]:
+            diverged_at = sim.tick
+            if stop_on_divergence:
+                n_ticks = i + 1
+                break
+    else:
+        # Events that arrived after the last recorded tick
+        for e in range(bounds[n_ticks], len(kinds)):
+            apply_event(sim, kinds[e], codes[e], flags[e])
+
+    return ReplayResult(sim, n_ticks, time.perf_counter() - wall_start, diverged_at)
+
+
+def build_arg_parser():
+    """Command-line options for replaying a recorded session."""
+    parser = argparse.ArgumentParser(description="Replay a recorded Dungeon Crawler session headless")
+    parser.add_argument("log", help="replay log written by --record")
+    parser.add_argument("--no-verify", action="store_true",
+                        help="skip the per-tick checksum comparison")
+    parser.add_argument("--keep-going", action="store_true",
+                        help="finish the replay after a divergence instead of stopping there")
+    return parser
+
+
+def main(argv=None):
+    """Entry point for `python replay.py LOG`; exits with status 1 on divergence."""
+    args = build_arg_parser().parse_args(argv)
+    recording = Recording.load(args.log)
+    result = replay(recording, verify=not args.no_verify, stop_on_divergence=not args.keep_going)
+    sim = result.sim
+    game_seconds = result.ticks * sim.dt
+    print(f"ticks={result.ticks} events={len(recording.ticks)} game_seconds={game_seconds:.1f} "
+          f"wall_seconds={result.seconds:.3f} speedup={game_seconds / max(result.seconds, 1e-9):.0f}x "
+          f"seed={recording.seed}")
+    if result.diverged_at is not None:
+        print(f"DIVERGED at tick {result.diverged_at}")
+        return 1
+    print(f"final: health={sim.player_health} treasures={sim.collected_treasures} "
+          f"won={sim.game_won} over={sim.game_over}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,214 @@
+"""Loader and search engine for the Inputfile.txt road graph format.
+
+Each line describes one city: its name, the straight-line distance from it
+to the goal city (the one whose value is 0, Bucharest in Inputfile.txt),
+then any number of neighbour/cost pairs:
+
+    Arad 366 Zerind 75 Timisoara 118 Sibiu 140
+
+Names are interned to integer IDs and edges stored in compressed sparse
+row (CSR) arrays. Searches keep their distances, parents and closed flags
+in flat preallocated arrays indexed by node ID, read through memoryviews,
+so a query allocates nothing per node beyond its heap entries.
+
+    python road_graph.py Inputfile.txt Arad Bucharest --method astar
+"""
+import argparse
+import heapq
+import math
+from collections import namedtuple
+
+import numpy as np
+
+METHODS = ('astar', 'dijkstra', 'greedy')
+
+SearchResult = namedtuple('SearchResult', 'path cost expanded')
+
+
+class RoadGraph:
+    """Directed weighted graph in CSR form with a per-node heuristic to one goal."""
+
+    def __init__(self, names, heuristic, indptr, indices, weights):
+        self.names = names                      # Node ID -> city name
+        self.ids = {name: i for i, name in enumerate(names)}
+        self.heuristic = heuristic              # float64 straight-line estimate per node
+        self.indptr = indptr                    # Edges of node u: indptr[u]:indptr[u+1]
+        self.indices = indices                  # Edge target node IDs (int64)
+        self.weights = weights                  # Edge costs (float64)
+
+        # The heuristic estimates the distance to the node it is zero at
+        goals = np.flatnonzero(heuristic == 0)
+        self.heuristic_goal = int(goals[0]) if len(goals) == 1 else None
+
+    @property
+    def num_nodes(self):
+        return len(self.names)
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    def node(self, name_or_id):
+        """Node ID for a city name (IDs pass through unchanged)."""
+        if isinstance(name_or_id, str):
+            try:
+                return self.ids[name_or_id]
+            except KeyError:
+                raise KeyError(f"unknown city {name_or_id!r}") from None
+        return int(name_or_id)
+
+    def neighbours(self, node):
+        """(target IDs, costs) of a node's outgoing edges."""
+        a, b = self.indptr[node], self.indptr[node + 1]
+        return self.indices[a:b], self.weights[a:b]
+
+
+def parse_graph(lines):
+    """Build a RoadGraph from an iterable of text lines in the Inputfile.txt format."""
+    ids = {}
+    heuristic = []
+    sources = []      # One entry per line: its node ID, repeated below by edge count
+    edge_counts = []
+    targets = []
+    costs = []
+
+    def intern(name):
+        node = ids.get(name)
+        if node is None:
+            node = ids[name] = len(ids)
+            heuristic.append(0.0)  # Cities that only appear as neighbours get no estimate
+        return node
+
+    for number, line in enumerate(lines, 1):
+        parts = line.split()
+        if not parts:
+            continue
+        if len(parts) % 2:
+            raise ValueError(f"line {number}: expected a name, a heuristic and name/cost pairs")
+        node = intern(parts[0])
+        heuristic[node] = float(parts[1])
+        sources.append(node)
+        edge_counts.append((len(parts) - 2) // 2)
+        targets.extend(map(intern, parts[2::2]))
+        costs.extend(parts[3::2])
+
+    n = len(ids)
+    src = np.repeat(np.asarray(sources, dtype=np.int64), np.asarray(edge_counts, dtype=np.int64))
+    dst = np.asarray(targets, dtype=np.int64)
+    weights = np.asarray(costs, dtype=np.float64)
+
+    # Group edges by source; a stable sort keeps each city's listed order
+    order = np.argsort(src, kind='stable')
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+
+    names = [None] * n
+    for name, node in ids.items():
+        names[node] = name
+    return RoadGraph(names, np.asarray(heuristic, dtype=np.float64), indptr,
+                     np.ascontiguousarray(dst[order]), np.ascontiguousarray(weights[order]))
+
+
+def load_graph(path):
+    """Read a graph file in the Inputfile.txt format."""
+    with open(path) as f:
+        return parse_graph(f)
+
+
+def _path_to(parent, goal):
+    """Node IDs from the search root to goal, following parent links."""
+    path = [goal]
+    while parent[path[-1]] >= 0:
+        path.append(parent[path[-1]])
+    path.reverse()
+    return path
+
+
+def search(graph, start, goal, method='astar'):
+    """Shortest (or, for greedy, first-found) path from start to goal.
+
+    method is 'astar' (cost + heuristic), 'dijkstra' (cost only) or
+    'greedy' (heuristic only). A* and greedy need the heuristic column, so
+    goal must be the city it estimates distances to. Returns a
+    SearchResult of city names, total cost and the number of nodes
+    expanded; path is empty and cost infinite when goal is unreachable.
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown method {method!r}, expected one of {', '.join(METHODS)}")
+    start = graph.node(start)
+    goal = graph.node(goal)
+    use_cost = method != 'greedy'
+    use_heuristic = method != 'dijkstra'
+    if use_heuristic and goal != graph.heuristic_goal:
+        goal_name = graph.names[graph.heuristic_goal] if graph.heuristic_goal is not None else None
+        raise ValueError(f"the heuristic column estimates distances to {goal_name}, "
+                         f"not {graph.names[goal]}; search it with dijkstra instead")
+
+    n = graph.num_nodes
+    dist_array = np.full(n, math.inf)
+    parent_array = np.full(n, -1, dtype=np.int64)
+    dist = memoryview(dist_array)
+    parent = memoryview(parent_array)
+    closed = bytearray(n)
+    indptr = memoryview(graph.indptr)
+    indices = memoryview(graph.indices)
+    weights = memoryview(graph.weights)
+    h = memoryview(graph.heuristic)
+
+    heappush, heappop = heapq.heappush, heapq.heappop
+    dist[start] = 0.0
+    heap = [(h[start] if use_heuristic else 0.0, start)]
+    expanded = 0
+    while heap:
+        _, u = heappop(heap)
+        if closed[u]:
+            continue
+        closed[u] = 1
+        if u == goal:
+            break
+        expanded += 1
+
+        du = dist[u]
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            if closed[v]:
+                continue
+            cost = du + weights[k]
+            if cost < dist[v]:
+                dist[v] = cost
+                parent[v] = u
+                priority = (cost if use_cost else 0.0) + (h[v] if use_heuristic else 0.0)
+                heappush(heap, (priority, v))
+
+    if not closed[goal]:
+        return SearchResult([], math.inf, expanded)
+    return SearchResult([graph.names[node] for node in _path_to(parent, goal)], dist[goal], expanded)
+
+
+def build_arg_parser():
+    """Command-line options for one-off searches."""
+    parser = argparse.ArgumentParser(description="Search a road graph in the Inputfile.txt format")
+    parser.add_argument("graph", help="path to the graph file")
+    parser.add_argument("start", help="start city")
+    parser.add_argument("goal", help="goal city")
+    parser.add_argument("--method", choices=METHODS, default='astar',
+                        help="search algorithm (default: astar)")
+    return parser
+
+
+def main(argv=None):
+    """Entry point for `python road_graph.py GRAPH START GOAL [--method M]`."""
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    graph = load_graph(args.graph)
+    try:
+        result = search(graph, args.start, args.goal, args.method)
+    except (KeyError, ValueError) as error:
+        # Unknown cities, or a heuristic search towards a goal the heuristic column is not for
+        parser.error(error.args[0])
+    route = " -> ".join(result.path) if result.path else "unreachable"
+    print(f"{args.method}: {route} cost={result.cost:g} expanded={result.expanded}")
+
+
+if __name__ == "__main__":
+    main()
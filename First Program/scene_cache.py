@@ -0,0 +1,178 @@
+"""Static level geometry baked into a vertex buffer once per level.
+
+The buffer is laid out as cullable pieces, each a contiguous vertex range
+with an axis-aligned bounding box: square tiles of floor cells, then one
+box per boundary wall, obstacle and stone detail. Drawing tests all boxes
+against the view frustum at once and issues the visible ranges, merged
+where they touch, with a single glMultiDrawArrays call.
+"""
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.arrays.vbo import VBO
+
+from geometry import (COLOR_OFFSET, CUBE_POSITIONS, NORMAL_OFFSET, VERTEX_STRIDE,
+                      boxes_mesh, checkerboard_mesh)
+from simulation import WALL_HEIGHT
+
+FLOOR_CELL_SIZE = 50
+FLOOR_TILE_CELLS = 16  # Floor cells per side of one cullable floor tile
+FLOOR_COLORS = ((0.3, 0.3, 0.35), (0.35, 0.35, 0.4))  # Dark gray, slightly lighter gray
+BOUNDARY_COLOR = (0.4, 0.4, 0.45)
+BOUNDARY_THICKNESS = 20
+OBSTACLE_COLOR = (0.5, 0.5, 0.6)  # Stone gray
+DETAIL_COLOR = (0.4, 0.4, 0.5)  # Darker gray for details
+
+
+def _tile_floor(floor, cells_x, cells_y, tile_cells=FLOOR_TILE_CELLS):
+    """Reorder checkerboard cells (row-major, 6 vertices each) so every tile is contiguous.
+
+    Returns the reordered vertices and the vertex count of each tile.
+    """
+    ix, iy = np.divmod(np.arange(cells_x * cells_y), cells_y)
+    tiles_y = -(-cells_y // tile_cells)
+    tiles = -(-cells_x // tile_cells) * tiles_y
+    tile = (ix // tile_cells) * tiles_y + iy // tile_cells
+    order = np.argsort(tile, kind='stable')
+    cell_vertices = len(floor) // len(tile)
+    floor = floor.reshape(len(tile), cell_vertices, -1)[order].reshape(len(floor), -1)
+    counts = np.bincount(tile, minlength=tiles) * cell_vertices
+    return floor, counts[counts > 0]
+
+
+def _piece_bounds(vertices, firsts):
+    """Bounding box centres and half extents of the vertex ranges starting at firsts."""
+    positions = vertices[:, 0:3]
+    lo = np.minimum.reduceat(positions, firsts, axis=0)
+    hi = np.maximum.reduceat(positions, firsts, axis=0)
+    return (lo + hi) / 2, (hi - lo) / 2
+
+
+def build_static_geometry(grid_length, obstacles, details=(), wall_height=WALL_HEIGHT, area=None):
+    """Interleaved vertices for floor, boundary and obstacles, each part's range, and the cull pieces.
+
+    details are [x, y, z, size] stone blocks baked into the obstacle part.
+    area (centre x, centre y, half extent) limits the floor to the loaded
+    part of a streamed world; by default it covers the whole map.
+    Pieces are a dict of per-piece arrays: 'first' and 'count' (vertex
+    range), 'center' and 'half_extent' (bounding box); the floor tiles
+    come first, 'floor_tiles' of them.
+    """
+    # Floor, regrouped into square tiles
+    cx, cy, half = area if area is not None else (0, 0, grid_length)
+    x0, x1 = max(-grid_length, cx - half), min(grid_length, cx + half)
+    y0, y1 = max(-grid_length, cy - half), min(grid_length, cy + half)
+    floor = checkerboard_mesh(x0, x1, FLOOR_CELL_SIZE, *FLOOR_COLORS, y_start=y0, y_stop=y1)
+    floor, tile_counts = _tile_floor(floor, len(np.arange(x0, x1 + 1, FLOOR_CELL_SIZE)),
+                                     len(np.arange(y0, y1 + 1, FLOOR_CELL_SIZE)))
+
+    # Outer walls: north, south, east, west
+    t = BOUNDARY_THICKNESS
+    boundary = boxes_mesh(
+        [(0, grid_length + t/2, wall_height/2), (0, -grid_length - t/2, wall_height/2),
+         (grid_length + t/2, 0, wall_height/2), (-grid_length - t/2, 0, wall_height/2)],
+        [(2*grid_length + 2*t, t, wall_height), (2*grid_length + 2*t, t, wall_height),
+         (t, 2*grid_length, wall_height), (t, 2*grid_length, wall_height)],
+        BOUNDARY_COLOR)
+
+    # Obstacles (walls)
+    boxes = np.asarray(obstacles, dtype=np.float32).reshape(-1, 4)
+    centers = np.column_stack((boxes[:, 0], boxes[:, 1], np.full(len(boxes), wall_height/2)))
+    sizes = np.column_stack((boxes[:, 2], boxes[:, 3], np.full(len(boxes), wall_height)))
+    walls = boxes_mesh(centers, sizes, OBSTACLE_COLOR)
+
+    # Stone texture detail cubes
+    blocks = np.asarray(details, dtype=np.float32).reshape(-1, 4)
+    detail_mesh = boxes_mesh(blocks[:, :3], np.repeat(blocks[:, 3:4], 3, axis=1), DETAIL_COLOR)
+    obstacle_mesh = np.concatenate((walls, detail_mesh))
+
+    ranges = {}
+    first = 0
+    for name, mesh in (('floor', floor), ('boundary', boundary), ('obstacles', obstacle_mesh)):
+        ranges[name] = (first, len(mesh))
+        first += len(mesh)
+    vertices = np.concatenate((floor, boundary, obstacle_mesh))
+
+    # Floor tiles, then every box (boundary walls, obstacles, details) on its own
+    box_vertices = len(CUBE_POSITIONS)
+    counts = np.concatenate((tile_counts,
+                             np.full((len(boundary) + len(obstacle_mesh)) // box_vertices, box_vertices)))
+    firsts = np.zeros(len(counts), dtype=np.int64)
+    np.cumsum(counts[:-1], out=firsts[1:])
+    centers, half_extents = _piece_bounds(vertices, firsts)
+    pieces = {'first': firsts.astype(np.int32), 'count': counts.astype(np.int32),
+              'center': centers, 'half_extent': half_extents, 'floor_tiles': len(tile_counts)}
+    return vertices, ranges, pieces
+
+
+class StaticScene:
+    """Floor, boundary walls and obstacles in one VBO, rebuilt when the level changes."""
+
+    def __init__(self):
+        self.vbo = None
+        self.ranges = {}
+        self.pieces = None
+        self.vertex_count = 0
+        self.level_id = None
+
+    def sync(self, sim):
+        """Rebuild the buffer if the simulation has started a new level since the last build."""
+        if self.level_id == sim.level_id:
+            return
+        vertices, self.ranges, self.pieces = build_static_geometry(sim.grid_length, sim.obstacles,
+                                                                   sim.obstacle_details, area=sim.area)
+        if self.vbo is None:
+            self.vbo = VBO(vertices)
+        else:
+            self.vbo.set_array(vertices)
+        self.vertex_count = len(vertices)
+        self.level_id = sim.level_id
+
+    def draw(self, *parts):
+        """Draw the named parts (default: everything)."""
+        if not parts:
+            self._draw_ranges([0], [self.vertex_count])
+        else:
+            self._draw_ranges(*zip(*(self.ranges[name] for name in parts)))
+
+    def draw_visible(self, frustum, stats=None):
+        """Draw only the pieces whose bounding boxes intersect frustum; counts go to stats."""
+        if self.pieces is None:
+            return
+        pieces = self.pieces
+        visible = frustum.boxes_visible(pieces['center'], pieces['half_extent'])
+        if stats is not None:
+            tiles = pieces['floor_tiles']
+            stats.add('floor', visible[:tiles])
+            stats.add('walls', visible[tiles:])
+
+        # Merge visible ranges that follow on from each other into single draws
+        firsts = pieces['first'][visible]
+        ends = firsts + pieces['count'][visible]
+        if not len(firsts):
+            return
+        breaks = np.flatnonzero(firsts[1:] != ends[:-1]) + 1
+        run_firsts = firsts[np.concatenate(([0], breaks))]
+        run_ends = ends[np.concatenate((breaks - 1, [len(ends) - 1]))]
+        self._draw_ranges(run_firsts, run_ends - run_firsts)
+
+    def _draw_ranges(self, firsts, counts):
+        """Draw vertex ranges of the buffer with one glMultiDrawArrays call."""
+        if self.vbo is None:
+            return
+        firsts = np.ascontiguousarray(firsts, dtype=np.int32)
+        counts = np.ascontiguousarray(counts, dtype=np.int32)
+        self.vbo.bind()
+        try:
+            glEnableClientState(GL_VERTEX_ARRAY)
+            glEnableClientState(GL_COLOR_ARRAY)
+            glEnableClientState(GL_NORMAL_ARRAY)
+            glVertexPointer(3, GL_FLOAT, VERTEX_STRIDE, self.vbo)
+            glColorPointer(3, GL_FLOAT, VERTEX_STRIDE, self.vbo + COLOR_OFFSET)
+            glNormalPointer(GL_FLOAT, VERTEX_STRIDE, self.vbo + NORMAL_OFFSET)
+
+            glMultiDrawArrays(GL_TRIANGLES, firsts, counts, len(firsts))
+        finally:
+            glDisableClientState(GL_NORMAL_ARRAY)
+            glDisableClientState(GL_COLOR_ARRAY)
+            glDisableClientState(GL_VERTEX_ARRAY)
+            self.vbo.unbind()
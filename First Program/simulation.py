@@ -0,0 +1,557 @@
+"""Headless fixed-timestep simulation core for Dungeon Crawler.
+
+This module owns all gameplay state and rules and never touches OpenGL, so
+it can be stepped from the GLUT front-end, from tests, or from the command
+line:
+
+    python simulation.py --headless --ticks 100000 --seed 42
+"""
+import argparse
+import math
+import random
+import time
+
+import numpy as np
+
+from chunks import CHUNK_MARGIN, CHUNK_SIZE, ChunkedWorld
+from flow_field import NAV_CELL_SIZE, NAV_CLEARANCE, FlowField
+from input_state import InputState
+from monsters import CHASE_RADIUS, MonsterStore
+from placement import OccupancyGrid, place
+from spatial import EntityGrid, ObstacleGrid
+
+# Simulation timing
+TICK_RATE = 60                # Fixed simulation ticks per game-second
+MAX_CATCHUP_TICKS = 10        # Ticks allowed per advance() before we drop time
+
+# Player configuration
+PLAYER_SPEED = 300            # Units per second (was 10 per ~30 Hz key-repeat event)
+PLAYER_SIZE = 30
+STEALTH_MULTIPLIER = 0.5      # Stealth halves movement speed
+BOOST_MULTIPLIER = 2.0        # Boost doubles movement speed
+BOOST_DURATION = 3            # Boost lasts 3 seconds
+BOOST_COOLDOWN = 9            # Time before you can boost again
+
+# Map configuration
+GRID_LENGTH = 600
+WALL_HEIGHT = 100
+DETAILS_PER_OBSTACLE = 5      # Decorative stone blocks on each wall
+MIN_OBSTACLE_SIZE = 50
+MAX_OBSTACLE_SIZE = 200
+SPAWN_CLEARANCE = 100         # Half-width of the square around the spawn kept clear
+TREASURE_MARGIN = 50          # Treasures stay this far inside the boundary walls
+TREASURE_CLEARANCE = 20       # ... and this far from any obstacle
+TREASURE_SPACING = 100        # Minimum distance between two treasures
+
+# Gameplay configuration
+NUM_TREASURES = 5
+NUM_MONSTERS = 3
+NUM_OBSTACLES = 15
+TOTAL_TREASURES_NEEDED = 5
+TOTAL_TIME_LIMIT = 120        # 2 minutes time limit
+
+# Streamed worlds (chunked=True): 100 times the classic map's width, generated chunk by chunk
+CHUNKED_GRID_LENGTH = 100 * GRID_LENGTH
+FLOW_WINDOW_MARGIN = 150      # Their chase flow field reaches this far past CHASE_RADIUS around the player
+
+
+class Simulation:
+    """All game state plus the rules that advance it one fixed tick at a time."""
+
+    def __init__(self, seed=None, clock=time.monotonic, tick_rate=TICK_RATE,
+                 num_treasures=NUM_TREASURES, num_monsters=NUM_MONSTERS,
+                 num_obstacles=NUM_OBSTACLES, grid_length=None,
+                 total_time_limit=TOTAL_TIME_LIMIT,
+                 treasures_needed=TOTAL_TREASURES_NEEDED, chunked=False):
+        """With chunked=True the world is streamed in CHUNK_SIZE chunks (see chunks.py)
+        and num_treasures, num_monsters and num_obstacles are counts per chunk.
+        grid_length defaults to GRID_LENGTH, or CHUNKED_GRID_LENGTH when chunked."""
+        if grid_length is None:
+            grid_length = CHUNKED_GRID_LENGTH if chunked else GRID_LENGTH
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.clock = clock
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate
+
+        # Level configuration
+        self.num_treasures = num_treasures
+        self.num_monsters = num_monsters
+        self.num_obstacles = num_obstacles
+        self.grid_length = grid_length
+        self.total_time_limit = total_time_limit
+        self.treasures_needed = treasures_needed
+        self.chunked = chunked
+
+        # Simulation clock
+        self.tick = 0
+        self.level_id = 0  # Bumped by init_game() and streaming so renderers know to rebuild
+        self._accumulator = 0.0
+        self._last_clock = None
+        self.on_tick = None  # Optional callback(sim) after every tick, e.g. a replay recorder
+
+        # Game state
+        self.game_active = False
+        self.game_won = False
+        self.game_over = False
+        self.start_time = 0
+
+        # Player state
+        self.player_pos = [0, 0, 0]  # x, y, z
+        self.player_angle = 0
+        self.player_speed = PLAYER_SPEED
+        self.player_size = PLAYER_SIZE
+        self.player_health = 100
+        self.player_hidden = False  # Stealth mode
+        self.collected_treasures = 0
+
+        # Boost system
+        self.boost_active = False
+        self.boost_start_time = 0
+        self.last_boost_time = -BOOST_COOLDOWN  # Ensure it's available at start
+
+        # Held keys, integrated into movement once per tick
+        self.input = InputState()
+
+        # Level contents
+        self.world = None  # ChunkedWorld when chunked, created in init_game()
+        # Centre x, y and half extent of the loaded area: the whole map, or the resident chunks
+        self.area = (0.0, 0.0, CHUNK_SIZE/2 if chunked else grid_length)
+        self.obstacles = []  # List of obstacles [x, y, width, height]
+        self.obstacle_grid = ObstacleGrid(self.obstacles)  # Rebuilt in init_game()
+        self.flow_field = FlowField(self.area[2], self.obstacles)  # Chase paths, rebuilt in init_game()
+        self.obstacle_details = []  # List of decorative stone blocks [x, y, z, size]
+        self.treasures = []  # List of treasures [x, y, collected]
+        self.monsters = MonsterStore.from_routes([], [])  # Struct-of-arrays, see monsters.py
+
+        # Proximity indexes over treasures and monsters, rebuilt whenever level_id changes
+        self.treasure_grid = EntityGrid()
+        self.monster_grid = EntityGrid()
+        self._indexed_level = None
+
+    @property
+    def time(self):
+        """Current game time in seconds, derived from the tick counter."""
+        return self.tick * self.dt
+
+    @property
+    def running(self):
+        """True while a game is in progress and gameplay should advance."""
+        return self.game_active and not self.game_over and not self.game_won
+
+    def time_remaining(self):
+        """Whole seconds left before the time limit expires."""
+        time_elapsed = int(self.time - self.start_time)
+        return max(0, self.total_time_limit - time_elapsed)
+
+    def boost_cooldown_remaining(self):
+        """Seconds left until boost can be triggered again (0 when ready)."""
+        return max(0.0, BOOST_COOLDOWN - (self.time - self.last_boost_time))
+
+    def init_game(self):
+        """Initialize the game state with obstacles, treasures, and monsters.
+
+        Raises placement.PlacementError if the level configuration leaves no
+        room for the requested obstacles or treasures.
+        """
+        rng = self.rng
+        grid_length = self.grid_length
+        self.level_id += 1
+
+        # Reset game state; keys held across a restart do not keep the new game moving
+        self.input.clear()
+        self.player_pos = [0, 0, 20]
+        self.player_health = 100
+        self.collected_treasures = 0
+        self.game_active = True
+        self.game_won = False
+        self.game_over = False
+        self.player_hidden = False
+        self.start_time = self.time
+        # --- reset boost system ---
+        self.boost_active = False
+        self.boost_start_time = 0
+        self.last_boost_time = self.start_time - BOOST_COOLDOWN
+
+        if self.chunked:
+            # Only the chunks around the player exist; stream() loads them as it moves
+            self.world = ChunkedWorld(rng.getrandbits(63), grid_length, self.generate_chunk)
+            self.stream()
+            return
+        self.world = None
+        self.area = (0.0, 0.0, grid_length)
+
+        # Placement draws from its own NumPy generator, seeded from the level RNG
+        placement_rng = np.random.default_rng(rng.getrandbits(64))
+
+        # Generate obstacles (walls); no wall may reach into the spawn area
+        sizes = placement_rng.integers(MIN_OBSTACLE_SIZE, MAX_OBSTACLE_SIZE + 1, (self.num_obstacles, 2))
+        occupancy = OccupancyGrid(grid_length)
+        clear = SPAWN_CLEARANCE + MAX_OBSTACLE_SIZE/2
+        occupancy.block_rect(-clear, -clear, clear, clear)
+        centers = place(occupancy, self.num_obstacles, placement_rng, kind="obstacles")
+        # Keep every wall inside the boundary
+        centers = np.clip(centers, -grid_length + sizes/2, grid_length - sizes/2)
+        self.obstacles = [[x, y, width, height]
+                          for (x, y), (width, height) in zip(centers.tolist(), sizes.tolist())]
+
+        # Obstacles are static for the level, so index them once
+        self.obstacle_grid = ObstacleGrid(self.obstacles)
+        self.flow_field = FlowField(grid_length, self.obstacles)
+
+        # Cells the player's collision box can stand in, and which of them are
+        # connected to the spawn: overlapping walls must not seal a chest away
+        radius = self.player_size/2
+        walkable = OccupancyGrid(grid_length)
+        walkable.block_outside(grid_length - radius)
+        walkable.block_boxes(self.obstacles, radius)
+        reachable = walkable.reachable_from(self.player_pos[0], self.player_pos[1])
+
+        # Generate treasures: reachable, clear of walls, the spawn area and each other
+        occupancy = OccupancyGrid(grid_length)
+        occupancy.blocked |= ~reachable
+        occupancy.block_outside(grid_length - TREASURE_MARGIN)
+        occupancy.block_rect(-SPAWN_CLEARANCE, -SPAWN_CLEARANCE, SPAWN_CLEARANCE, SPAWN_CLEARANCE)
+        occupancy.block_boxes(self.obstacles, TREASURE_CLEARANCE)
+        points = place(occupancy, self.num_treasures, placement_rng, TREASURE_SPACING, kind="treasures")
+        self.treasures = [[x, y, False] for x, y in points.tolist()]  # x, y, collected status
+
+        # Generate monsters and their patrol routes
+        routes = []
+        speeds = []
+        for _ in range(self.num_monsters):
+            # Create patrol points
+            patrol_points = []
+            for _ in range(rng.randint(3, 6)):
+                px = rng.randint(-grid_length + 50, grid_length - 50)
+                py = rng.randint(-grid_length + 50, grid_length - 50)
+                patrol_points.append([px, py])
+            routes.append(patrol_points)
+            speeds.append(rng.uniform(0.3, 1.0))
+
+        # Initial position of each monster is its first patrol point
+        self.monsters = MonsterStore.from_routes(routes, speeds)
+
+        # Stone texture detail, generated last so it doesn't shift the gameplay rolls above
+        self.obstacle_details = []
+        for ox, oy, width, height in self.obstacles:
+            for _ in range(DETAILS_PER_OBSTACLE):
+                dx = rng.uniform(-width/2.2, width/2.2)
+                dy = rng.uniform(-height/2.2, height/2.2)
+                dz = rng.uniform(-WALL_HEIGHT/2.2, WALL_HEIGHT/2.2)
+                dsize = rng.uniform(5, 15)
+                self.obstacle_details.append([ox + dx, oy + dy, WALL_HEIGHT/2 + dz, dsize])
+
+    def generate_chunk(self, rng, x0, y0, size):
+        """Contents of the chunk with lower-left corner (x0, y0): the rules of init_game() at chunk scale.
+
+        rng is the chunk's own NumPy generator. Obstacles keep CHUNK_MARGIN
+        away from the chunk's edges, so the seams between chunks are always
+        walkable and a treasure reachable from its chunk's edge is reachable
+        from anywhere. Returns (obstacles, details, treasures, monsters) as
+        chunks.Chunk expects them.
+        """
+        half = size / 2
+        cx, cy = x0 + half, y0 + half
+        radius = self.player_size/2
+        spawn_x, spawn_y = -cx, -cy  # The map centre, where every game starts, in chunk coordinates
+
+        # Obstacles, clear of the spawn area and the chunk seams
+        sizes = rng.integers(MIN_OBSTACLE_SIZE, MAX_OBSTACLE_SIZE + 1, (self.num_obstacles, 2))
+        occupancy = OccupancyGrid(half)
+        clear = SPAWN_CLEARANCE + MAX_OBSTACLE_SIZE/2
+        occupancy.block_rect(spawn_x - clear, spawn_y - clear, spawn_x + clear, spawn_y + clear)
+        occupancy.block_outside(half - CHUNK_MARGIN)
+        centers = place(occupancy, self.num_obstacles, rng, kind="obstacles")
+        limit = half - CHUNK_MARGIN
+        centers = np.clip(centers, -limit + sizes/2, limit - sizes/2)
+        local_obstacles = np.column_stack((centers, sizes)).astype(np.float64)
+
+        # Treasures, only where the player can walk in from the seams
+        walkable = OccupancyGrid(half)
+        walkable.block_boxes(local_obstacles, radius)
+        reachable = walkable.reachable_from(-half, -half)  # The chunk's corner lies on the seams
+        occupancy = OccupancyGrid(half)
+        occupancy.blocked |= ~reachable
+        occupancy.block_outside(half - TREASURE_MARGIN)
+        occupancy.block_rect(spawn_x - SPAWN_CLEARANCE, spawn_y - SPAWN_CLEARANCE,
+                             spawn_x + SPAWN_CLEARANCE, spawn_y + SPAWN_CLEARANCE)
+        occupancy.block_boxes(local_obstacles, TREASURE_CLEARANCE)
+        treasures = place(occupancy, self.num_treasures, rng, TREASURE_SPACING, kind="treasures")
+
+        # Monsters patrolling 3-5 points inside the chunk
+        route_lengths = rng.integers(3, 6, self.num_monsters, endpoint=True)
+        points = rng.uniform(-half + 50, half - 50, (int(route_lengths.sum()), 2)) + (cx, cy)
+        routes = np.split(points, np.cumsum(route_lengths)[:-1]) if self.num_monsters else []
+        monsters = MonsterStore.from_routes(routes, rng.uniform(0.3, 1.0, self.num_monsters))
+
+        # Stone texture detail on every wall
+        boxes = np.repeat(local_obstacles, DETAILS_PER_OBSTACLE, axis=0)
+        offsets = rng.uniform(-1, 1, (len(boxes), 3)) / 2.2 * np.column_stack(
+            (boxes[:, 2], boxes[:, 3], np.full(len(boxes), WALL_HEIGHT)))
+        details = np.column_stack((boxes[:, 0] + offsets[:, 0] + cx, boxes[:, 1] + offsets[:, 1] + cy,
+                                   WALL_HEIGHT/2 + offsets[:, 2], rng.uniform(5, 15, len(boxes))))
+
+        obstacles = local_obstacles + (cx, cy, 0, 0)
+        return obstacles, details.reshape(-1, 4), treasures + (cx, cy), monsters
+
+    def stream(self):
+        """Re-centre a chunked world's resident area when the player enters another chunk.
+
+        The resident chunks replace the obstacles, treasures and monsters the
+        rest of the simulation works on; returns True if they changed.
+        """
+        world = self.world
+        px, py = self.player_pos[0], self.player_pos[1]
+        if world is None or not world.needs_focus(px, py):
+            return False
+        if world.resident:
+            world.store(self.treasures, self.monsters)
+        world.focus(px, py)
+        self.obstacles, self.obstacle_details, self.treasures, self.monsters = world.compose()
+        self.obstacle_grid = ObstacleGrid(self.obstacles)
+        self.area = world.area()
+        self.update_flow_window(force=True)
+        self.level_id += 1
+        return True
+
+    def update_flow_window(self, force=False):
+        """Keep a chunked world's chase flow field on a window around the player.
+
+        The resident area is far too big to search on every rebuild, and
+        only monsters within chase range follow the field. The window
+        reaches FLOW_WINDOW_MARGIN past CHASE_RADIUS and is re-centred once
+        the player is half the margin from its centre, so every chaser
+        stays inside it.
+        """
+        px, py = self.player_pos[0], self.player_pos[1]
+        ox, oy = self.flow_field.origin
+        limit = FLOW_WINDOW_MARGIN / 2
+        if not force and abs(px - ox) <= limit and abs(py - oy) <= limit:
+            return
+        # Centre on a nav cell corner so the raster lines up from one window to the next
+        cx = round(px / NAV_CELL_SIZE) * NAV_CELL_SIZE
+        cy = round(py / NAV_CELL_SIZE) * NAV_CELL_SIZE
+        half = CHASE_RADIUS + FLOW_WINDOW_MARGIN
+        reach = half + NAV_CLEARANCE
+        inside = sorted(self.obstacle_grid.query(cx - reach, cy - reach, cx + reach, cy + reach))
+        self.flow_field = FlowField(half, [self.obstacles[i] for i in inside], origin=(cx, cy))
+
+    def check_collision(self, x, y, radius=PLAYER_SIZE/2):
+        """Check if a position (x, y) with given radius collides with any obstacle."""
+        grid_length = self.grid_length
+
+        # Check boundary collisions
+        if x - radius < -grid_length or x + radius > grid_length or y - radius < -grid_length or y + radius > grid_length:
+            return True
+
+        # Check obstacle collisions against nearby grid cells only
+        return self.obstacle_grid.overlaps_circle(x, y, radius)
+
+    def key_down(self, k, shift_held=False):
+        """Handle a lower-cased key press: start/restart and stealth act immediately."""
+        self.input.shift = bool(shift_held)
+        self.input.press(k)
+
+        # Game restart
+        if k == b'r':
+            if self.game_over or self.game_won:
+                self.init_game()
+
+        # Game start
+        if k == b' ' and not self.game_active and not self.game_over and not self.game_won:
+            self.init_game()
+
+        # Toggle stealth mode (C key)
+        if k == b'c' and self.running:
+            self.player_hidden = not self.player_hidden
+
+    def key_up(self, k, shift_held=False):
+        """Handle a lower-cased key release."""
+        self.input.shift = bool(shift_held)
+        self.input.release(k)
+
+    def set_shift(self, held):
+        """Track the Shift key on its own (it has no key-down event of its own in GLUT)."""
+        self.input.shift = bool(held)
+
+    def movement_speed(self):
+        """Player speed in units per second, with stealth and boost applied."""
+        move_speed = self.player_speed
+        if self.player_hidden:
+            move_speed *= STEALTH_MULTIPLIER
+        if self.boost_active:
+            move_speed *= BOOST_MULTIPLIER
+        return move_speed
+
+    def update_boost(self):
+        """Start a boost while Shift is held and off cooldown; end it once it runs out."""
+        current_time = self.time
+
+        # Trigger boost if Shift is held and cooldown is over
+        if self.input.shift and not self.boost_active and current_time - self.last_boost_time >= BOOST_COOLDOWN:
+            self.boost_active = True
+            self.boost_start_time = current_time
+            self.last_boost_time = current_time
+
+        if self.boost_active and current_time - self.boost_start_time > BOOST_DURATION:
+            self.boost_active = False  # End boost
+
+    def update_input(self):
+        """Integrate held movement keys over one tick."""
+        if not self.running:
+            return
+
+        self.update_boost()
+
+        forward, strafe = self.input.move_axes()
+        if not forward and not strafe:
+            return
+
+        # Move along the player's facing (W/S) and sideways (A/D)
+        distance = self.movement_speed() * self.dt
+        angle = math.radians(self.player_angle)
+        cos_a, sin_a = math.cos(angle), math.sin(angle)
+        new_x = self.player_pos[0] + distance * (forward * cos_a - strafe * sin_a)
+        new_y = self.player_pos[1] + distance * (forward * sin_a + strafe * cos_a)
+
+        # Check for collisions before updating position
+        if not self.check_collision(new_x, new_y):
+            self.player_pos[0] = new_x
+            self.player_pos[1] = new_y
+
+    def update_player(self):
+        """Update player position and state."""
+        if not self.running:
+            return
+
+        self.index_entities()
+        player_pos = self.player_pos
+        player_size = self.player_size
+
+        # Check for treasure collection: only uncollected treasures are indexed
+        for i in self.treasure_grid.query(player_pos[0], player_pos[1], player_size + 20).tolist():
+            self.treasures[i][2] = True  # Mark as collected
+            self.treasure_grid.remove(i)
+            self.collected_treasures += 1
+
+            # Check if all treasures are collected
+            if self.collected_treasures >= self.treasures_needed:
+                self.game_won = True
+
+        # Check for monster collisions
+        if not self.player_hidden:  # Only check when not in stealth mode
+            # Every monster in contact deals 1 damage
+            touching = len(self.monster_grid.query(player_pos[0], player_pos[1], player_size + 25))
+            if touching:
+                self.player_health -= touching
+
+                # Game over if health depleted
+                if self.player_health <= 0:
+                    self.game_over = True
+
+        # Time limit check
+        if self.time - self.start_time > self.total_time_limit:
+            self.game_over = True
+
+    def update_monsters(self):
+        """Update monster positions and patrol routes."""
+        if not self.running:
+            return
+
+        # All monsters advance in one batched NumPy pass; chasers share one flow field
+        self.index_entities()
+        monsters = self.monsters
+        px, py = self.player_pos[0], self.player_pos[1]
+        if self.world is not None:
+            self.update_flow_window()
+        self.flow_field.retarget(px, py)
+        # Only monsters within chase range after this tick's patrol step can start chasing
+        nearby = self.monster_grid.candidates(px, py, CHASE_RADIUS + monsters.max_speed)
+        monsters.update(px, py, self.player_hidden, self.flow_field, nearby)
+        self.monster_grid.update(monsters.x, monsters.y)
+
+    def index_entities(self):
+        """Rebuild the treasure and monster proximity indexes if the level has changed."""
+        if self._indexed_level == self.level_id:
+            return
+        treasures = np.asarray(self.treasures, dtype=np.float64).reshape(-1, 3)
+        self.treasure_grid.rebuild(treasures[:, 0], treasures[:, 1], active=treasures[:, 2] == 0)
+        self.monster_grid.rebuild(self.monsters.x, self.monsters.y)
+        self._indexed_level = self.level_id
+
+    def step(self, n_ticks=1):
+        """Advance the simulation by n_ticks fixed timesteps."""
+        for _ in range(n_ticks):
+            if self.running:
+                self.update_input()
+                self.stream()
+                self.update_player()
+                self.update_monsters()
+            self.tick += 1
+            if self.on_tick is not None:
+                self.on_tick(self)
+
+    def advance(self, max_ticks=MAX_CATCHUP_TICKS):
+        """Run as many fixed ticks as the injected clock says are due; return the count."""
+        now = self.clock()
+        if self._last_clock is None:
+            self._last_clock = now
+        self._accumulator += now - self._last_clock
+        self._last_clock = now
+
+        n_ticks = int(self._accumulator / self.dt)
+        if n_ticks > max_ticks:
+            # Too far behind (debugger, window drag): drop the backlog instead of spiralling
+            n_ticks = max_ticks
+            self._accumulator = 0.0
+        else:
+            self._accumulator -= n_ticks * self.dt
+
+        self.step(n_ticks)
+        return n_ticks
+
+
+def build_arg_parser():
+    """Command-line options shared by the GLUT front-end and the headless runner."""
+    parser = argparse.ArgumentParser(description="Dungeon Crawler")
+    parser.add_argument("--headless", action="store_true",
+                        help="run the simulation without a window")
+    parser.add_argument("--ticks", type=int, default=TICK_RATE * TOTAL_TIME_LIMIT,
+                        help="number of fixed ticks to simulate in headless mode")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="random seed for level generation")
+    parser.add_argument("--chunked", action="store_true",
+                        help=f"stream a {2 * CHUNKED_GRID_LENGTH}-unit world in {CHUNK_SIZE}-unit chunks")
+    return parser
+
+
+def run_headless(ticks, seed=None, chunked=False):
+    """Simulate `ticks` fixed steps as fast as possible, restarting finished games."""
+    sim = Simulation(seed=seed, chunked=chunked)
+    sim.init_game()
+    games = wins = 0
+
+    wall_start = time.perf_counter()
+    for _ in range(ticks):
+        sim.step(1)
+        if sim.game_over or sim.game_won:
+            games += 1
+            wins += sim.game_won
+            sim.init_game()
+    wall_time = time.perf_counter() - wall_start
+
+    game_seconds = ticks * sim.dt
+    print(f"ticks={ticks} game_seconds={game_seconds:.1f} wall_seconds={wall_time:.3f} "
+          f"speedup={game_seconds / max(wall_time, 1e-9):.0f}x games_finished={games} wins={wins}")
+    return sim
+
+
+def main(argv=None):
+    """Entry point for `python simulation.py --headless --ticks N --seed S`; returns the final Simulation."""
+    args = build_arg_parser().parse_args(argv)
+    return run_headless(args.ticks, args.seed, args.chunked)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Versioned binary snapshots of the complete simulation state.
+
+A snapshot is one fixed struct holding every scalar (clock, player, boost,
+flags, level configuration) and the RNG state, followed by the level and
+entity arrays as raw little-endian blocks: obstacles, stone details,
+treasures and the monster store. Loading is a header unpack plus
+np.frombuffer views, so cost is dominated by copying the arrays, not by
+per-field parsing; derived indexes (obstacle grid, flow field) are rebuilt.
+
+The same bytes serve as in-memory checkpoints (dumps/loads), crash
+recovery files and test fixtures (save/load). checksum() condenses the
+parts of the state that change from tick to tick into one CRC32, cheap
+enough to take every tick when verifying replays.
+
+Streamed (chunked) worlds are not supported: their state includes the
+chunk cache, which snapshots do not capture.
+"""
+import struct
+import zlib
+
+import numpy as np
+
+from flow_field import FlowField
+from input_state import InputState
+from monsters import MonsterStore
+from simulation import Simulation
+from spatial import ObstacleGrid
+
+SNAPSHOT_MAGIC = b'DCSS'
+SNAPSHOT_VERSION = 1
+
+# Scalars, in this order (see _scalars()); '?' are bools, 'q' ints, 'd' floats
+_STATE = struct.Struct(
+    '<4sI'        # magic, version
+    'qqqd'        # tick, tick_rate, level_id, accumulator
+    'qqqqqq'      # num_treasures, num_monsters, num_obstacles, grid_length, total_time_limit, treasures_needed
+    '???d'        # game_active, game_won, game_over, start_time
+    'dddddqqq?'   # player x, y, z, angle, speed, size, health, collected treasures, hidden
+    '?dd'         # boost_active, boost_start_time, last_boost_time
+    '?d?'         # shift held, gauss_next, gauss_next set
+    'qqqq'        # array lengths: obstacles, details, treasures, monsters
+    'qq'          # patrol points, held key bytes
+)
+_RNG_WORDS = 625  # random.Random state: 624 Mersenne Twister words plus the index
+
+
+def _scalars(sim, gauss_next, accumulator):
+    """Everything that goes into _STATE, in order (gauss_next comes from the RNG state)."""
+    x, y, z = sim.player_pos
+    return (
+        SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+        sim.tick, sim.tick_rate, sim.level_id, accumulator,
+        sim.num_treasures, sim.num_monsters, sim.num_obstacles, sim.grid_length,
+        sim.total_time_limit, sim.treasures_needed,
+        sim.game_active, sim.game_won, sim.game_over, sim.start_time,
+        x, y, z, sim.player_angle, sim.player_speed, sim.player_size, sim.player_health,
+        sim.collected_treasures, sim.player_hidden,
+        sim.boost_active, sim.boost_start_time, sim.last_boost_time,
+        sim.input.shift, gauss_next or 0.0, gauss_next is not None,
+        len(sim.obstacles), len(sim.obstacle_details), len(sim.treasures), len(sim.monsters),
+        len(sim.monsters.patrol_x), len(sim.input.held),
+    )
+
+
+def dumps(sim):
+    """Serialize a Simulation to bytes; raises ValueError for a streamed world."""
+    if sim.world is not None:
+        raise ValueError("snapshots of chunked worlds are not supported")
+    treasures = np.asarray(sim.treasures, dtype=np.float64).reshape(-1, 3)
+    monsters = sim.monsters
+    rng_state = sim.rng.getstate()
+    blocks = (
+        (rng_state[1], '<u4'),
+        (np.asarray(sim.obstacles, dtype=np.float64).reshape(-1, 4), '<f8'),
+        (np.asarray(sim.obstacle_details, dtype=np.float64).reshape(-1, 4), '<f8'),
+        (treasures, '<f8'),
+        (monsters.x, '<f8'), (monsters.y, '<f8'), (monsters.direction, '<f8'), (monsters.speed, '<f8'),
+        (monsters.target, '<i8'), (monsters.offsets, '<i8'),
+        (monsters.patrol_x, '<f8'), (monsters.patrol_y, '<f8'),
+    )
+    parts = [_STATE.pack(*_scalars(sim, rng_state[2], sim._accumulator))]
+    parts.extend(np.ascontiguousarray(block, dtype=dtype).tobytes() for block, dtype in blocks)
+    parts.append(b''.join(sorted(sim.input.held)))
+    return b''.join(parts)
+
+
+def checksum(sim):
+    """CRC32 of the per-tick state: every scalar, the treasures and the monster store.
+
+    The static level arrays and the RNG state are left out; they only
+    change in init_game(), which also changes level_id and the treasures.
+    So is the tick accumulator: it follows the wall clock that advance()
+    reads, not gameplay, and a replay steps ticks without it.
+    """
+    monsters = sim.monsters
+    crc = zlib.crc32(_STATE.pack(*_scalars(sim, None, 0.0)))
+    crc = zlib.crc32(np.asarray(sim.treasures, dtype=np.float64).tobytes(), crc)
+    for array in (monsters.x, monsters.y, monsters.direction, monsters.target):
+        crc = zlib.crc32(array.tobytes(), crc)
+    return crc
+
+
+def loads(data, sim=None, **kwargs):
+    """Restore a Simulation from dumps() output.
+
+    Fills sim in place when given (keeping its clock), otherwise builds a
+    new Simulation with kwargs. Raises ValueError on foreign or
+    newer-version data.
+    """
+    if len(data) < _STATE.size:
+        raise ValueError("snapshot is truncated")
+    fields = _STATE.unpack_from(data)
+    magic, version = fields[:2]
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("not a Dungeon Crawler snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"snapshot version {version} is not supported (expected {SNAPSHOT_VERSION})")
+    (tick, tick_rate, level_id, accumulator,
+     num_treasures, num_monsters, num_obstacles, grid_length, total_time_limit, treasures_needed,
+     game_active, game_won, game_over, start_time,
+     x, y, z, angle, speed, size, health, collected, hidden,
+     boost_active, boost_start_time, last_boost_time,
+     shift, gauss_next, has_gauss,
+     n_obstacles, n_details, n_treasures, n_monsters, n_patrol, n_held) = fields[2:]
+
+    offset = _STATE.size
+
+    def take(dtype, count, *shape):
+        nonlocal offset
+        array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+        offset += array.nbytes
+        return array.reshape(*shape) if shape else array
+
+    rng_words = take('<u4', _RNG_WORDS)
+    obstacles = take('<f8', n_obstacles * 4, -1, 4)
+    details = take('<f8', n_details * 4, -1, 4)
+    treasures = take('<f8', n_treasures * 3, -1, 3)
+    monster_arrays = [take('<f8', n_monsters).astype(np.float64) for _ in range(4)]
+    target = take('<i8', n_monsters).astype(np.int64)
+    offsets = take('<i8', n_monsters + 1).astype(np.int64)
+    patrol_x = take('<f8', n_patrol).astype(np.float64)
+    patrol_y = take('<f8', n_patrol).astype(np.float64)
+    held = bytes(data[offset:offset + n_held])
+
+    if sim is None:
+        sim = Simulation(**kwargs)
+        sim.level_id = level_id
+    else:
+        # Renderers cache per level_id; make sure they notice the swapped-in level
+        sim.level_id = max(sim.level_id, level_id) + 1
+    sim.tick_rate = tick_rate
+    sim.dt = 1.0 / tick_rate
+    sim.tick = tick
+    sim._accumulator = accumulator
+    sim._last_clock = None
+    sim.num_treasures = num_treasures
+    sim.num_monsters = num_monsters
+    sim.num_obstacles = num_obstacles
+    sim.grid_length = grid_length
+    sim.chunked = False
+    sim.world = None
+    sim.area = (0.0, 0.0, grid_length)
+    sim.total_time_limit = total_time_limit
+    sim.treasures_needed = treasures_needed
+    sim.game_active = game_active
+    sim.game_won = game_won
+    sim.game_over = game_over
+    sim.start_time = start_time
+    sim.player_pos = [x, y, z]
+    sim.player_angle = angle
+    sim.player_speed = speed
+    sim.player_size = size
+    sim.player_health = health
+    sim.collected_treasures = collected
+    sim.player_hidden = hidden
+    sim.boost_active = boost_active
+    sim.boost_start_time = boost_start_time
+    sim.last_boost_time = last_boost_time
+    sim.rng.setstate((3, tuple(rng_words.tolist()), gauss_next if has_gauss else None))
+
+    sim.input = InputState()
+    sim.input.shift = shift
+    sim.input.held = {held[i:i + 1] for i in range(len(held))}
+
+    # Level contents keep the list-of-lists shape the rest of the game expects
+    sim.obstacles = obstacles.tolist()
+    sim.obstacle_details = details.tolist()
+    sim.treasures = [[tx, ty, bool(tc)] for tx, ty, tc in treasures.tolist()]
+    sim.monsters = MonsterStore(*monster_arrays, target, offsets, patrol_x, patrol_y)
+    sim.obstacle_grid = ObstacleGrid(sim.obstacles)
+    sim.flow_field = FlowField(sim.grid_length, sim.obstacles)
+    return sim
+
+
+def save(sim, path):
+    """Write a snapshot file."""
+    with open(path, 'wb') as f:
+        f.write(dumps(sim))
+
+
+def load(path, sim=None, **kwargs):
+    """Read a snapshot file written by save(); see loads()."""
+    with open(path, 'rb') as f:
+        return loads(f.read(), sim, **kwargs)
+
@@ -0,0 +1,185 @@
+"""Spatial indexes for collision and proximity queries."""
+import math
+
+import numpy as np
+
+OBSTACLE_CELL_SIZE = 100  # Roughly the average obstacle footprint
+ENTITY_CELL_SIZE = 200    # The chase radius; pickup and contact queries fit in a 2x2 block
+ENTITY_SCAN_POINTS = 32   # Up to this many points are scanned directly instead of bucketed
+
+
+class ObstacleGrid:
+    """Static uniform-grid hash over axis-aligned obstacles [x, y, width, height].
+
+    Built once per level; each obstacle is registered in every cell its box
+    touches, so a query only has to look at the few cells around it.
+    """
+
+    def __init__(self, obstacles, cell_size=OBSTACLE_CELL_SIZE):
+        self.cell_size = cell_size
+        self.obstacles = obstacles
+        self.cells = {}  # (cx, cy) -> list of obstacle indices
+
+        # Bounds of each obstacle, precomputed so queries don't redo the halving
+        self.bounds = []
+        for i, (ox, oy, width, height) in enumerate(obstacles):
+            box = (ox - width/2, oy - height/2, ox + width/2, oy + height/2)
+            self.bounds.append(box)
+            for cell in self._cells_for(*box):
+                self.cells.setdefault(cell, []).append(i)
+
+    def _cells_for(self, xmin, ymin, xmax, ymax):
+        """Yield every cell key covered by a box (edges included)."""
+        size = self.cell_size
+        cx0, cx1 = math.floor(xmin / size), math.floor(xmax / size)
+        cy0, cy1 = math.floor(ymin / size), math.floor(ymax / size)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                yield (cx, cy)
+
+    def query(self, xmin, ymin, xmax, ymax):
+        """Return indices of obstacles whose box strictly overlaps the query box."""
+        bounds = self.bounds
+        cells = self.cells
+        found = set()
+        for cell in self._cells_for(xmin, ymin, xmax, ymax):
+            for i in cells.get(cell, ()):
+                if i in found:
+                    continue
+                bx0, by0, bx1, by1 = bounds[i]
+                if xmax > bx0 and xmin < bx1 and ymax > by0 and ymin < by1:
+                    found.add(i)
+        return found
+
+    def overlaps_box(self, xmin, ymin, xmax, ymax):
+        """True if any obstacle strictly overlaps the query box."""
+        bounds = self.bounds
+        cells = self.cells
+        for cell in self._cells_for(xmin, ymin, xmax, ymax):
+            for i in cells.get(cell, ()):
+                bx0, by0, bx1, by1 = bounds[i]
+                if xmax > bx0 and xmin < bx1 and ymax > by0 and ymin < by1:
+                    return True
+        return False
+
+    def overlaps_circle(self, x, y, radius):
+        """True if a circle's bounding square overlaps any obstacle (the game's collision test)."""
+        return self.overlaps_box(x - radius, y - radius, x + radius, y + radius)
+
+
+class EntityGrid:
+    """Dynamic uniform-grid hash over moving points, kept up to date incrementally.
+
+    update() recomputes every point's cell in one NumPy pass and only moves
+    the points whose cell changed between buckets, so keeping the index
+    current costs little more than the movement itself. Radius queries then
+    look at the few cells around the query point and compare squared
+    distances, so their cost follows local density, not the point count.
+
+    A handful of points (ENTITY_SCAN_POINTS or fewer, as in the classic
+    level) is not bucketed at all: queries scan every active point in plain
+    Python, which is cheaper than any NumPy call at that size.
+    """
+
+    def __init__(self, cell_size=ENTITY_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}  # (cx, cy) -> set of point indices
+        self.x = self.y = np.zeros(0)
+        self.cell_x = self.cell_y = np.zeros(0, dtype=np.int64)
+        self.active = np.zeros(0, dtype=bool)
+        self.scan = []  # Active point indices while the grid scans instead of bucketing, else None
+
+    def __len__(self):
+        return len(self.x)
+
+    def _cells_of(self, x, y):
+        # floor(x / size) is several times faster than x // size on float arrays
+        size = self.cell_size
+        return np.floor(x / size).astype(np.int64), np.floor(y / size).astype(np.int64)
+
+    def rebuild(self, x, y, active=None):
+        """Index points x, y from scratch; points where active is False are left out."""
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.active = np.ones(len(self.x), dtype=bool) if active is None else np.asarray(active, dtype=bool)
+        if len(self.x) <= ENTITY_SCAN_POINTS:
+            self.scan = np.flatnonzero(self.active).tolist()
+            self.cells = {}
+            return
+        self.scan = None
+        self.cell_x, self.cell_y = self._cells_of(self.x, self.y)
+        cells = self.cells = {}
+        for i in np.flatnonzero(self.active).tolist():
+            cells.setdefault((int(self.cell_x[i]), int(self.cell_y[i])), set()).add(i)
+
+    def update(self, x, y):
+        """Move the points to new positions x, y (float arrays); a different point count means a rebuild."""
+        if len(x) != len(self.x):
+            self.rebuild(x, y)
+            return
+        if self.scan is not None:
+            self.x, self.y = x, y
+            return
+        cell_x, cell_y = self._cells_of(x, y)
+        moved = np.flatnonzero(((cell_x != self.cell_x) | (cell_y != self.cell_y)) & self.active)
+        cells = self.cells
+        for i, old_x, old_y, new_x, new_y in zip(moved.tolist(), self.cell_x[moved].tolist(),
+                                                 self.cell_y[moved].tolist(), cell_x[moved].tolist(),
+                                                 cell_y[moved].tolist()):
+            bucket = cells[(old_x, old_y)]
+            bucket.discard(i)
+            if not bucket:
+                del cells[(old_x, old_y)]
+            cells.setdefault((new_x, new_y), set()).add(i)
+        self.x, self.y = x, y
+        self.cell_x, self.cell_y = cell_x, cell_y
+
+    def remove(self, i):
+        """Drop point i from the index (e.g. a collected treasure)."""
+        if not self.active[i]:
+            return
+        self.active[i] = False
+        if self.scan is not None:
+            self.scan.remove(i)
+            return
+        key = (int(self.cell_x[i]), int(self.cell_y[i]))
+        bucket = self.cells[key]
+        bucket.discard(i)
+        if not bucket:
+            del self.cells[key]
+
+    def candidates(self, x, y, radius):
+        """Indices of the points in every cell the square around (x, y) touches (the broad phase)."""
+        if self.scan is not None:
+            return np.array(self.scan, dtype=np.int64)
+        size = self.cell_size
+        cx0, cx1 = math.floor((x - radius) / size), math.floor((x + radius) / size)
+        cy0, cy1 = math.floor((y - radius) / size), math.floor((y + radius) / size)
+        cells = self.cells
+        found = []
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.extend(bucket)
+        return np.array(found, dtype=np.int64)
+
+    def query(self, x, y, radius):
+        """Indices of the points strictly closer than radius to (x, y)."""
+        if self.scan is not None:
+            xs = self.x.tolist()
+            ys = self.y.tolist()
+            squared = radius*radius
+            found = []
+            for i in self.scan:
+                dx = xs[i] - x
+                dy = ys[i] - y
+                if dx*dx + dy*dy < squared:
+                    found.append(i)
+            return np.array(found, dtype=np.int64)
+        found = self.candidates(x, y, radius)
+        if not len(found):
+            return found
+        dx = self.x[found] - x
+        dy = self.y[found] - y
+        return found[dx*dx + dy*dy < radius*radius]
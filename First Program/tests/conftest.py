@@ -0,0 +1,5 @@
+"""The game's modules live in the directory above; make them importable as they are by the scripts."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
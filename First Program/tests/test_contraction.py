@@ -0,0 +1,60 @@
+import math
+import os
+
+import numpy as np
+import pytest
+
+from contraction import ContractionHierarchy, write_synthetic_graph
+from road_graph import load_graph, search
+
+INPUT_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Inputfile.txt')
+
+
+def path_cost(graph, names):
+    """Cost of walking a path of city names along original edges; fails if an edge is missing."""
+    cost = 0.0
+    for a, b in zip(names, names[1:]):
+        targets, weights = graph.neighbours(graph.node(a))
+        matches = weights[targets == graph.node(b)]
+        assert len(matches), f"no edge {a} -> {b}"
+        cost += matches.min()
+    return cost
+
+
+def check_against_dijkstra(graph, hierarchy, pairs):
+    for start, goal in pairs:
+        expected = search(graph, start, goal, 'dijkstra')
+        path, cost, _ = hierarchy.query(start, goal)
+        assert cost == expected.cost
+        if math.isinf(cost):
+            assert path == []
+        else:
+            assert path[0] == graph.names[start] and path[-1] == graph.names[goal]
+            assert path_cost(graph, path) == cost
+
+
+def test_hierarchy_matches_dijkstra_on_input_file():
+    graph = load_graph(INPUT_FILE)
+    hierarchy = ContractionHierarchy.build(graph)
+    n = graph.num_nodes
+    check_against_dijkstra(graph, hierarchy, [(a, b) for a in range(n) for b in range(n)])
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_hierarchy_matches_dijkstra_on_synthetic_graph(tmp_path, seed):
+    path = str(tmp_path / 'synthetic.txt')
+    write_synthetic_graph(path, 400, seed)
+    graph = load_graph(path)
+    hierarchy = ContractionHierarchy.build(graph)
+    pairs = np.random.default_rng(seed).integers(0, graph.num_nodes, (60, 2)).tolist()
+    check_against_dijkstra(graph, hierarchy, pairs)
+
+
+def test_saved_hierarchy_answers_the_same(tmp_path):
+    graph = load_graph(INPUT_FILE)
+    hierarchy = ContractionHierarchy.build(graph)
+    sidecar = str(tmp_path / 'Inputfile.txt.ch')
+    hierarchy.save(sidecar)
+    loaded = ContractionHierarchy.load(graph, sidecar)
+    for goal in range(graph.num_nodes):
+        assert loaded.query(0, goal)[:2] == hierarchy.query(0, goal)[:2]
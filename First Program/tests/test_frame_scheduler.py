@@ -0,0 +1,106 @@
+import heapq
+
+import pytest
+
+import frame_scheduler
+from frame_scheduler import FrameScheduler
+from simulation import Simulation
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeGlut:
+    """Runs glutTimerFunc callbacks on a fake clock and 'draws' every posted redisplay."""
+
+    def __init__(self, monkeypatch, clock):
+        self.clock = clock
+        self.timers = []        # Heap of (fire time, order, callback, value)
+        self.order = 0
+        self.redisplay = False
+        self.scheduler = None
+        self.wakeup_times = []
+        self.frame_times = []
+        monkeypatch.setattr(frame_scheduler, 'glutTimerFunc', self.timer_func)
+        monkeypatch.setattr(frame_scheduler, 'glutPostRedisplay', self.post_redisplay)
+
+    def timer_func(self, milliseconds, callback, value):
+        self.order += 1
+        heapq.heappush(self.timers, (self.clock.now + milliseconds / 1000, self.order, callback, value))
+
+    def post_redisplay(self):
+        self.redisplay = True
+
+    def run(self, seconds):
+        end = self.clock.now + seconds
+        while self.timers and self.timers[0][0] <= end:
+            when, _, callback, value = heapq.heappop(self.timers)
+            self.clock.now = max(self.clock.now, when)
+            self.wakeup_times.append(self.clock.now)
+            callback(value)
+            if self.redisplay:
+                # GLUT calls the display function once the timer callback returns
+                self.redisplay = False
+                self.frame_times.append(self.clock.now)
+                self.scheduler.frame_rendered(0.001)
+        self.clock.now = end
+
+
+def front_end_update(sim):
+    """The front-end's update_frame() without the profiler and crash handling."""
+    was_running = sim.running
+    ticks = sim.advance()
+    return ticks > 0 and (was_running or sim.running)
+
+
+def start(monkeypatch, sim, clock, fps):
+    glut = FakeGlut(monkeypatch, clock)
+    glut.scheduler = FrameScheduler(lambda: front_end_update(sim), target_fps=fps, clock=clock,
+                                    animating=lambda: sim.running)
+    glut.scheduler.start()
+    return glut
+
+
+def test_idle_screen_drops_to_the_idle_interval(monkeypatch):
+    clock = FakeClock()
+    sim = Simulation(seed=1, clock=clock)  # Title screen: no game started
+    glut = start(monkeypatch, sim, clock, 120)
+    glut.run(10)
+
+    assert len(glut.frame_times) == 1  # Only the first frame
+    assert len(glut.wakeup_times) <= 10 * frame_scheduler.IDLE_FPS + 2
+    assert sim.tick > 0  # Ticks still ran; they just changed nothing worth drawing
+
+
+@pytest.mark.parametrize("fps", [60, 120])
+def test_running_game_keeps_the_frame_rate_between_ticks(monkeypatch, fps):
+    clock = FakeClock()
+    sim = Simulation(seed=2, clock=clock)
+    sim.init_game()
+    glut = start(monkeypatch, sim, clock, fps)
+    glut.run(5)
+
+    gaps = [b - a for a, b in zip(glut.wakeup_times, glut.wakeup_times[1:])]
+    assert max(gaps) <= 1.0 / fps + 1e-3  # Never an idle-length stall
+    # A frame for (nearly) every tick, never more than one per tick
+    assert 0.95 * 5 * sim.tick_rate <= len(glut.frame_times) <= 5 * sim.tick_rate + 1
+
+
+def test_game_over_draws_its_last_frame_then_idles(monkeypatch):
+    clock = FakeClock()
+    sim = Simulation(seed=3, clock=clock, total_time_limit=1, num_monsters=0)
+    sim.init_game()
+    glut = start(monkeypatch, sim, clock, 60)
+    glut.run(1.5)
+    assert sim.game_over
+    ended = glut.frame_times[-1]
+    glut.run(5)
+
+    assert glut.frame_times[-1] == ended
+    late = [t for t in glut.wakeup_times if t > ended + 1]
+    assert len(late) <= (clock.now - ended - 1) * frame_scheduler.IDLE_FPS + 2
@@ -0,0 +1,37 @@
+from input_state import InputState
+from simulation import Simulation
+
+
+def test_diagonals_are_normalised():
+    state = InputState()
+    state.press(b'w')
+    state.press(b'a')
+    forward, strafe = state.move_axes()
+    assert abs(forward * forward + strafe * strafe - 1) < 1e-12
+    state.press(b's')
+    assert state.move_axes() == (0.0, 1.0)
+
+
+def test_clear_forgets_keys_and_shift():
+    state = InputState()
+    state.press(b'w')
+    state.shift = True
+    state.clear()
+    assert not state.held and not state.shift
+    assert state.move_axes() == (0.0, 0.0)
+
+
+def test_restart_does_not_inherit_held_movement():
+    sim = Simulation(seed=1, num_monsters=0)
+    sim.init_game()
+    sim.key_down(b'w')
+    sim.key_down(b'a', shift_held=True)
+    sim.step(10)
+    sim.game_over = True
+
+    sim.key_down(b'r')
+    assert sim.running
+    assert not sim.input.held and not sim.input.shift
+    start = list(sim.player_pos)
+    sim.step(10)
+    assert sim.player_pos == start
@@ -0,0 +1,82 @@
+import math
+
+import numpy as np
+import pytest
+
+from monsters import SCALAR_MONSTERS, MonsterStore
+
+
+def reference_update(monsters, player_x, player_y, player_hidden):
+    """The original one-monster-at-a-time update over [x, y, direction, speed, route, target] lists."""
+    for i, (mx, my, direction, speed, patrol_points, target_idx) in enumerate(monsters):
+        tx, ty = patrol_points[target_idx]
+        dx = tx - mx
+        dy = ty - my
+        distance = math.sqrt(dx*dx + dy*dy)
+        if distance > 0:
+            direction = math.degrees(math.atan2(dy, dx))
+        if distance < 10:
+            target_idx = (target_idx + 1) % len(patrol_points)
+        else:
+            mx += (dx / distance) * speed
+            my += (dy / distance) * speed
+        if not player_hidden:
+            pdx = player_x - mx
+            pdy = player_y - my
+            player_distance = math.sqrt(pdx*pdx + pdy*pdy)
+            if player_distance < 200:
+                direction = math.degrees(math.atan2(pdy, pdx))
+                mx += (pdx / player_distance) * speed * 1.5
+                my += (pdy / player_distance) * speed * 1.5
+        monsters[i] = [mx, my, direction, speed, patrol_points, target_idx]
+
+
+def random_monsters(rng, n):
+    routes = [rng.uniform(-600, 600, (rng.integers(3, 6), 2)).tolist() for _ in range(n)]
+    speeds = rng.uniform(0.3, 1.0, n).tolist()
+    return routes, speeds
+
+
+# Both sides of SCALAR_MONSTERS: the plain-Python and the batched NumPy update
+@pytest.mark.parametrize("seed,count", [(0, 3), (1, 40), (2, 40), (3, SCALAR_MONSTERS)])
+def test_store_matches_per_monster_loop(seed, count):
+    rng = np.random.default_rng(seed)
+    routes, speeds = random_monsters(rng, count)
+    store = MonsterStore.from_routes(routes, speeds)
+    reference = [[route[0][0], route[0][1], 0.0, speed, route, 0] for route, speed in zip(routes, speeds)]
+
+    # The player wanders and hides now and then, so monsters patrol, chase and give up
+    for tick in range(2000):
+        player_x, player_y = 500 * math.cos(tick / 300), 500 * math.sin(tick / 200)
+        hidden = (tick // 250) % 3 == 2
+        reference_update(reference, player_x, player_y, hidden)
+        store.update(player_x, player_y, hidden)
+
+    np.testing.assert_allclose(store.x, [m[0] for m in reference], atol=1e-6)
+    np.testing.assert_allclose(store.y, [m[1] for m in reference], atol=1e-6)
+    np.testing.assert_allclose(store.direction, [m[2] for m in reference], atol=1e-6)
+    np.testing.assert_array_equal(store.target, [m[5] for m in reference])
+
+
+def test_nearby_subset_gives_the_same_result():
+    rng = np.random.default_rng(3)
+    routes, speeds = random_monsters(rng, 60)
+    full = MonsterStore.from_routes(routes, speeds)
+    subset = MonsterStore.from_routes(routes, speeds)
+    for tick in range(500):
+        player_x, player_y = 300 * math.cos(tick / 100), 300 * math.sin(tick / 100)
+        # Everything that can end its patrol step inside the chase radius
+        near = np.flatnonzero(np.hypot(subset.x - player_x, subset.y - player_y) < 200 + subset.max_speed)
+        full.update(player_x, player_y, False)
+        subset.update(player_x, player_y, False, nearby=near)
+    np.testing.assert_array_equal(subset.x, full.x)
+    np.testing.assert_array_equal(subset.y, full.y)
+
+
+def test_concatenate_and_slice_round_trip():
+    rng = np.random.default_rng(4)
+    stores = [MonsterStore.from_routes(*random_monsters(rng, n)) for n in (3, 0, 5)]
+    joined = MonsterStore.concatenate(stores)
+    assert len(joined) == 8
+    assert joined.routes() == stores[0].routes() + stores[2].routes()
+    assert joined.slice(3, 8).routes() == stores[2].routes()
@@ -0,0 +1,80 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+from placement import OccupancyGrid, PlacementError, flood_fill, place
+
+
+def test_place_keeps_points_free_and_apart():
+    occupancy = OccupancyGrid(600)
+    occupancy.block_rect(-100, -100, 100, 100)
+    occupancy.block_outside(550)
+    points = place(occupancy, 40, np.random.default_rng(0), min_spacing=100)
+
+    assert points.shape == (40, 2)
+    distance = np.linalg.norm(points[:, None] - points[None, :], axis=2)
+    assert distance[~np.eye(len(points), dtype=bool)].min() >= 100
+    assert not occupancy.blocked[tuple(np.array([occupancy.cell_of(x, y) for x, y in points]).T)].any()
+
+
+def test_place_without_spacing_fills_the_free_area():
+    occupancy = OccupancyGrid(100)
+    occupancy.block_rect(-100, -100, 0, 100)
+    points = place(occupancy, 500, np.random.default_rng(1))
+    assert points.shape == (500, 2)
+    assert (points[:, 0] >= 0).all()
+
+
+def test_impossible_placement_raises():
+    # A 200x200 area holds only a handful of points 150 apart
+    occupancy = OccupancyGrid(100)
+    with pytest.raises(PlacementError) as info:
+        place(occupancy, 50, np.random.default_rng(2), min_spacing=150, kind="treasures")
+    error = info.value
+    assert (error.kind, error.requested, error.min_spacing) == ("treasures", 50, 150)
+    assert 0 < error.placed < 50
+
+
+def test_placement_on_a_full_map_raises():
+    occupancy = OccupancyGrid(100)
+    occupancy.block_rect(-100, -100, 100, 100)
+    with pytest.raises(PlacementError):
+        place(occupancy, 3, np.random.default_rng(3))
+    with pytest.raises(PlacementError):
+        place(occupancy, 3, np.random.default_rng(3), min_spacing=10)
+
+
+def reference_flood_fill(blocked, start):
+    """Plain 4-connected breadth-first search."""
+    reached = np.zeros_like(blocked)
+    if blocked[start]:
+        return reached
+    rows, columns = blocked.shape
+    reached[start] = True
+    queue = deque([start])
+    while queue:
+        r, c = queue.popleft()
+        for nr, nc in ((r + 1, c), (r - 1, c), (r, c + 1), (r, c - 1)):
+            if 0 <= nr < rows and 0 <= nc < columns and not blocked[nr, nc] and not reached[nr, nc]:
+                reached[nr, nc] = True
+                queue.append((nr, nc))
+    return reached
+
+
+@pytest.mark.parametrize("density", [0.2, 0.4, 0.6])
+def test_flood_fill_matches_reference_bfs(density):
+    rng = np.random.default_rng(int(density * 10))
+    for _ in range(20):
+        blocked = rng.random((rng.integers(1, 40), rng.integers(1, 40))) < density
+        start = (int(rng.integers(blocked.shape[0])), int(rng.integers(blocked.shape[1])))
+        np.testing.assert_array_equal(flood_fill(blocked, start), reference_flood_fill(blocked, start))
+
+
+def test_flood_fill_follows_winding_corridors():
+    # A serpentine wall pattern: one long path that doubles back on every row
+    blocked = np.zeros((21, 21), dtype=bool)
+    blocked[1::4, :-1] = True
+    blocked[3::4, 1:] = True
+    np.testing.assert_array_equal(flood_fill(blocked, (0, 0)), reference_flood_fill(blocked, (0, 0)))
+    assert flood_fill(blocked, (0, 0)).sum() == (~blocked).sum()
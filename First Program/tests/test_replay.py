@@ -0,0 +1,36 @@
+import random
+
+from bots import GreedyTreasureBot
+from replay import Recorder, replay
+from simulation import Simulation
+
+
+class JitteredClock:
+    """A fake wall clock whose frames last a random 5-30 ms."""
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def tick(self):
+        self.now += self.rng.uniform(0.005, 0.030)
+
+
+def test_replay_verifies_session_recorded_through_advance():
+    clock = JitteredClock(7)
+    sim = Simulation(seed=3, clock=clock)
+    sim.init_game()
+    recorder = Recorder(sim)
+    bot = GreedyTreasureBot(3, recorder=recorder)
+    while sim.tick < 600:
+        bot.act(sim)
+        clock.tick()
+        sim.advance()
+
+    recording = recorder.recording()
+    result = replay(recording)
+    assert result.ticks == recording.num_ticks == sim.tick
+    assert result.diverged_at is None
@@ -0,0 +1,98 @@
+import random
+
+import numpy as np
+
+from simulation import MAX_CATCHUP_TICKS, Simulation, main
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def started(seed=1, **kwargs):
+    sim = Simulation(seed=seed, **kwargs)
+    sim.init_game()
+    return sim
+
+
+def state(sim):
+    """The parts of a game that move from tick to tick."""
+    return (sim.tick, list(sim.player_pos), sim.player_health, sim.collected_treasures,
+            sim.game_over, sim.game_won, [list(t) for t in sim.treasures],
+            sim.monsters.x.tolist(), sim.monsters.y.tolist(), sim.monsters.target.tolist())
+
+
+def test_step_advances_fixed_ticks():
+    sim = started()
+    sim.step(90)
+    assert sim.tick == 90
+    assert sim.time == 90 * sim.dt
+
+
+def test_advance_runs_the_ticks_the_clock_says_are_due():
+    clock = FakeClock()
+    sim = started(clock=clock)
+    assert sim.advance() == 0  # The first call only starts the clock
+
+    rng = random.Random(0)
+    ticks = 0
+    for _ in range(500):
+        clock.now += rng.uniform(0.001, 0.05)
+        ran = sim.advance()
+        assert 0 <= ran <= MAX_CATCHUP_TICKS
+        ticks += ran
+        # Every due tick has run; what is left is less than one tick
+        assert abs(ticks * sim.dt + sim._accumulator - clock.now) < 1e-9
+        assert 0 <= sim._accumulator < sim.dt
+    assert sim.tick == ticks
+
+
+def test_advance_caps_catch_up_and_drops_the_backlog():
+    clock = FakeClock()
+    sim = started(clock=clock)
+    sim.advance()
+    clock.now += 10.0  # E.g. the process was stopped in a debugger
+    assert sim.advance() == MAX_CATCHUP_TICKS
+    assert sim._accumulator == 0.0
+    clock.now += 2.5 * sim.dt
+    assert sim.advance() == 2
+    clock.now += 10.0
+    assert sim.advance(max_ticks=3) == 3
+
+
+def test_frame_rate_does_not_change_the_game():
+    # The same number of ticks, reached through different wall-clock frame lengths
+    results = []
+    for frame_seconds in (1 / 30, 1 / 144, None):
+        clock = FakeClock()
+        sim = started(seed=5, clock=clock)
+        if frame_seconds is None:
+            sim.step(600)
+        else:
+            sim.advance()
+            while sim.tick < 600:
+                clock.now += frame_seconds
+                sim.advance(max_ticks=600 - sim.tick)
+        results.append(state(sim))
+    assert results[0] == results[1] == results[2]
+
+
+def test_nothing_moves_outside_a_game():
+    sim = Simulation(seed=2)  # Title screen
+    sim.step(60)
+    assert sim.tick == 60
+    assert sim.player_pos == [0, 0, 0]
+
+
+def test_headless_runs_with_the_same_seed_end_in_the_same_state():
+    first = main(['--headless', '--ticks', '3000', '--seed', '11'])
+    second = main(['--headless', '--ticks', '3000', '--seed', '11'])
+    assert state(first) == state(second)
+    assert first.rng.getstate() == second.rng.getstate()
+
+    other = main(['--headless', '--ticks', '3000', '--seed', '12'])
+    assert not np.array_equal(other.monsters.x, first.monsters.x)
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+import spatial
+from spatial import EntityGrid
+
+
+@pytest.mark.parametrize("scan_points", [0, 1000])
+def test_entity_grid_queries_match_brute_force(monkeypatch, scan_points):
+    # scan_points 0 forces the bucketed grid, 1000 the plain scan
+    monkeypatch.setattr(spatial, 'ENTITY_SCAN_POINTS', scan_points)
+    rng = np.random.default_rng(0)
+    x, y = rng.uniform(-1000, 1000, (2, 300))
+    grid = EntityGrid()
+    grid.rebuild(x, y)
+    for i in rng.choice(300, 30, replace=False).tolist():
+        grid.remove(i)
+    active = grid.active.copy()
+
+    for _ in range(20):
+        x = x + rng.normal(0, 50, 300)
+        y = y + rng.normal(0, 50, 300)
+        grid.update(x, y)
+        for qx, qy, radius in rng.uniform((-1000, -1000, 10), (1000, 1000, 400), (10, 3)).tolist():
+            expected = np.flatnonzero(active & ((x - qx)**2 + (y - qy)**2 < radius * radius))
+            assert sorted(grid.query(qx, qy, radius).tolist()) == expected.tolist()
+            assert set(expected.tolist()) <= set(grid.candidates(qx, qy, radius).tolist())